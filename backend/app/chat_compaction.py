@@ -0,0 +1,138 @@
+"""
+Rolling summaries for long chat sessions.
+
+Once a session has enough messages older than the agent's history window that are not
+yet summarized, a background task folds them into `ChatSession.summary` with one model
+call and moves the `summary_through_id` checkpoint forward. Each compaction only reads
+the messages after the checkpoint, so the cost of a compaction stays flat however long
+the session gets. Chat turns then send the summary plus the messages after the
+checkpoint instead of the full transcript.
+
+Compaction runs after the turn is saved, never on the request path. A failed or
+interrupted compaction leaves the previous summary in place, and the next turn retries.
+"""
+import os
+import asyncio
+from typing import Dict, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from . import models
+from .execution import execution_service
+from .scheduler import Priority, scheduler
+from .logger import logger
+
+# Off unless enabled here or per agent with {"summarize": true} in knowledge_config
+CHAT_SUMMARY_ENABLED = os.getenv("CHAT_SUMMARY_ENABLED", "false").lower() in ("1", "true", "yes")
+# Unsummarized messages older than the history window that trigger a compaction
+CHAT_SUMMARY_MIN_MESSAGES = int(os.getenv("CHAT_SUMMARY_MIN_MESSAGES", "10"))
+# Messages folded in per model call
+CHAT_SUMMARY_BATCH_MESSAGES = int(os.getenv("CHAT_SUMMARY_BATCH_MESSAGES", "50"))
+CHAT_SUMMARY_MAX_WORDS = int(os.getenv("CHAT_SUMMARY_MAX_WORDS", "300"))
+
+def summaries_enabled(agent) -> bool:
+    setting = (getattr(agent, "knowledge_config", None) or {}).get("summarize")
+    return CHAT_SUMMARY_ENABLED if setting is None else bool(setting)
+
+class ChatCompactor:
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def is_active(self, session_id: str) -> bool:
+        task = self._tasks.get(session_id)
+        return task is not None and not task.done()
+
+    def schedule(self, session_id: str, user_id: int, keep_messages: int, session_factory: async_sessionmaker):
+        """Compact the session in the background, keeping the latest `keep_messages` verbatim."""
+        if self.is_active(session_id):
+            return
+        task = asyncio.create_task(self._run(session_id, user_id, keep_messages, session_factory))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None) if self._tasks.get(session_id) is task else None)
+
+    async def wait(self, session_id: str):
+        task = self._tasks.get(session_id)
+        if task:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def drain(self):
+        """Wait for every running compaction (a Celery job does, before its event loop closes)."""
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def shutdown(self):
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self, session_id: str, user_id: int, keep_messages: int, session_factory: async_sessionmaker):
+        try:
+            # Catch up in batches; each batch commits its own checkpoint
+            while await self._compact_once(session_id, user_id, keep_messages, session_factory):
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Chat compaction failed", extra={"extra_fields": {"session_id": session_id, "error": str(e)}})
+
+    @staticmethod
+    async def _window_start_id(db, session_id: str, keep_messages: int) -> Optional[int]:
+        # Oldest message of the recent window; everything before it may be summarized
+        if keep_messages <= 0:
+            return None
+        return (await db.execute(
+            select(models.ChatMessage.id)
+            .where(models.ChatMessage.session_id == session_id)
+            .order_by(models.ChatMessage.created_at.desc(), models.ChatMessage.id.desc())
+            .offset(keep_messages - 1).limit(1)
+        )).scalar_one_or_none()
+
+    async def _compact_once(self, session_id: str, user_id: int, keep_messages: int, session_factory: async_sessionmaker) -> bool:
+        async with session_factory() as db:
+            session = await db.get(models.ChatSession, session_id)
+            if session is None:
+                return False
+            checkpoint = session.summary_through_id
+            window_start = await self._window_start_id(db, session_id, keep_messages)
+            if keep_messages > 0 and window_start is None:
+                # The whole session still fits in the window
+                return False
+
+            query = select(models.ChatMessage.id, models.ChatMessage.role, models.ChatMessage.content).where(
+                models.ChatMessage.session_id == session_id
+            )
+            if checkpoint is not None:
+                query = query.where(models.ChatMessage.id > checkpoint)
+            if window_start is not None:
+                query = query.where(models.ChatMessage.id < window_start)
+            pending = (await db.execute(
+                query.order_by(models.ChatMessage.id.asc()).limit(CHAT_SUMMARY_BATCH_MESSAGES)
+            )).all()
+            if len(pending) < CHAT_SUMMARY_MIN_MESSAGES:
+                return False
+            previous_summary = session.summary
+            # Don't hold a connection across the model call
+            await db.rollback()
+
+        async with scheduler.slot(owner=user_id, flow=session_id, priority=Priority.BACKGROUND):
+            summary = await execution_service.summarize(
+                previous_summary,
+                [{"role": m.role, "content": m.content or ""} for m in pending],
+                max_words=CHAT_SUMMARY_MAX_WORDS,
+            )
+
+        async with session_factory() as db:
+            # Only advance from the checkpoint we read, in case another worker got there first
+            unchanged = (
+                models.ChatSession.summary_through_id.is_(None) if checkpoint is None
+                else models.ChatSession.summary_through_id == checkpoint
+            )
+            result = await db.execute(
+                update(models.ChatSession)
+                .where(models.ChatSession.id == session_id, unchanged)
+                .values(summary=summary, summary_through_id=pending[-1].id)
+            )
+            await db.commit()
+        return result.rowcount == 1 and len(pending) == CHAT_SUMMARY_BATCH_MESSAGES
+
+chat_compactor = ChatCompactor()
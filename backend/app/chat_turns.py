@@ -0,0 +1,134 @@
+"""
+Chat turns against an agent session, shared by the chat endpoints and background jobs.
+
+A turn loads the session with its agent and a bounded history window, runs the agent,
+then saves both messages, the execution log and the session counters in one commit.
+"""
+from typing import AsyncIterator, List
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+from . import models, execution, flight_recorder, context_window
+from .chat_compaction import chat_compactor, summaries_enabled
+from .scheduler import Priority, scheduler
+
+async def load_chat_context(db: AsyncSession, session_id: str, user_id: int):
+    session = (await db.execute(select(models.ChatSession).where(
+        models.ChatSession.id == session_id,
+        models.ChatSession.user_id == user_id
+    ))).scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    # Tools are loaded up front: lazy loads are not available on an async session
+    agent = (await db.execute(
+        select(models.Agent).options(selectinload(models.Agent.tools)).where(models.Agent.id == session.agent_id)
+    )).scalar_one_or_none()
+    
+    # Context: the agent's window over the latest messages, not the whole conversation.
+    # Messages already folded into the session summary are sent as that summary instead.
+    history = await _chat_window(db, session_id)
+    reserved = 0
+    if session.summary and session.summary_through_id is not None:
+        history = [m for m in history if m.id > session.summary_through_id]
+        reserved = context_window.estimate_tokens(session.summary)
+    history_dicts = [m.as_history() for m in context_window.apply_chat_history_policy(agent, history, reserved)]
+
+    # Don't hold a connection (or a Postgres snapshot) across the model call. The loaded
+    # objects are detached first, so ending the transaction doesn't expire them.
+    db.expunge_all()
+    await db.rollback()
+    return session, agent, history_dicts
+
+def _newest_first(query):
+    return query.order_by(models.ChatMessage.created_at.desc(), models.ChatMessage.id.desc())
+
+async def _chat_window(db: AsyncSession, session_id: str) -> List[context_window.ChatWindowMessage]:
+    latest_id = (await db.execute(
+        _newest_first(select(models.ChatMessage.id).where(models.ChatMessage.session_id == session_id)).limit(1)
+    )).scalar_one_or_none()
+    window = context_window.chat_windows.get(session_id, latest_id)
+    if window is None:
+        latest = (await db.execute(
+            _newest_first(select(models.ChatMessage).where(models.ChatMessage.session_id == session_id))
+            .limit(context_window.CHAT_HISTORY_CACHE_MESSAGES)
+        )).scalars().all()
+        window = (None, [context_window.ChatWindowMessage.from_model(m) for m in reversed(latest)])
+        context_window.chat_windows.put(session_id, *window)
+    return window[1]
+
+async def persist_chat_turn(db: AsyncSession, session: models.ChatSession, agent: models.Agent, prompt: str, execution_result: dict) -> dict:
+    response_text = execution_result["response_text"]
+    log_data = execution_result["log_data"]
+    tool_calls = log_data.get("tool_events", [])
+    
+    # Save User Message
+    user_msg = models.ChatMessage(session_id=session.id, role="user", content=prompt)
+    db.add(user_msg)
+    
+    # Save Execution Log (and its tool invocations)
+    flight_recorder.record_execution(db, agent.id, log_data, session_id=session.id)
+    
+    # Save Assistant Message with Tool Calls
+    assistant_msg = models.ChatMessage(
+        session_id=session.id, 
+        role="assistant", 
+        content=response_text,
+        tool_calls=tool_calls
+    )
+    db.add(assistant_msg)
+    
+    # Session timestamps and counters for the session list, in the same transaction
+    await db.execute(
+        update(models.ChatSession)
+        .where(models.ChatSession.id == session.id)
+        .values(
+            message_count=func.coalesce(models.ChatSession.message_count, 0) + 2,
+            last_message_at=func.now(),
+            updated_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    
+    await db.commit()
+    for message in (user_msg, assistant_msg):
+        context_window.chat_windows.append(session.id, context_window.ChatWindowMessage.from_model(message))
+
+    if summaries_enabled(agent):
+        # Summarize older turns in the background; compaction opens its own sessions on the same engine
+        keep_messages, _ = context_window.chat_history_policy(agent)
+        session_factory = async_sessionmaker(db.bind, autoflush=False, expire_on_commit=False)
+        chat_compactor.schedule(session.id, session.user_id, keep_messages, session_factory)
+    return {"response": response_text, "tool_calls": tool_calls}
+
+async def stream_agent_turn(session: models.ChatSession, agent: models.Agent, history: List[dict], prompt: str) -> AsyncIterator[dict]:
+    """
+    Run the agent under an interactive scheduler slot, yielding its events up to and
+    including `done`. Touches no database session, so it is safe to cancel.
+    """
+    async with scheduler.slot(owner=session.user_id, flow=session.id, priority=Priority.INTERACTIVE):
+        async for event in execution.execution_service.stream_agent(agent, prompt, history, summary=session.summary):
+            yield event
+            if event["event"] == "done":
+                return
+
+async def stream_chat_turn(db: AsyncSession, session: models.ChatSession, agent: models.Agent, history: List[dict], prompt: str) -> AsyncIterator[dict]:
+    """
+    Run a turn, yielding the agent's `token`, `tool_call_start` and `tool_call_end` events,
+    then persist it and yield a final `summary` event. A saturated scheduler raises 503.
+    """
+    execution_result = None
+    async for event in stream_agent_turn(session, agent, history, prompt):
+        if event["event"] == "done":
+            execution_result = event["data"]
+        else:
+            yield event
+
+    # The stream is complete: persist the turn, then report it
+    yield {"event": "summary", "data": await finish_chat_turn(db, session, agent, prompt, execution_result)}
+
+async def finish_chat_turn(db: AsyncSession, session: models.ChatSession, agent: models.Agent, prompt: str, execution_result: dict) -> dict:
+    """Persist a streamed turn and return its `summary` event data."""
+    result = await persist_chat_turn(db, session, agent, prompt, execution_result)
+    return {**result, "execution_time_ms": execution_result["log_data"]["execution_time_ms"]}
@@ -0,0 +1,168 @@
+"""
+Rolling message windows for building prompts from a growing conversation.
+
+A window holds an optional pinned opening message (the simulation topic) plus the latest
+N messages, as small immutable snapshots. Simulations and agent chat sessions each keep
+their own cache. Windows are cached per conversation and extended
+in place when a message is saved, so a turn only needs the conversation's latest id to
+confirm the cached window is current. Another worker appending in between shows up as
+a mismatch on that id, and the window is reloaded with one indexed, descending query.
+"""
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class WindowMessage:
+    id: int
+    sender_id: str
+    sender_name: str
+    content: str
+
+    @classmethod
+    def from_model(cls, message) -> "WindowMessage":
+        return cls(id=message.id, sender_id=message.sender_id, sender_name=message.sender_name, content=message.content or "")
+
+    def render(self) -> str:
+        return f"{self.sender_name}: {self.content}"
+
+@dataclass(frozen=True)
+class ChatWindowMessage:
+    id: int
+    role: str
+    content: str
+
+    @classmethod
+    def from_model(cls, message) -> "ChatWindowMessage":
+        return cls(id=message.id, role=message.role, content=message.content or "")
+
+    def render(self) -> str:
+        return self.content
+
+    def as_history(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+def estimate_tokens(text: str) -> int:
+    # Rough, tokenizer-free estimate (~4 characters per token for English text)
+    return (len(text) + 3) // 4
+
+def trim_to_budget(messages: List[Any], max_tokens: int) -> List[Any]:
+    """Drop the oldest messages until the estimate fits; the latest message is always kept."""
+    if max_tokens <= 0:
+        return messages
+    kept: List[Any] = []
+    used = 0
+    for message in reversed(messages):
+        cost = estimate_tokens(message.render())
+        if kept and used + cost > max_tokens:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept
+
+class MessageWindowCache:
+    """Bounded LRU of (pinned message, latest messages) per conversation key."""
+    def __init__(self, window_size: int, max_entries: int):
+        self.window_size = window_size
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[Any], List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, latest_id: Optional[int]) -> Optional[Tuple[Optional[Any], List[Any]]]:
+        """Return the cached window if its newest message is `latest_id`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            current = entry is not None and (entry[1][-1].id if entry[1] else None) == latest_id
+            if not current:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], list(entry[1])
+
+    def put(self, key: Hashable, pinned: Optional[Any], recent: Iterable[Any]):
+        with self._lock:
+            self._entries[key] = (pinned, list(recent)[-self.window_size:])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def append(self, key: Hashable, message: Any):
+        # Only extend windows we already hold; otherwise the next read loads it from the DB
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            pinned, recent = entry
+            if recent and recent[-1].id >= message.id:
+                # Out-of-order append from a concurrent writer: let the next read reload
+                del self._entries[key]
+                return
+            self._entries[key] = (pinned, (recent + [message])[-self.window_size:])
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Number of most recent simulation messages shown to the agent each turn
+SIMULATION_CONTEXT_MESSAGES = int(os.getenv("SIMULATION_CONTEXT_MESSAGES", "10"))
+# Optional cap on the estimated prompt tokens of those messages (0 = no cap)
+SIMULATION_CONTEXT_MAX_TOKENS = int(os.getenv("SIMULATION_CONTEXT_MAX_TOKENS", "0"))
+
+simulation_windows = MessageWindowCache(
+    window_size=SIMULATION_CONTEXT_MESSAGES,
+    max_entries=int(os.getenv("SIMULATION_CONTEXT_CACHE_SIZE", "1024")),
+)
+
+# Agent chat: each agent may set "history_messages" / "history_max_tokens" in its
+# knowledge_config (or personality_config); these are the defaults
+CHAT_HISTORY_MESSAGES = int(os.getenv("CHAT_HISTORY_MESSAGES", "20"))
+CHAT_HISTORY_MAX_TOKENS = int(os.getenv("CHAT_HISTORY_MAX_TOKENS", "0"))
+# Messages cached per session, which is also the most an agent can ask for
+CHAT_HISTORY_CACHE_MESSAGES = int(os.getenv("CHAT_HISTORY_CACHE_MESSAGES", "100"))
+
+chat_windows = MessageWindowCache(
+    window_size=CHAT_HISTORY_CACHE_MESSAGES,
+    max_entries=int(os.getenv("CHAT_HISTORY_CACHE_SIZE", "1024")),
+)
+
+def _config_int(configs: Iterable[Optional[dict]], key: str) -> Optional[int]:
+    for config in configs:
+        value = (config or {}).get(key)
+        if value is None or isinstance(value, bool):
+            continue
+        try:
+            return max(0, int(value))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+def chat_history_policy(agent) -> Tuple[int, int]:
+    """(max messages, max estimated tokens) of history sent with each of the agent's chat turns."""
+    configs = (getattr(agent, "knowledge_config", None), getattr(agent, "personality_config", None))
+    max_messages = _config_int(configs, "history_messages")
+    max_tokens = _config_int(configs, "history_max_tokens")
+    max_messages = CHAT_HISTORY_MESSAGES if max_messages is None else max_messages
+    max_tokens = CHAT_HISTORY_MAX_TOKENS if max_tokens is None else max_tokens
+    return min(max_messages, CHAT_HISTORY_CACHE_MESSAGES), max_tokens
+
+def apply_chat_history_policy(agent, messages: List[ChatWindowMessage], reserved_tokens: int = 0) -> List[ChatWindowMessage]:
+    """Latest messages allowed by the agent's policy; `reserved_tokens` (e.g. a session summary) count against the budget."""
+    max_messages, max_tokens = chat_history_policy(agent)
+    if max_messages == 0:
+        return []
+    if max_tokens > 0:
+        max_tokens = max(1, max_tokens - reserved_tokens)
+    return trim_to_budget(messages[-max_messages:], max_tokens)
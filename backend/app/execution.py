@@ -2,16 +2,93 @@ import os
 import time
 import re
 import json
-from google import genai
+import asyncio
 from google.genai import types
-from typing import List, Dict, Any, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Dict, Any, Tuple, Optional, Callable, AsyncIterator
 from .tools_registry import tool_service
+from .llm_providers import get_provider
+
+# Tool round trips per execution, after the first model turn; keeps tool loops bounded
+MAX_TOOL_ROUNDS = 5
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Session-independent snapshot of a Tool row, enough for ToolService.execute_tool."""
+    id: str
+    name: str
+    type: str
+    configuration: Dict[str, Any]
+
+@dataclass(frozen=True)
+class CompiledAgent:
+    """System prompt and Gemini tool bundle derived from an agent and its tools."""
+    fingerprint: Tuple
+    system_prompt: str
+    gemini_tools: List[types.Tool]
+    tools_map: Dict[str, ToolSpec]
+    available_tools: List[str]
+    tool_ids: frozenset
+
+class CompiledAgentCache:
+    """
+    Bounded LRU of CompiledAgent keyed by agent id. An entry is only served while its
+    fingerprint (agent version + tool versions) still matches, so edits made by other
+    workers are picked up too; local edits also invalidate explicitly.
+    """
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CompiledAgent]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, agent_id: str, fingerprint: Tuple) -> Optional[CompiledAgent]:
+        with self._lock:
+            compiled = self._entries.get(agent_id)
+            if compiled is None or compiled.fingerprint != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(agent_id)
+            self.hits += 1
+            return compiled
+
+    def put(self, agent_id: str, compiled: CompiledAgent):
+        with self._lock:
+            self._entries[agent_id] = compiled
+            self._entries.move_to_end(agent_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_agent(self, agent_id: str):
+        with self._lock:
+            self._entries.pop(agent_id, None)
+
+    def invalidate_tool(self, tool_id: str):
+        with self._lock:
+            for agent_id in [a for a, c in self._entries.items() if tool_id in c.tool_ids]:
+                del self._entries[agent_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
 class ExecutionService:
     def __init__(self):
-        # Configure Gemini API
-        api_key = os.getenv("GOOGLE_API_KEY", "your-api-key-here")
-        self.client = genai.Client(api_key=api_key)
+        # Upper bound on tool calls from a single model turn that run at the same time
+        self.max_concurrent_tools = int(os.getenv("TOOL_CALL_CONCURRENCY", "4"))
+
+        # Compiled system prompts / tool declarations, reused across chat turns
+        self.compiled_cache = CompiledAgentCache(int(os.getenv("AGENT_COMPILE_CACHE_SIZE", "256")))
+
+        # Model backend (Gemini by default, LLM_PROVIDER=stub for offline runs)
+        self.provider = get_provider()
+        self.model = os.getenv("LLM_MODEL", "gemini-2.0-flash")
         
         # Generation config
         self.generation_config = types.GenerateContentConfig(
@@ -41,32 +118,70 @@ class ExecutionService:
             
         return prompt
 
-    async def execute_agent(self, agent_model: Any, user_prompt: str, history: List[Dict[str, str]] = []) -> Dict[str, Any]:
-        """
-        Returns a dictionary with:
-        - response_text: The public response
-        - log_data: Dict containing full context, raw response, thought process, timing
-        """
-        start_time = time.time()
-        
+    def _fingerprint(self, agent_model: Any, tools: List[Any]) -> Tuple:
+        # Versions are bumped by the agent/tool update endpoints; the rest guards rows edited elsewhere
+        return (
+            getattr(agent_model, "version", None),
+            getattr(agent_model, "updated_at", None),
+            agent_model.name,
+            agent_model.purpose,
+            json.dumps(agent_model.personality_config or {}, sort_keys=True, default=str),
+            tuple((t.id, getattr(t, "version", None), t.is_active) for t in tools),
+        )
+
+    def compile_agent(self, agent_model: Any) -> CompiledAgent:
+        """Return the agent's system prompt and tool bundle, from cache when still valid."""
+        tools = list(getattr(agent_model, "tools", None) or [])
+        agent_id = getattr(agent_model, "id", None)
+        fingerprint = self._fingerprint(agent_model, tools)
+        if agent_id is not None:
+            compiled = self.compiled_cache.get(agent_id, fingerprint)
+            if compiled is not None:
+                return compiled
+
         system_prompt = self.construct_system_prompt(
             agent_model.name, 
             agent_model.purpose, 
             agent_model.personality_config or {}
         )
+        gemini_tools, tools_map = self._build_tools(tools)
+        compiled = CompiledAgent(
+            fingerprint=fingerprint,
+            system_prompt=system_prompt,
+            gemini_tools=gemini_tools,
+            tools_map=tools_map,
+            available_tools=[t.name for t in tools if t.is_active],
+            tool_ids=frozenset(t.id for t in tools),
+        )
+        if agent_id is not None:
+            self.compiled_cache.put(agent_id, compiled)
+        return compiled
+
+    def invalidate_agent(self, agent_id: str):
+        self.compiled_cache.invalidate_agent(agent_id)
+
+    def invalidate_tool(self, tool_id: str):
+        self.compiled_cache.invalidate_tool(tool_id)
 
-        # Prepare tools
+    def _build_tools(self, tools: List[Any]) -> Tuple[List[types.Tool], Dict[str, ToolSpec]]:
+        """Map active tools to Gemini declarations and a safe-name lookup."""
         gemini_tools = []
         tools_map = {}
-        if hasattr(agent_model, "tools") and agent_model.tools:
+        if tools:
             # Map tools to Gemini format
             functions = []
-            for tool in agent_model.tools:
+            for tool in tools:
                 if not tool.is_active: continue
                 
                 # Sanitize name for Gemini (alphanumeric + underscores only)
                 safe_name = re.sub(r'[^a-zA-Z0-9_]', '_', tool.name)
-                tools_map[safe_name] = tool # Map safe name back to tool model
+                # Map safe name back to the tool
+                tools_map[safe_name] = ToolSpec(
+                    id=tool.id,
+                    name=tool.name,
+                    type=tool.type,
+                    configuration=dict(tool.configuration or {}),
+                )
                 
                 # Sanitize schema for Gemini SDK
                 # Remove keys that might cause Pydantic validation errors in types.Schema or FunctionDeclaration
@@ -92,13 +207,42 @@ class ExecutionService:
             if functions:
                 gemini_tools.append(types.Tool(function_declarations=functions))
 
+        return gemini_tools, tools_map
+
+    def _build_run_config(self, system_prompt: str, gemini_tools: List[types.Tool]) -> types.GenerateContentConfig:
+        # Update config with system instruction and tools
+        return types.GenerateContentConfig(
+            temperature=self.generation_config.temperature,
+            top_p=self.generation_config.top_p,
+            top_k=self.generation_config.top_k,
+            max_output_tokens=self.generation_config.max_output_tokens,
+            system_instruction=system_prompt,
+            tools=gemini_tools if gemini_tools else None
+        )
+
+    def _build_chat_history(self, history: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        # Convert history to Gemini format
+        chat_history = []
+        for msg in history:
+            role = "user" if msg["role"] == "user" else "model"
+            chat_history.append({"role": role, "parts": [{"text": msg["content"]}]})
+        return chat_history
+
+    @staticmethod
+    def _with_summary(system_prompt: str, summary: Optional[str]) -> str:
+        # Compacted sessions carry the older turns as a summary instead of the transcript
+        if not summary:
+            return system_prompt
+        return f"{system_prompt}\n\nSummary of the earlier conversation:\n{summary}"
+
+    def _new_log_payload(self, system_prompt: str, compiled: CompiledAgent, user_prompt: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
         tool_events: List[Dict[str, Any]] = []
-        log_payload = {
+        return {
             "prompt_context": {
                 "system_prompt": system_prompt,
                 "history": history,
                 "user_prompt": user_prompt,
-                "available_tools": [t.name for t in (getattr(agent_model, 'tools', []) or []) if t.is_active],
+                "available_tools": list(compiled.available_tools),
                 "tool_events": tool_events,
             },
             "raw_response": "",
@@ -107,76 +251,137 @@ class ExecutionService:
             "execution_time_ms": 0
         }
 
-        try:
-            # Update config with system instruction and tools
-            run_config = types.GenerateContentConfig(
-                temperature=self.generation_config.temperature,
-                top_p=self.generation_config.top_p,
-                top_k=self.generation_config.top_k,
-                max_output_tokens=self.generation_config.max_output_tokens,
-                system_instruction=system_prompt,
-                tools=gemini_tools if gemini_tools else None
+    async def _dispatch_function_calls(
+        self,
+        function_calls: List[Any],
+        tools_map: Dict[str, Any],
+        tool_events: List[Dict[str, Any]],
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[types.Part]:
+        """
+        Execute the model's function calls concurrently (at most `max_concurrency` at a time)
+        and return the parts to send back, in the order the model requested them.
+        `on_event` is notified with ("tool_call_start" | "tool_call_end", payload) for streaming.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrent_tools))
+        dispatch_start = time.perf_counter()
+
+        async def run_call(fc: Any) -> Tuple[types.Part, Dict[str, Any]]:
+            tool_name = fc.name
+            # Convert MapComposite to dict for serialization
+            args = dict(fc.args) if fc.args else {}
+            
+            tool_model = tools_map.get(tool_name)
+            log_event = {"tool": tool_name, "tool_id": tool_model.id if tool_model else None, "input": args, "output": None}
+            
+            async with semaphore:
+                call_start = time.perf_counter()
+                if on_event:
+                    on_event("tool_call_start", {"tool": tool_name, "input": args})
+
+                if tool_model:
+                    result, metadata = await tool_service.execute_tool(tool_model, args)
+                    log_event["output"] = result
+                    log_event["metadata"] = metadata
+                else:
+                    result = "Error: Tool not found"
+                call_end = time.perf_counter()
+
+            # Tool implementations report failures as "Error..." strings rather than raising
+            log_event["status"] = "error" if str(result).startswith("Error") else "success"
+
+            # Timing relative to the start of this batch, so overlap is visible in the recorder
+            log_event["started_at_ms"] = int((call_start - dispatch_start) * 1000)
+            log_event["latency_ms"] = int((call_end - call_start) * 1000)
+            if on_event:
+                on_event("tool_call_end", {
+                    "tool": tool_name,
+                    "output": result,
+                    "metadata": log_event.get("metadata", {}),
+                    "latency_ms": log_event["latency_ms"],
+                })
+
+            # Format response for Gemini
+            part = types.Part(
+                function_response=types.FunctionResponse(
+                    name=tool_name,
+                    response={"result": result}
+                )
             )
+            return part, log_event
+
+        results = await asyncio.gather(*(run_call(fc) for fc in function_calls))
+        tool_events.extend(log_event for _, log_event in results)
+        return [part for part, _ in results]
+
+    def _finalize(self, log_payload: Dict[str, Any], raw_text: str, start_time: float) -> Dict[str, Any]:
+        # Remove any internal thought tags from final response if present
+        final_response = re.sub(r'<thought>.*?</thought>', '', raw_text, flags=re.DOTALL).strip()
+        
+        end_time = time.time()
+        execution_time = int((end_time - start_time) * 1000)
+        
+        log_payload["raw_response"] = raw_text
+        log_payload["thought_process"] = ""
+        log_payload["execution_time_ms"] = execution_time
+        
+        return {
+            "response_text": final_response,
+            "log_data": log_payload
+        }
+
+    def _fail(self, log_payload: Dict[str, Any], error: Exception, start_time: float) -> Dict[str, Any]:
+        end_time = time.time()
+        log_payload["raw_response"] = f"ERROR: {str(error)}"
+        log_payload["execution_time_ms"] = int((end_time - start_time) * 1000)
+        
+        return {
+            "response_text": f"Error executing agent: {str(error)}",
+            "log_data": log_payload
+        }
 
-            # Convert history to Gemini format
-            chat_history = []
-            for msg in history:
-                role = "user" if msg["role"] == "user" else "model"
-                chat_history.append({"role": role, "parts": [{"text": msg["content"]}]})
+    async def execute_agent(self, agent_model: Any, user_prompt: str, history: List[Dict[str, str]] = [], max_concurrent_tools: Optional[int] = None, summary: Optional[str] = None) -> Dict[str, Any]:
+        """
+        `max_concurrent_tools` overrides TOOL_CALL_CONCURRENCY for this execution.
+        `summary` (a compacted session's older turns) is added to the system prompt.
+        Returns a dictionary with:
+        - response_text: The public response
+        - log_data: Dict containing full context, raw response, thought process, timing
+        """
+        start_time = time.time()
+        
+        # Prepare system prompt and tools
+        compiled = self.compile_agent(agent_model)
+        system_prompt = self._with_summary(compiled.system_prompt, summary)
+        log_payload = self._new_log_payload(system_prompt, compiled, user_prompt, history)
 
+        try:
             # Start chat session
-            chat = self.client.aio.chats.create(
-                model="gemini-2.0-flash",
-                config=run_config,
-                history=chat_history
+            chat = self.provider.create_chat(
+                model=self.model,
+                config=self._build_run_config(system_prompt, compiled.gemini_tools),
+                history=self._build_chat_history(history)
             )
             
             # First turn
             response = await chat.send_message(user_prompt)
             
-            # Tool Use Loop (Max 5 iterations to prevent infinite loops)
-            for _ in range(5):
+            # Tool Use Loop (bounded to prevent infinite loops)
+            for _ in range(MAX_TOOL_ROUNDS):
                 # Analyze parts for text (thoughts) and function calls
                 content_parts = response.candidates[0].content.parts
-                function_calls = []
-
-                for part in content_parts:
-                    if part.function_call:
-                        function_calls.append(part.function_call)
+                function_calls = [part.function_call for part in content_parts if part.function_call]
 
                 if not function_calls:
                     break
                 
-                tool_responses = []
-                for fc in function_calls:
-                    tool_name = fc.name
-                    # Convert MapComposite to dict for serialization
-                    args = dict(fc.args) if fc.args else {}
-                    
-                    log_event = {"tool": tool_name, "input": args, "output": None}
-                    
-                    tool_model = tools_map.get(tool_name)
-                    if tool_model:
-                        result, metadata = await tool_service.execute_tool(tool_model, args)
-                        log_event["output"] = result
-                        log_event["metadata"] = metadata
-                        
-                        # Format response for Gemini
-                        tool_responses.append(types.Part(
-                            function_response=types.FunctionResponse(
-                                name=tool_name,
-                                response={"result": result}
-                            )
-                        ))
-                    else:
-                        tool_responses.append(types.Part(
-                            function_response=types.FunctionResponse(
-                                name=tool_name,
-                                response={"result": "Error: Tool not found"}
-                            )
-                        ))
-                    
-                    log_payload["tool_events"].append(log_event)
+                tool_responses = await self._dispatch_function_calls(
+                    function_calls,
+                    compiled.tools_map,
+                    log_payload["tool_events"],
+                    max_concurrency=max_concurrent_tools,
+                )
 
                 # Send tool results back to the model
                 response = await chat.send_message(tool_responses)
@@ -185,29 +390,107 @@ class ExecutionService:
             content_parts = response.candidates[0].content.parts
             raw_text = "\n".join([part.text for part in content_parts if part.text])
             
-            # Remove any internal thought tags from final response if present
-            final_response = re.sub(r'<thought>.*?</thought>', '', raw_text, flags=re.DOTALL).strip()
-            
-            end_time = time.time()
-            execution_time = int((end_time - start_time) * 1000)
-            
-            log_payload["raw_response"] = raw_text
-            log_payload["thought_process"] = ""
-            log_payload["execution_time_ms"] = execution_time
-            
-            return {
-                "response_text": final_response,
-                "log_data": log_payload
-            }
+            return self._finalize(log_payload, raw_text, start_time)
             
         except Exception as e:
-            end_time = time.time()
-            log_payload["raw_response"] = f"ERROR: {str(e)}"
-            log_payload["execution_time_ms"] = int((end_time - start_time) * 1000)
-            
-            return {
-                "response_text": f"Error executing agent: {str(e)}",
-                "log_data": log_payload
-            }
+            return self._fail(log_payload, e, start_time)
+
+    async def stream_agent(self, agent_model: Any, user_prompt: str, history: List[Dict[str, str]] = [], max_concurrent_tools: Optional[int] = None, summary: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of execute_agent. Yields events of the form {"event": name, "data": payload}:
+        - token: {"text": delta} as the model produces text
+        - tool_call_start / tool_call_end: around each tool invocation
+        - done: the same dict execute_agent returns (always the last event)
+        """
+        start_time = time.time()
+        
+        compiled = self.compile_agent(agent_model)
+        system_prompt = self._with_summary(compiled.system_prompt, summary)
+        log_payload = self._new_log_payload(system_prompt, compiled, user_prompt, history)
+
+        try:
+            chat = self.provider.create_chat(
+                model=self.model,
+                config=self._build_run_config(system_prompt, compiled.gemini_tools),
+                history=self._build_chat_history(history)
+            )
+
+            message: Any = user_prompt
+            # Text from every round, as the client saw it
+            text_chunks: List[str] = []
+            # Same bound as execute_agent: the first turn plus MAX_TOOL_ROUNDS tool rounds
+            for round_index in range(MAX_TOOL_ROUNDS + 1):
+                function_calls = []
+                async for chunk in await chat.send_message_stream(message):
+                    if not chunk.candidates or not chunk.candidates[0].content:
+                        continue
+                    for part in chunk.candidates[0].content.parts or []:
+                        if part.function_call:
+                            function_calls.append(part.function_call)
+                        elif part.text:
+                            text_chunks.append(part.text)
+                            yield {"event": "token", "data": {"text": part.text}}
+
+                # Out of rounds: like execute_agent, answer with the text so far instead of calling tools
+                if not function_calls or round_index == MAX_TOOL_ROUNDS:
+                    break
+
+                # Relay tool progress while the calls are running
+                queue: asyncio.Queue = asyncio.Queue()
+                dispatch = asyncio.create_task(self._dispatch_function_calls(
+                    function_calls,
+                    compiled.tools_map,
+                    log_payload["tool_events"],
+                    on_event=lambda name, data: queue.put_nowait({"event": name, "data": data}),
+                    max_concurrency=max_concurrent_tools,
+                ))
+                try:
+                    while not (dispatch.done() and queue.empty()):
+                        getter = asyncio.ensure_future(queue.get())
+                        await asyncio.wait({getter, dispatch}, return_when=asyncio.FIRST_COMPLETED)
+                        if getter.done():
+                            yield getter.result()
+                        else:
+                            getter.cancel()
+                finally:
+                    # Client went away mid-round: don't leave tool calls running unowned
+                    if not dispatch.done():
+                        dispatch.cancel()
+                message = dispatch.result()
+
+            yield {"event": "done", "data": self._finalize(log_payload, "".join(text_chunks), start_time)}
+
+        except Exception as e:
+            yield {"event": "done", "data": self._fail(log_payload, e, start_time)}
+
+    async def summarize(self, previous_summary: Optional[str], messages: List[Dict[str, str]], max_words: int = 300) -> str:
+        """
+        Fold `messages` into `previous_summary` and return the new summary.
+        Unlike execute_agent, errors are raised: a failed compaction keeps the old summary.
+        """
+        transcript = "\n".join(
+            f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in messages
+        )
+        prompt = (
+            f"Summary so far:\n{previous_summary or '(none)'}\n\n"
+            f"New conversation turns:\n{transcript}\n\n"
+            f"Write the updated summary."
+        )
+        config = types.GenerateContentConfig(
+            temperature=0.2,
+            max_output_tokens=self.generation_config.max_output_tokens,
+            system_instruction=(
+                "You maintain a running summary of a conversation between a user and an assistant. "
+                "Merge the new turns into the summary, keeping facts, decisions, open questions and user "
+                f"preferences that later turns may rely on. Use at most {max_words} words and reply with the summary only."
+            ),
+        )
+        chat = self.provider.create_chat(model=self.model, config=config, history=[])
+        response = await chat.send_message(prompt)
+        parts = response.candidates[0].content.parts
+        text = "\n".join(part.text for part in parts if part.text).strip()
+        if not text:
+            raise ValueError("Empty summary from model")
+        return text
 
 execution_service = ExecutionService()
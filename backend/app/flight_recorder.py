@@ -0,0 +1,113 @@
+import os
+import re
+import json
+import uuid
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from . import models
+from .pagination import keyset_page
+
+# Upper bound on the input/output text copied into each tool_invocations row
+MAX_INVOCATION_CHARS = int(os.getenv("TOOL_INVOCATION_MAX_CHARS", "2000"))
+
+# Length of the prompt/response previews stored for the log summary listing
+LOG_PREVIEW_CHARS = int(os.getenv("LOG_PREVIEW_CHARS", "200"))
+
+def _truncate(text: str, limit: int = MAX_INVOCATION_CHARS) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit] + "...[truncated]"
+
+def _truncate_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    encoded = json.dumps(args, default=str)
+    if len(encoded) <= MAX_INVOCATION_CHARS:
+        return args
+    return {"_truncated": _truncate(encoded)}
+
+def preview_text(text: Optional[str]) -> str:
+    text = (text or "").strip()
+    return text if len(text) <= LOG_PREVIEW_CHARS else text[:LOG_PREVIEW_CHARS] + "..."
+
+def record_execution(
+    db: Session,
+    agent_id: str,
+    log_data: Dict[str, Any],
+    session_id: Optional[str] = None,
+    simulation_id: Optional[str] = None,
+) -> models.AgentExecutionLog:
+    """
+    Add the AgentExecutionLog for one execute_agent result, plus a ToolInvocation row per
+    tool event, to `db`. The caller commits.
+    """
+    tool_events = log_data.get("tool_events", [])
+
+    # Merge tool_events into prompt_context for persistence
+    log_context = log_data["prompt_context"]
+    log_context["tool_events"] = tool_events
+
+    log = models.AgentExecutionLog(
+        id=str(uuid.uuid4()),
+        agent_id=agent_id,
+        session_id=session_id,
+        simulation_id=simulation_id,
+        prompt_context=log_context,
+        raw_response=log_data["raw_response"],
+        thought_process=log_data["thought_process"],
+        execution_time_ms=log_data["execution_time_ms"],
+        tool_event_count=len(tool_events),
+        response_length=len(log_data["raw_response"] or ""),
+        user_prompt_preview=preview_text(log_context.get("user_prompt")),
+        response_preview=preview_text(re.sub(r'<thought>.*?</thought>', '', log_data["raw_response"] or "", flags=re.DOTALL)),
+    )
+    db.add(log)
+
+    for event in tool_events:
+        db.add(_invocation(event, agent_id, log.id, event.get("tool_id")))
+    return log
+
+def _invocation(event: Dict[str, Any], agent_id: str, log_id: str, tool_id: Optional[str], **fields) -> models.ToolInvocation:
+    metadata = event.get("metadata") or {}
+    output = event.get("output")
+    return models.ToolInvocation(
+        tool_id=tool_id,
+        tool_name=event.get("tool", ""),
+        agent_id=agent_id,
+        log_id=log_id,
+        status=event.get("status") or ("error" if output is None or str(output).startswith("Error") else "success"),
+        latency_ms=event.get("latency_ms"),
+        request_url=metadata.get("url"),
+        input_args=_truncate_args(event.get("input") or {}),
+        output_result=_truncate("" if output is None else str(output)),
+        **fields,
+    )
+
+def backfill_tool_invocations(db: Session, batch_size: int = 500) -> int:
+    """
+    Add ToolInvocation rows for execution logs recorded before the tool_invocations table,
+    from their prompt_context["tool_events"]. Logs that already have rows are skipped, so it
+    is safe to re-run. Commits per batch and returns the number of rows added.
+    """
+    # Older events carry only the tool name, possibly sanitized the way it was sent to the model
+    tool_ids: Dict[str, str] = {}
+    for tool_id, name in db.query(models.Tool.id, models.Tool.name):
+        tool_ids.setdefault(name, tool_id)
+        tool_ids.setdefault(re.sub(r'[^a-zA-Z0-9_]', '_', name), tool_id)
+
+    recorded = select(models.ToolInvocation.log_id).where(models.ToolInvocation.log_id.isnot(None))
+    query = db.query(models.AgentExecutionLog).filter(models.AgentExecutionLog.id.not_in(recorded))
+    columns = (models.AgentExecutionLog.created_at, models.AgentExecutionLog.id)
+    added = 0
+    cursor = None
+    while True:
+        logs, cursor = keyset_page(query, columns, cursor, batch_size, descending=False)
+        for log in logs:
+            for event in (log.prompt_context or {}).get("tool_events") or []:
+                tool_id = event.get("tool_id") or tool_ids.get(event.get("tool"))
+                # Dated like the call itself, so tool history keeps its order
+                db.add(_invocation(event, log.agent_id, log.id, tool_id, created_at=log.created_at))
+                added += 1
+        db.commit()
+        db.expunge_all()
+        if not cursor:
+            return added
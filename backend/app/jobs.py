@@ -0,0 +1,313 @@
+"""
+Background jobs for long-running agent executions.
+
+Submitting a job stores an `AgentJob` row and replies right away with its id. The
+turn then runs outside the request, and clients poll the job or follow its event
+stream. The job row is the source of truth for status and result.
+
+JOB_BACKEND selects where jobs run:
+- "inprocess" (default): an asyncio task in the web process that accepted the job.
+  No broker is needed, which suits local development and single-process deployments.
+- "celery": a Celery task sent to CELERY_BROKER_URL (Redis by default) and run by
+  `celery -A app.worker worker`. Web processes only enqueue and read.
+
+A running job refreshes its heartbeat every JOB_HEARTBEAT_SECONDS. A job whose worker
+died (its heartbeat older than JOB_STALE_SECONDS) can be claimed again, which is how a
+redelivered Celery task picks it back up.
+
+Progress events (`status`, the agent's `token` / `tool_call_start` / `tool_call_end`,
+and a final `done`) go through an in-memory broker for in-process jobs. Celery jobs use
+a Redis stream per job, so any web process can serve them. Subscribers replay the events
+published so far, then follow live ones.
+"""
+import os
+import json
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Deque, Dict, Optional, Set
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from . import models, schemas, chat_turns
+from .logger import logger
+
+JOB_BACKEND = os.getenv("JOB_BACKEND", "inprocess").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+# How long a finished job's events stay available for replay
+JOB_EVENTS_TTL_SECONDS = int(os.getenv("JOB_EVENTS_TTL_SECONDS", "3600"))
+# Events kept per job (token events dominate; the job row keeps the full result)
+JOB_EVENTS_MAX = int(os.getenv("JOB_EVENTS_MAX", "2000"))
+# Idle interval after which an event stream re-checks the job row
+JOB_STREAM_POLL_SECONDS = float(os.getenv("JOB_STREAM_POLL_SECONDS", "2"))
+# How often a running job marks itself alive, and how long without that before it counts as lost
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+def job_payload(job: models.AgentJob) -> dict:
+    return schemas.JobResponse.model_validate(job).model_dump(mode="json")
+
+# --- Event brokers ---
+
+class LocalJobEvents:
+    """Per-job event history plus live subscriber queues, within one process."""
+    def __init__(self, ttl_seconds: int = JOB_EVENTS_TTL_SECONDS, max_events: int = JOB_EVENTS_MAX):
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+        self._history: Dict[str, Deque[dict]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def publish(self, job_id: str, event: dict):
+        self._history.setdefault(job_id, deque(maxlen=self.max_events)).append(event)
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+        if event["event"] == "done":
+            asyncio.get_running_loop().call_later(self.ttl_seconds, self._history.pop, job_id, None)
+
+    async def subscribe(self, job_id: str, poll_seconds: float = JOB_STREAM_POLL_SECONDS) -> AsyncIterator[Optional[dict]]:
+        """Replay, then follow. Yields None once caught up and after each idle `poll_seconds`."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            for event in list(self._history.get(job_id, ())):
+                yield event
+            yield None
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), poll_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    async def close(self):
+        pass
+
+class RedisJobEvents:
+    """One capped Redis stream per job, readable from any process."""
+    def __init__(self, url: str = REDIS_URL, ttl_seconds: int = JOB_EVENTS_TTL_SECONDS, max_events: int = JOB_EVENTS_MAX):
+        import redis.asyncio as redis_asyncio
+        self.client = redis_asyncio.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"agentic:jobs:{job_id}:events"
+
+    async def publish(self, job_id: str, event: dict):
+        key = self._key(job_id)
+        await self.client.xadd(key, {"event": json.dumps(event, default=str)}, maxlen=self.max_events, approximate=True)
+        await self.client.expire(key, self.ttl_seconds)
+
+    async def subscribe(self, job_id: str, poll_seconds: float = JOB_STREAM_POLL_SECONDS) -> AsyncIterator[Optional[dict]]:
+        key = self._key(job_id)
+        last_id = "0-0"
+        block = None  # The first read only replays what is there
+        while True:
+            entries = await self.client.xread({key: last_id}, count=100, block=block)
+            block = int(poll_seconds * 1000)
+            if not entries:
+                yield None
+                continue
+            for _, items in entries:
+                for entry_id, fields in items:
+                    last_id = entry_id
+                    yield json.loads(fields[b"event"])
+
+    async def close(self):
+        await self.client.aclose()
+
+# --- Execution ---
+
+async def _finish(session_factory: async_sessionmaker, job_id: str, events, values: dict):
+    async with session_factory() as db:
+        # A cancel written while the turn ran wins over its outcome
+        await db.execute(
+            update(models.AgentJob)
+            .where(models.AgentJob.id == job_id, models.AgentJob.status == "running")
+            .values(**values, finished_at=func.now())
+        )
+        await db.commit()
+        job = await db.get(models.AgentJob, job_id)
+        payload = job_payload(job)
+    await events.publish(job_id, {"event": "done", "data": payload})
+
+# The agent part of each in-process job, the only part a cancel interrupts: cancelling a
+# task inside a database call can leave its connection holding a lock
+_executions: Dict[str, asyncio.Task] = {}
+
+async def _job_status(session_factory: async_sessionmaker, job_id: str) -> Optional[str]:
+    async with session_factory() as db:
+        return (await db.execute(select(models.AgentJob.status).where(models.AgentJob.id == job_id))).scalar_one_or_none()
+
+async def _heartbeat(session_factory: async_sessionmaker, job_id: str, stop: asyncio.Event):
+    # Stopped through `stop` rather than cancelled, so it is never interrupted mid-query
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), JOB_HEARTBEAT_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            async with session_factory() as db:
+                await db.execute(
+                    update(models.AgentJob)
+                    .where(models.AgentJob.id == job_id, models.AgentJob.status == "running")
+                    .values(heartbeat_at=func.now())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning("Job heartbeat failed", extra={"extra_fields": {"job_id": job_id, "error": str(e)}})
+
+async def run_chat_job(job_id: str, session_factory: async_sessionmaker, events) -> bool:
+    """
+    Run a queued chat job to completion, publishing its progress to `events`.
+    Returns False when the job was not ours to run (cancelled or claimed elsewhere).
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=JOB_STALE_SECONDS)
+    async with session_factory() as db:
+        # Claim the job: a queued one, or a running one whose worker stopped heartbeating.
+        # A cancelled job, or one still alive elsewhere (e.g. a duplicate delivery), is skipped
+        claimed = await db.execute(
+            update(models.AgentJob)
+            .where(
+                models.AgentJob.id == job_id,
+                or_(
+                    models.AgentJob.status == "queued",
+                    and_(models.AgentJob.status == "running", models.AgentJob.heartbeat_at < stale_before),
+                ),
+            )
+            .values(status="running", started_at=func.now(), heartbeat_at=func.now())
+        )
+        await db.commit()
+        if claimed.rowcount != 1:
+            return False
+        await events.publish(job_id, {"event": "status", "data": {"status": "running"}})
+
+        stop_heartbeat = asyncio.Event()
+        heartbeat = asyncio.create_task(_heartbeat(session_factory, job_id, stop_heartbeat))
+        job = await db.get(models.AgentJob, job_id)
+        try:
+            session, agent, history = await chat_turns.load_chat_context(db, job.session_id, job.owner_id)
+
+            async def execute():
+                async for event in chat_turns.stream_agent_turn(session, agent, history, job.prompt):
+                    if event["event"] == "done":
+                        return event["data"]
+                    await events.publish(job_id, event)
+
+            execution = asyncio.create_task(execute())
+            _executions[job_id] = execution
+            try:
+                # Registered first, so a cancel lands either here or on the task
+                if await _job_status(session_factory, job_id) != "running":
+                    execution.cancel()
+                execution_result = await execution
+            finally:
+                _executions.pop(job_id, None)
+
+            if await _job_status(session_factory, job_id) != "running":
+                # Cancelled while the agent finished (e.g. from another process): don't save the turn
+                raise asyncio.CancelledError()
+            result = await chat_turns.finish_chat_turn(db, session, agent, job.prompt, execution_result)
+            outcome = {"status": "succeeded", "result": result}
+        except asyncio.CancelledError:
+            await asyncio.shield(_finish(session_factory, job_id, events, {"status": "cancelled"}))
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                # The job itself was cancelled (shutdown), not just its agent run
+                raise
+            return True
+        except Exception as e:
+            await db.rollback()
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.warning("Background job failed", extra={"extra_fields": {"job_id": job_id, "error": detail}})
+            outcome = {"status": "failed", "error": detail}
+        finally:
+            stop_heartbeat.set()
+            await asyncio.shield(heartbeat)
+
+    await _finish(session_factory, job_id, events, outcome)
+    return True
+
+class JobRunner:
+    def __init__(self, backend: str = "inprocess", events=None):
+        self.backend = backend
+        self.events = events or LocalJobEvents()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, job_id: str, session_factory: async_sessionmaker):
+        """Start a stored, queued job; `session_factory` is used by in-process jobs only."""
+        if self.backend == "celery":
+            from .worker import run_chat_job_task
+            # The job id doubles as the task id, so a cancel can revoke it
+            run_chat_job_task.apply_async(args=[job_id], task_id=job_id)
+            return
+        task = asyncio.create_task(run_chat_job(job_id, session_factory, self.events))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def cancel(self, job_id: str, session_factory: async_sessionmaker) -> bool:
+        """Mark an unfinished job cancelled and stop it when it runs here. False if it already finished."""
+        async with session_factory() as db:
+            cancelled = await db.execute(
+                update(models.AgentJob)
+                .where(models.AgentJob.id == job_id, models.AgentJob.status.in_(("queued", "running")))
+                .values(status="cancelled", finished_at=func.now())
+            )
+            await db.commit()
+        if cancelled.rowcount != 1:
+            return False
+
+        task = self._tasks.get(job_id)
+        if task is not None and not task.done():
+            # Stop the agent run; the job then publishes its final event as it unwinds
+            execution = _executions.get(job_id)
+            if execution is not None:
+                execution.cancel()
+            ran = (await asyncio.gather(task, return_exceptions=True))[0]
+            if ran is True:
+                return True
+        if self.backend == "celery":
+            # A queued task skips itself when it finds the row cancelled; a running one finishes
+            # its agent run but doesn't save the turn
+            from .worker import celery_app
+            celery_app.control.revoke(job_id)
+
+        async with session_factory() as db:
+            job = await db.get(models.AgentJob, job_id)
+            payload = job_payload(job)
+        await self.events.publish(job_id, {"event": "done", "data": payload})
+        return True
+
+    async def wait(self, job_id: str):
+        task = self._tasks.get(job_id)
+        if task:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def shutdown(self):
+        # In-process jobs end with the process; they are recorded as cancelled
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.events.close()
+
+def _build_job_runner() -> JobRunner:
+    if JOB_BACKEND == "celery":
+        try:
+            return JobRunner("celery", RedisJobEvents())
+        except ImportError:
+            logger.warning("JOB_BACKEND=celery but the 'redis' package is not installed; running jobs in-process")
+    return JobRunner()
+
+job_runner = _build_job_runner()
@@ -0,0 +1,206 @@
+"""
+LLM provider layer used by ExecutionService.
+
+A provider creates chat objects exposing the subset of the google-genai AsyncChat API the
+platform uses: `await chat.send_message(msg)` and `async for chunk in await chat.send_message_stream(msg)`,
+both producing `types.GenerateContentResponse` objects.
+
+Select the backend with LLM_PROVIDER=gemini (default) or LLM_PROVIDER=stub.
+"""
+import os
+import json
+import random
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from google import genai
+from google.genai import types
+from .logger import logger
+
+class LLMProvider(ABC):
+    name: str = "base"
+
+    @abstractmethod
+    def create_chat(self, model: str, config: types.GenerateContentConfig, history: List[Dict[str, Any]]) -> Any:
+        ...
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.client = genai.Client(api_key=api_key or os.getenv("GOOGLE_API_KEY", "your-api-key-here"))
+
+    def create_chat(self, model: str, config: types.GenerateContentConfig, history: List[Dict[str, Any]]) -> Any:
+        return self.client.aio.chats.create(model=model, config=config, history=history)
+
+# --- Offline stub backend ---
+
+class LatencyDistribution:
+    """
+    Latency spec in milliseconds, e.g. "constant:200", "uniform:100,400",
+    "normal:250,50" (mean, stddev) or "lognormal:5.5,0.4" (mu, sigma of ln(ms)).
+    """
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()]
+        if self.kind not in ("constant", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "constant":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(self.params[0], self.params[1]))
+        return rng.lognormvariate(self.params[0], self.params[1])
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic local stand-in for the model, for load tests and offline development.
+
+    Env configuration:
+    - STUB_LLM_LATENCY_MS: time-to-first-token distribution (see LatencyDistribution), default "constant:0"
+    - STUB_LLM_TOKENS_PER_SEC: output rate after the first token, 0 for instant, default 0
+    - STUB_LLM_RESPONSE_TOKENS: words in a generated reply, default 20
+    - STUB_LLM_SEED: seed mixed into every per-request RNG, default 0
+    - STUB_LLM_SCRIPT: path to a JSON list of rules, each
+      {"match": "substring of the user prompt", "function_calls": [{"name": "tool", "args": {}}], "text": "reply"}.
+      A function call named "*" expands to every tool declared for the agent.
+      The first matching rule decides the first model turn; after tool results come back the stub replies with text.
+    """
+    name = "stub"
+
+    def __init__(
+        self,
+        latency: Union[str, LatencyDistribution, None] = None,
+        tokens_per_sec: Optional[float] = None,
+        response_tokens: Optional[int] = None,
+        seed: Optional[int] = None,
+        script: Optional[List[Dict[str, Any]]] = None,
+    ):
+        latency = latency if latency is not None else os.getenv("STUB_LLM_LATENCY_MS", "constant:0")
+        self.latency = latency if isinstance(latency, LatencyDistribution) else LatencyDistribution(latency)
+        self.tokens_per_sec = tokens_per_sec if tokens_per_sec is not None else float(os.getenv("STUB_LLM_TOKENS_PER_SEC", "0"))
+        self.response_tokens = response_tokens if response_tokens is not None else int(os.getenv("STUB_LLM_RESPONSE_TOKENS", "20"))
+        self.seed = seed if seed is not None else int(os.getenv("STUB_LLM_SEED", "0"))
+        if script is None:
+            script_path = os.getenv("STUB_LLM_SCRIPT")
+            script = []
+            if script_path:
+                with open(script_path) as f:
+                    script = json.load(f)
+        self.script = script
+
+    def create_chat(self, model: str, config: types.GenerateContentConfig, history: List[Dict[str, Any]]) -> "StubChat":
+        return StubChat(self, config, history)
+
+    def rng_for(self, text: str) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}:{text}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def match_rule(self, prompt: str) -> Optional[Dict[str, Any]]:
+        for rule in self.script:
+            if rule.get("match", "") in prompt:
+                return rule
+        return None
+
+class StubChat:
+    def __init__(self, provider: StubProvider, config: Optional[types.GenerateContentConfig], history: List[Dict[str, Any]]):
+        self.provider = provider
+        self.history = list(history or [])
+        self.declared_tools: List[str] = []
+        for tool in (config.tools if config and config.tools else []):
+            for fd in getattr(tool, "function_declarations", None) or []:
+                self.declared_tools.append(fd.name)
+        self._rule: Optional[Dict[str, Any]] = None
+
+    def _plan(self, message: Any) -> Dict[str, Any]:
+        """Decide the next model turn: either function calls or text."""
+        if isinstance(message, str):
+            prompt = message
+            self._rule = self.provider.match_rule(prompt)
+            calls = []
+            for call in (self._rule or {}).get("function_calls", []):
+                names = self.declared_tools if call.get("name") == "*" else [call.get("name")]
+                calls.extend({"name": n, "args": call.get("args", {})} for n in names if n in self.declared_tools)
+            if calls:
+                return {"function_calls": calls, "seed_text": prompt}
+            text = (self._rule or {}).get("text")
+            return {"text": text, "seed_text": prompt}
+
+        # Function responses: answer with text that reflects the tool results
+        results = []
+        for part in message if isinstance(message, list) else [message]:
+            fr = getattr(part, "function_response", None)
+            if fr is not None:
+                results.append(f"{fr.name}={(fr.response or {}).get('result')}")
+        text = (self._rule or {}).get("text")
+        return {"text": text, "seed_text": ";".join(results), "tool_results": results}
+
+    def _generate_text(self, plan: Dict[str, Any], rng: random.Random) -> str:
+        if plan.get("text"):
+            return plan["text"]
+        words = ["stub", "reply"]
+        if plan.get("tool_results"):
+            words += ["using"] + plan["tool_results"]
+        vocabulary = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+        while len(words) < self.provider.response_tokens:
+            words.append(rng.choice(vocabulary))
+        return " ".join(words)
+
+    def _response(self, parts: List[types.Part]) -> types.GenerateContentResponse:
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))]
+        )
+
+    def _record(self, message: Any, parts: List[types.Part]):
+        self.history.append({"role": "user", "message": message})
+        self.history.append({"role": "model", "parts": parts})
+
+    async def send_message(self, message: Any) -> types.GenerateContentResponse:
+        plan = self._plan(message)
+        rng = self.provider.rng_for(plan["seed_text"])
+        await asyncio.sleep(self.provider.latency.sample_ms(rng) / 1000)
+
+        if plan.get("function_calls"):
+            parts = [types.Part(function_call=types.FunctionCall(name=c["name"], args=c["args"])) for c in plan["function_calls"]]
+        else:
+            text = self._generate_text(plan, rng)
+            if self.provider.tokens_per_sec > 0:
+                await asyncio.sleep(len(text.split()) / self.provider.tokens_per_sec)
+            parts = [types.Part(text=text)]
+        self._record(message, parts)
+        return self._response(parts)
+
+    async def send_message_stream(self, message: Any) -> AsyncIterator[types.GenerateContentResponse]:
+        plan = self._plan(message)
+        rng = self.provider.rng_for(plan["seed_text"])
+
+        async def gen():
+            await asyncio.sleep(self.provider.latency.sample_ms(rng) / 1000)
+            if plan.get("function_calls"):
+                parts = [types.Part(function_call=types.FunctionCall(name=c["name"], args=c["args"])) for c in plan["function_calls"]]
+                self._record(message, parts)
+                yield self._response(parts)
+                return
+
+            text = self._generate_text(plan, rng)
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                if i and self.provider.tokens_per_sec > 0:
+                    await asyncio.sleep(1 / self.provider.tokens_per_sec)
+                yield self._response([types.Part(text=word if i == 0 else " " + word)])
+            self._record(message, [types.Part(text=text)])
+        return gen()
+
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    name = (name or os.getenv("LLM_PROVIDER", "gemini")).lower()
+    if name == "stub":
+        logger.info("Using stub LLM provider (no model calls will be made)")
+        return StubProvider()
+    if name == "gemini":
+        return GeminiProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
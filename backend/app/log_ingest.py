@@ -0,0 +1,132 @@
+"""
+Frontend log ingestion: batches, per-client rate limits and level sampling.
+
+Browsers ship their logs in batches to POST /logs/ingest/batch, optionally gzip-encoded.
+Each client (by IP) gets a token bucket of LOG_INGEST_RATE_PER_SECOND entries with a
+burst of LOG_INGEST_BURST. A batch larger than the client's remaining tokens is cut
+short, and the rest is reported as rate-limited. Accepted entries are then sampled by level
+with LOG_INGEST_SAMPLE_RATES (e.g. `debug=0.1,info=0.5`; unlisted levels are kept) and
+handed to the logger after the response is sent.
+"""
+import os
+import math
+import time
+import zlib
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from fastapi import HTTPException, Request
+from pydantic import BaseModel
+from .logger import logger
+from .request_logging import redact_value
+
+LOG_INGEST_RATE_PER_SECOND = float(os.getenv("LOG_INGEST_RATE_PER_SECOND", "20"))
+LOG_INGEST_BURST = float(os.getenv("LOG_INGEST_BURST", "200"))
+LOG_INGEST_MAX_BATCH = int(os.getenv("LOG_INGEST_MAX_BATCH", "200"))
+# Limit on the (decompressed) request body
+LOG_INGEST_MAX_BYTES = int(os.getenv("LOG_INGEST_MAX_BYTES", str(1024 * 1024)))
+LOG_INGEST_SAMPLE_RATES = os.getenv("LOG_INGEST_SAMPLE_RATES", "debug=0.1")
+# Clients tracked by the rate limiter; the least recently seen are forgotten first
+LOG_INGEST_MAX_CLIENTS = int(os.getenv("LOG_INGEST_MAX_CLIENTS", "10000"))
+
+class FrontendLog(BaseModel):
+    level: str
+    message: str
+    context: dict = {}
+    timestamp: str
+
+class TokenBucketLimiter:
+    """Per-key token buckets refilled at `rate` per second up to `burst`, in a bounded LRU."""
+    def __init__(self, rate: float, burst: float, max_keys: int = LOG_INGEST_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, wanted: int) -> int:
+        """Take up to `wanted` tokens; returns how many were granted."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            granted = min(wanted, int(tokens))
+            self._buckets[key] = (tokens - granted, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return granted
+
+    def retry_after(self, key: str) -> int:
+        # Seconds until the next whole token
+        with self._lock:
+            tokens, _ = self._buckets.get(key, (self.burst, 0.0))
+        if self.rate <= 0:
+            return 60
+        return max(1, math.ceil(max(0.0, 1 - tokens) / self.rate))
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        level, _, rate = item.partition("=")
+        if level.strip():
+            rates[level.strip().lower()] = float(rate)
+    return rates
+
+ingest_limiter = TokenBucketLimiter(LOG_INGEST_RATE_PER_SECOND, LOG_INGEST_BURST)
+sample_rates = parse_sample_rates(LOG_INGEST_SAMPLE_RATES)
+
+async def read_body(request: Request) -> bytes:
+    """The request body, gunzipped if needed; 413 past LOG_INGEST_MAX_BYTES either way."""
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > LOG_INGEST_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Log batch too large")
+    return decode_body(bytes(body), request.headers.get("content-encoding", ""))
+
+def decode_body(body: bytes, content_encoding: str) -> bytes:
+    if content_encoding.strip().lower() != "gzip":
+        return body
+    try:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data = decompressor.decompress(body, LOG_INGEST_MAX_BYTES + 1)
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Invalid gzip body")
+    if len(data) > LOG_INGEST_MAX_BYTES or decompressor.unconsumed_tail:
+        raise HTTPException(status_code=413, detail="Log batch too large")
+    return data
+
+def admit(client_key: str, entries: List[FrontendLog]) -> Tuple[List[FrontendLog], int, int]:
+    """Rate-limit then sample a batch. Returns (kept entries, rate-limited count, sampled-out count)."""
+    granted = ingest_limiter.take(client_key, len(entries))
+    kept = []
+    for entry in entries[:granted]:
+        rate = sample_rates.get(entry.level.lower(), 1.0)
+        if rate >= 1 or random.random() < rate:
+            kept.append(entry)
+    return kept, len(entries) - granted, granted - len(kept)
+
+_LOG_METHODS = {"debug": "debug", "info": "info", "warn": "warning", "warning": "warning", "error": "error", "critical": "critical"}
+
+def record_frontend_log(log: FrontendLog):
+    # Map frontend level to logger method
+    log_func = getattr(logger, _LOG_METHODS.get(log.level.lower(), "info"))
+
+    # Merge context with standard fields (redacted)
+    extra = {
+        "source": "frontend",
+        "correlation_id": log.context.get("correlationId"),
+        "original_timestamp": log.timestamp
+    }
+    # Add other context fields (redacted as a whole, so top-level keys count too)
+    for k, v in redact_value(log.context).items():
+        if k != "correlationId":
+            extra[k] = v
+
+    log_func(log.message, extra={"extra_fields": extra})
+
+async def record_frontend_logs(entries: List[FrontendLog]):
+    # Async so it runs on the event loop after the response; the logger only enqueues
+    for entry in entries:
+        record_frontend_log(entry)
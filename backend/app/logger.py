@@ -1,40 +1,195 @@
-import logging
-import json
+"""
+Structured JSON logging that stays off the request path.
+
+Log calls only snapshot the record and put it on a bounded queue. A background writer
+thread serializes records (with orjson when it is installed) and writes them to stdout
+in batches, so a slow log sink can't add latency to API responses. When the queue is
+full, records are dropped and counted rather than blocking the caller, and the writer
+reports the count. `flush_logs()` waits for queued records; the app calls it on
+shutdown, and the handler drains itself at interpreter exit.
+
+LOG_LEVEL sets the level. LOG_ASYNC=false writes synchronously, which is handy when
+debugging a crash.
+"""
+import os
 import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib json serializer is used instead
+    orjson = None
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+# Records waiting for the writer; beyond this new records are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+
+def dumps(obj: Dict[str, Any]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str).decode("utf-8")
+        except TypeError:
+            # e.g. non-string dict keys, which json.dumps accepts
+            pass
+    return json.dumps(obj, default=str)
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         log_obj: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat(),
+            # When the call was made, not when the writer got to it
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
             "level": record.levelname,
             "message": record.getMessage(),
             "logger": record.name,
             "module": record.module,
         }
-        
+
         # Add extra fields if they exist in the record
         if hasattr(record, "extra_fields"):
             log_obj.update(record.extra_fields)
-            
+
         # Add exception info if present
-        if record.exc_info:
+        if record.exc_text:
+            log_obj["exc_info"] = record.exc_text
+        elif record.exc_info:
             log_obj["exc_info"] = self.formatException(record.exc_info)
 
-        return json.dumps(log_obj)
+        return dumps(log_obj)
+
+class BatchingQueueHandler(logging.Handler):
+    """Queues records for a writer thread that formats and writes them in batches."""
+    _STOP = object()
+
+    def __init__(self, stream: TextIO, max_queue: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE):
+        super().__init__()
+        self.stream = stream
+        self.batch_size = max(1, batch_size)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._lock_counts = threading.Lock()
+        self.dropped_total = 0
+        self.written_total = 0
+        self._reported_dropped = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # Resolve what may change or go stale by the time the writer runs
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+                record.exc_info = None
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_counts:
+                self.dropped_total += 1
+        except Exception:
+            self.handleError(record)
+
+    def _run(self):
+        while True:
+            batch: List[Any] = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is self._STOP for item in batch)
+            records = [item for item in batch if item is not self._STOP]
+            try:
+                self._write(records)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, records: List[logging.LogRecord]):
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        with self._lock_counts:
+            dropped = self.dropped_total - self._reported_dropped
+            self._reported_dropped = self.dropped_total
+        if dropped:
+            lines.append(dumps({
+                "timestamp": datetime.utcnow().isoformat(),
+                "level": "WARNING",
+                "message": f"Log queue full: dropped {dropped} records",
+                "logger": "log-writer",
+                "dropped": dropped,
+                "dropped_total": self._reported_dropped,
+            }))
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+            self.written_total += len(records)
+        except Exception:
+            # The sink failed; there is nowhere left to report it
+            pass
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait until every queued record has been written (at most `timeout` seconds)."""
+        if not self._thread.is_alive():
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return
+                self._queue.all_tasks_done.wait(remaining)
+
+    def close(self):
+        if self._thread.is_alive():
+            try:
+                self._queue.put(self._STOP, timeout=5)
+                self._thread.join(timeout=5)
+            except queue.Full:
+                pass
+        super().close()
 
 def setup_logger(name: str = "agentic_platform") -> logging.Logger:
     logger = logging.getLogger(name)
-    
+
     # clear existing handlers
     if logger.handlers:
+        for handler in logger.handlers:
+            handler.close()
         logger.handlers.clear()
-        
-    handler = logging.StreamHandler(sys.stdout)
+
+    handler = BatchingQueueHandler(sys.stdout) if LOG_ASYNC else logging.StreamHandler(sys.stdout)
     handler.setFormatter(JsonFormatter())
     logger.addHandler(handler)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(LOG_LEVEL)
     return logger
 
 logger = setup_logger()
+
+def flush_logs(timeout: Optional[float] = 5.0):
+    for handler in logger.handlers:
+        if isinstance(handler, BatchingQueueHandler):
+            handler.flush(timeout)
+        else:
+            handler.flush()
+
+def _close_handlers():
+    for handler in logger.handlers:
+        handler.close()
+
+atexit.register(_close_handlers)
@@ -1,89 +1,43 @@
-from fastapi import FastAPI, Request, Response
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from .routers import auth, users, agents, simulation, logs, tools
-from .database import engine, Base
-from .logger import logger
-import time
-import uuid
-import json
-from typing import Any, Dict, Union
+from .routers import auth, users, agents, simulation, logs, tools, jobs
+from .database import engine, Base, dispose_async_engine
+from .logger import logger, flush_logs
+from .request_logging import RequestLoggingMiddleware
+from . import log_ingest
+from .tools_registry import tool_service
+from .simulation_runner import simulation_runner
+from .scheduler import scheduler
+from .chat_compaction import chat_compactor
+from .jobs import job_runner
+from contextlib import asynccontextmanager
 import os
+from typing import List
 
 # Create tables only when explicitly enabled (dev-only)
 if os.getenv("AUTO_CREATE_TABLES", "false").lower() == "true":
     Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Agentic Platform API", version="0.1.0")
-
-# --- Logging helpers ---
-SENSITIVE_KEYS = {"password", "token", "authorization", "api_key", "apikey", "secret", "access_token", "refresh_token"}
-MAX_LOG_BODY_BYTES = 10_000
-
-def _redact_value(value: Any) -> Any:
-    if isinstance(value, dict):
-        return {k: ("[REDACTED]" if k.lower() in SENSITIVE_KEYS else _redact_value(v)) for k, v in value.items()}
-    if isinstance(value, list):
-        return [_redact_value(v) for v in value]
-    return value
-
-def _safe_json(body: bytes) -> Union[Dict[str, Any], str]:
-    try:
-        parsed = json.loads(body.decode("utf-8"))
-        return _redact_value(parsed)
-    except Exception:
-        return f"[non-json body] {body[:512]!r}"
-
-# --- Middleware for Logging ---
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
-        start_time = time.time()
-        
-        # Log Request
-        log_context = {
-            "correlation_id": correlation_id,
-            "method": request.method,
-            "path": request.url.path,
-            "client_ip": request.client.host if request.client else "unknown"
-        }
-        
-        # Capture body for logging (bounded, redacted, safe)
-        body_bytes = await request.body()
-        async def receive():
-            return {"type": "http.request", "body": body_bytes}
-        request._receive = receive
-
-        if len(body_bytes) > MAX_LOG_BODY_BYTES:
-            log_context["request_body"] = f"[omitted] size={len(body_bytes)}"
-        else:
-            log_context["request_body"] = _safe_json(body_bytes)
-
-        logger.info(f"Incoming Request: {request.method} {request.url.path}", extra={"extra_fields": log_context})
-
-        response = await call_next(request)
-        
-        # Log Response
-        process_time = (time.time() - start_time) * 1000
-        
-        # Capture response body? (Harder with streaming responses, skipping for safety/perf unless critical)
-        # For now, logging status and time
-        
-        logger.info(
-            f"Outgoing Response: {response.status_code}", 
-            extra={
-                "extra_fields": {
-                    "correlation_id": correlation_id,
-                    "status_code": response.status_code,
-                    "process_time_ms": process_time
-                }
-            }
-        )
-        
-        response.headers["X-Correlation-ID"] = correlation_id
-        return response
-
-app.add_middleware(LoggingMiddleware)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Long-lived, pooled HTTP client shared by all API tool calls
+    await tool_service.startup()
+    yield
+    # Park autoruns as "paused" so they can be resumed after the restart
+    await simulation_runner.shutdown()
+    await job_runner.shutdown()
+    await chat_compactor.shutdown()
+    await scheduler.shutdown()
+    await tool_service.shutdown()
+    await dispose_async_engine()
+    # Write out queued log records before the process goes
+    flush_logs()
+
+app = FastAPI(title="Agentic Platform API", version="0.1.0", lifespan=lifespan)
+
+# --- Request logging (pure ASGI: no body buffering, sampled per route and status) ---
+app.add_middleware(RequestLoggingMiddleware)
 
 # Configure CORS
 allowed_origins_str = os.getenv(
@@ -98,38 +52,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Correlation-ID", "X-Next-Cursor"],
 )
 
-# --- Log Ingestion Endpoint ---
-from pydantic import BaseModel
-class FrontendLog(BaseModel):
-    level: str
-    message: str
-    context: dict = {}
-    timestamp: str
+# --- Log Ingestion Endpoints ---
+def _client_key(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+def _rate_limited(client_key: str) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Log rate limit exceeded",
+        headers={"Retry-After": str(log_ingest.ingest_limiter.retry_after(client_key))},
+    )
+
+_log_batch_adapter = TypeAdapter(List[log_ingest.FrontendLog])
 
 @app.post("/logs/ingest")
-async def ingest_logs(log: FrontendLog):
+async def ingest_logs(log: log_ingest.FrontendLog, request: Request, background_tasks: BackgroundTasks):
     """
     Ingest logs from frontend/external sources to centralize logging.
     """
-    # Map frontend level to logger method
-    log_func = getattr(logger, log.level.lower(), logger.info)
-    
-    # Merge context with standard fields (redacted)
-    extra = {
-        "source": "frontend",
-        "correlation_id": log.context.get("correlationId"),
-        "original_timestamp": log.timestamp
-    }
-    # Add other context fields
-    for k, v in log.context.items():
-        if k != "correlationId":
-            extra[k] = _redact_value(v)
-
-    log_func(log.message, extra={"extra_fields": extra})
+    client_key = _client_key(request)
+    kept, limited, _ = log_ingest.admit(client_key, [log])
+    if limited:
+        raise _rate_limited(client_key)
+    background_tasks.add_task(log_ingest.record_frontend_logs, kept)
     return {"status": "received"}
 
+@app.post("/logs/ingest/batch")
+async def ingest_log_batch(request: Request, background_tasks: BackgroundTasks):
+    """
+    Ingest a JSON array of frontend logs in one request, optionally with
+    `Content-Encoding: gzip`. Entries past the client's rate limit are dropped; 429 only
+    when none fit. Entries are sampled by level and logged after the response.
+    """
+    body = await log_ingest.read_body(request)
+    try:
+        entries = _log_batch_adapter.validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    if len(entries) > log_ingest.LOG_INGEST_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {log_ingest.LOG_INGEST_MAX_BATCH} entries per batch")
+
+    client_key = _client_key(request)
+    kept, limited, sampled_out = log_ingest.admit(client_key, entries)
+    if entries and limited == len(entries):
+        raise _rate_limited(client_key)
+    background_tasks.add_task(log_ingest.record_frontend_logs, kept)
+    return {"status": "received", "accepted": len(kept), "rate_limited": limited, "sampled_out": sampled_out}
 
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -137,6 +108,7 @@ app.include_router(agents.router)
 app.include_router(simulation.router)
 app.include_router(logs.router)
 app.include_router(tools.router)
+app.include_router(jobs.router)
 
 @app.get("/")
 def read_root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum as SqEnum, Text, JSON, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum as SqEnum, Text, JSON, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -79,6 +79,7 @@ class Tool(Base):
     
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    version = Column(Integer, default=1)
 
     agents = relationship("Agent", secondary=agent_tool_association, back_populates="tools")
 
@@ -88,13 +89,31 @@ class Simulation(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     owner_id = Column(Integer, ForeignKey("users.id"))
     name = Column(String)
-    status = Column(String, default="active") # active, paused, completed
+    status = Column(String, default="active") # active, running, paused, completed
     agent_ids = Column(JSON) # List of agent IDs participating
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Maintained on every message write so listings never touch simulation_messages
+    message_count = Column(Integer, default=0)
+    last_message_preview = Column(String, nullable=True)
+    last_message_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Autorun progress (see simulation_runner)
+    autorun_target_turns = Column(Integer, nullable=True)
+    autorun_completed_turns = Column(Integer, default=0)
+    autorun_stop_phrase = Column(String, nullable=True)
+    autorun_stop_reason = Column(String, nullable=True) # max_turns, stop_phrase, cancelled, shutdown, error: ...
+    # The runner driving the run, in whichever process; it heartbeats while attached
+    autorun_runner_id = Column(String, nullable=True)
+    autorun_heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
     messages = relationship("SimulationMessage", back_populates="simulation", cascade="all, delete-orphan", order_by="SimulationMessage.created_at")
 
+    __table_args__ = (
+        Index("ix_simulations_owner_id_last_message_at_id", "owner_id", "last_message_at", "id"),
+    )
+
 class SimulationMessage(Base):
     __tablename__ = "simulation_messages"
 
@@ -108,6 +127,11 @@ class SimulationMessage(Base):
 
     simulation = relationship("Simulation", back_populates="messages")
 
+    # Latest-messages window and round-robin lookups read this index newest first
+    __table_args__ = (
+        Index("ix_simulation_messages_simulation_id_created_at_id", "simulation_id", "created_at", "id"),
+    )
+
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
 
@@ -117,9 +141,20 @@ class ChatSession(Base):
     name = Column(String) # E.g., "Chat started at..." or summary
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Denormalized for the session list, updated with each saved turn
+    message_count = Column(Integer, default=0)
+    last_message_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Rolling summary of messages up to and including summary_through_id (see chat_compaction)
+    summary = Column(Text, nullable=True)
+    summary_through_id = Column(Integer, nullable=True)
 
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan", order_by="ChatMessage.created_at")
 
+    # Session list: an agent's sessions, most recently active first
+    __table_args__ = (
+        Index("ix_chat_sessions_agent_id_last_message_at_id", "agent_id", "last_message_at", "id"),
+    )
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
@@ -132,6 +167,10 @@ class ChatMessage(Base):
 
     session = relationship("ChatSession", back_populates="messages")
 
+    __table_args__ = (
+        Index("ix_chat_messages_session_id_created_at_id", "session_id", "created_at", "id"),
+    )
+
 class AgentExecutionLog(Base):
     __tablename__ = "agent_execution_logs"
 
@@ -146,8 +185,65 @@ class AgentExecutionLog(Base):
     execution_time_ms = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Denormalized at write time so list views never have to load the JSON/text columns
+    tool_event_count = Column(Integer, nullable=True)
+    response_length = Column(Integer, nullable=True)
+    user_prompt_preview = Column(String, nullable=True)
+    response_preview = Column(String, nullable=True)
+
     agent = relationship("Agent")
 
+    # Keyset pagination on (created_at, id), per filter used by the log API
+    __table_args__ = (
+        Index("ix_agent_execution_logs_created_at_id", "created_at", "id"),
+        Index("ix_agent_execution_logs_agent_id_created_at_id", "agent_id", "created_at", "id"),
+        Index("ix_agent_execution_logs_simulation_id_created_at_id", "simulation_id", "created_at", "id"),
+        Index("ix_agent_execution_logs_session_id_created_at_id", "session_id", "created_at", "id"),
+    )
+
     @property
     def tool_events(self):
         return self.prompt_context.get("tool_events", []) if self.prompt_context else []
+
+class ToolInvocation(Base):
+    """One tool call made during an agent execution, normalized out of the log's tool_events."""
+    __tablename__ = "tool_invocations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No FK to tools: invocation history outlives the tool, like the execution log it came from
+    tool_id = Column(String, nullable=True)
+    tool_name = Column(String, nullable=False)
+    agent_id = Column(String, ForeignKey("agents.id"), index=True)
+    log_id = Column(String, ForeignKey("agent_execution_logs.id"), index=True)
+    status = Column(String)  # success, error
+    latency_ms = Column(Integer)
+    request_url = Column(String, nullable=True)
+    input_args = Column(JSON)      # Truncated copy of the call arguments
+    output_result = Column(Text)   # Truncated tool output
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_tool_invocations_tool_id_created_at_id", "tool_id", "created_at", "id"),
+    )
+
+class AgentJob(Base):
+    """A long-running agent execution submitted for background processing (see jobs.py)."""
+    __tablename__ = "agent_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    kind = Column(String, default="chat")
+    session_id = Column(String, ForeignKey("chat_sessions.id"), nullable=True, index=True)
+    prompt = Column(Text)
+    status = Column(String, default="queued")  # queued, running, succeeded, failed, cancelled
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Refreshed while the job runs; a "running" job whose heartbeat stops is reclaimed
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_agent_jobs_owner_id_created_at_id", "owner_id", "created_at", "id"),
+    )
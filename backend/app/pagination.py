@@ -0,0 +1,88 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are ordered by a (timestamp, id) key and the cursor is the key of the last row
+served, encoded as an opaque string. The next page is `WHERE key < cursor` (or `>` when
+ascending), which a composite index on the same columns answers without scanning the
+rows that came before, and which stays stable while new rows are being inserted.
+
+List endpoints keep returning a plain JSON array and hand out the next cursor in the
+X-Next-Cursor response header (absent on the last page).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, bindparam, String
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list):
+            raise ValueError("cursor payload must be a list")
+        return [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) and "dt" in v else v for v in payload]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _bind(query: Query, value: Any) -> Any:
+    # SQLite keeps server-default timestamps as "YYYY-MM-DD HH:MM:SS" text, while a bound
+    # datetime is rendered with microseconds; compare against the same text shape instead.
+    if isinstance(value, datetime) and query.session.get_bind().dialect.name == "sqlite":
+        return bindparam(None, value.replace(tzinfo=None).isoformat(sep=" "), type_=String)
+    return value
+
+def keyset_page(
+    query: Query,
+    columns: Tuple[Any, Any],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True,
+    offset: int = 0,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Apply ordering, the cursor condition and the limit for a (timestamp, id) key.
+    `offset` skips rows after ordering (only for legacy skip-based clients).
+    Returns the rows and the cursor for the following page, or None on the last page.
+    `query` must yield entities (or rows) exposing the two key columns as attributes.
+    """
+    time_col, id_col = columns
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 2:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        cursor_time, cursor_id = values
+        cursor_time = _bind(query, cursor_time)
+        if descending:
+            query = query.filter(or_(time_col < cursor_time, and_(time_col == cursor_time, id_col < cursor_id)))
+        else:
+            query = query.filter(or_(time_col > cursor_time, and_(time_col == cursor_time, id_col > cursor_id)))
+
+    if descending:
+        query = query.order_by(time_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(time_col.asc(), id_col.asc())
+
+    # One extra row tells us whether another page exists
+    if offset:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, time_col.key), getattr(last, id_col.key)])
+    return rows, next_cursor
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
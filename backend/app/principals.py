@@ -0,0 +1,197 @@
+"""
+Cached token-to-principal resolution.
+
+Every authenticated request turns its token subject (the user's email) into a user.
+Instead of querying the users table each time, `get_current_user` resolves a small
+immutable `Principal` through a TTL-bounded in-process LRU, optionally backed by a
+shared Redis tier so a fresh worker doesn't start cold. Routes get the principal, not
+the ORM `User`; they only need the id, role and profile fields it carries.
+
+Entries are dropped when a `User` row is updated or deleted through the ORM (after
+the transaction commits), so deactivations and role changes apply on the next request
+in this process. Other processes, and changes made outside the ORM, catch up within
+the TTL.
+"""
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional, Set, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from . import models
+from .logger import logger
+
+# 0 disables the cache
+AUTH_PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "10000"))
+# Share resolved principals across processes through REDIS_URL
+AUTH_PRINCIPAL_CACHE_REDIS = os.getenv("AUTH_PRINCIPAL_CACHE_REDIS", "false").lower() in ("1", "true", "yes")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    full_name: Optional[str]
+    role: models.UserRole
+    is_active: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=models.UserRole(user.role or models.UserRole.USER),
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+        )
+
+    def dumps(self) -> str:
+        data = asdict(self)
+        data["role"] = self.role.value
+        data["created_at"] = self.created_at.isoformat() if self.created_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, raw) -> "Principal":
+        data = json.loads(raw)
+        data["role"] = models.UserRole(data["role"])
+        data["created_at"] = datetime.fromisoformat(data["created_at"]) if data["created_at"] else None
+        return cls(**data)
+
+class RedisPrincipalStore:
+    """Shared tier: one expiring key per subject. Errors degrade to a cache miss."""
+    def __init__(self, url: str = REDIS_URL):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    @staticmethod
+    def _key(subject: str) -> str:
+        return f"agentic:principal:{subject}"
+
+    def get(self, subject: str) -> Optional[Principal]:
+        try:
+            raw = self.client.get(self._key(subject))
+            return Principal.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning("Principal cache read failed", extra={"extra_fields": {"error": str(e)}})
+            return None
+
+    def put(self, subject: str, principal: Principal, ttl_seconds: float):
+        try:
+            self.client.set(self._key(subject), principal.dumps(), px=int(ttl_seconds * 1000))
+        except Exception as e:
+            logger.warning("Principal cache write failed", extra={"extra_fields": {"error": str(e)}})
+
+    def invalidate(self, subject: str):
+        try:
+            self.client.delete(self._key(subject))
+        except Exception as e:
+            logger.warning("Principal cache invalidation failed", extra={"extra_fields": {"error": str(e)}})
+
+class PrincipalCache:
+    """Bounded LRU of subject -> (expiry, principal), with an optional shared tier."""
+    def __init__(self, ttl_seconds: float, max_entries: int, shared: Optional[RedisPrincipalStore] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, subject: str) -> Optional[Principal]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(subject)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(subject, None)
+        principal = self.shared.get(subject) if self.shared else None
+        with self._lock:
+            if principal is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._put_local(subject, principal)
+        return principal
+
+    def put(self, subject: str, principal: Principal):
+        if not self.enabled:
+            return
+        self._put_local(subject, principal)
+        if self.shared:
+            self.shared.put(subject, principal, self.ttl_seconds)
+
+    def _put_local(self, subject: str, principal: Principal):
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop(subject, None)
+        if self.shared:
+            self.shared.invalidate(subject)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def _build_principal_cache() -> PrincipalCache:
+    shared = None
+    if AUTH_PRINCIPAL_CACHE_REDIS:
+        try:
+            shared = RedisPrincipalStore()
+        except ImportError:
+            logger.warning("AUTH_PRINCIPAL_CACHE_REDIS is set but the 'redis' package is not installed; caching in-process only")
+    return PrincipalCache(AUTH_PRINCIPAL_CACHE_TTL_SECONDS, AUTH_PRINCIPAL_CACHE_SIZE, shared)
+
+principal_cache = _build_principal_cache()
+
+# --- Invalidation ---
+
+_PENDING_KEY = "principal_cache_invalidate"
+
+def _changed_subjects(session: Session) -> Set[str]:
+    subjects = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.User):
+            # Both the old and the new email, in case the subject itself changed
+            history = inspect(obj).attrs.email.history
+            subjects.update(e for e in (*history.deleted, *history.unchanged, *history.added) if e)
+    return subjects
+
+@event.listens_for(Session, "before_flush")
+def _collect_user_changes(session, flush_context, instances):
+    subjects = _changed_subjects(session)
+    if subjects:
+        session.info.setdefault(_PENDING_KEY, set()).update(subjects)
+        # Drop now as well, so this process stops serving the old principal straight away
+        for subject in subjects:
+            principal_cache.invalidate(subject)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    # Again after commit: a request may have re-cached the old row in between
+    for subject in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(subject)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
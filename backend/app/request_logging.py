@@ -0,0 +1,141 @@
+"""
+Request logging as a pure ASGI middleware.
+
+Each request gets one log line when its response completes, with the correlation id
+(taken from X-Correlation-ID or generated, and echoed on the response), status and
+timing. The request body is never buffered. The middleware copies at most
+LOG_REQUEST_BODY_BYTES of it as the app reads it, and logs it only when the whole body
+fits, as redacted JSON or form fields. Larger or other bodies are logged by size only.
+Streaming responses pass straight through.
+
+Which requests get logged is sampled per path prefix and status class with
+LOG_SAMPLE_RATES: comma-separated `<path prefix or *>:<status class or *>=<rate>` rules,
+e.g. `/health:*=0,/logs:2xx=0.1,*:5xx=1`. The longest matching prefix wins, then an
+exact status class over `*`; anything unmatched is logged. Paths whose rules are all 0,
+and those in LOG_BODY_SKIP_PATHS, skip body capture entirely.
+"""
+import os
+import json
+import time
+import uuid
+import random
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+from .logger import logger
+
+SENSITIVE_KEYS = {"password", "token", "authorization", "api_key", "apikey", "secret", "access_token", "refresh_token"}
+LOG_REQUEST_BODY_BYTES = int(os.getenv("LOG_REQUEST_BODY_BYTES", "2048"))
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "/health:*=0")
+LOG_BODY_SKIP_PATHS = [p.strip() for p in os.getenv("LOG_BODY_SKIP_PATHS", "/health,/logs/ingest").split(",") if p.strip()]
+
+def redact_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: ("[REDACTED]" if k.lower() in SENSITIVE_KEYS else redact_value(v)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact_value(v) for v in value]
+    return value
+
+def body_preview(body: bytes, content_type: str) -> Union[Dict[str, Any], str]:
+    """A complete request body as redacted data; anything else by size only."""
+    if not body:
+        return ""
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return redact_value(dict(parse_qsl(body.decode("utf-8"), keep_blank_values=True)))
+        return redact_value(json.loads(body.decode("utf-8")))
+    except (UnicodeDecodeError, ValueError):
+        return f"[non-json body] size={len(body)}"
+
+class SamplingRules:
+    def __init__(self, spec: str):
+        self.rules: List[Tuple[str, str, float]] = []
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            target, _, rate = item.partition("=")
+            path, _, status_class = target.strip().partition(":")
+            self.rules.append((path or "*", (status_class or "*").lower(), float(rate)))
+        # Most specific first: longer prefixes, then exact status classes
+        self.rules.sort(key=lambda r: (r[0] == "*", -len(r[0]), r[1] == "*"))
+
+    @staticmethod
+    def _matches(prefix: str, path: str) -> bool:
+        return prefix == "*" or path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+    def rate(self, path: str, status_code: int) -> float:
+        status_class = f"{status_code // 100}xx"
+        for prefix, rule_class, rate in self.rules:
+            if self._matches(prefix, path) and rule_class in ("*", status_class):
+                return rate
+        return 1.0
+
+    def never(self, path: str) -> bool:
+        """True when no status of this path can be sampled."""
+        return all(self.rate(path, status_class * 100) == 0 for status_class in range(1, 6))
+
+class RequestLoggingMiddleware:
+    def __init__(self, app, sample_rates: str = LOG_SAMPLE_RATES, max_body_bytes: int = LOG_REQUEST_BODY_BYTES,
+                 body_skip_paths: Optional[List[str]] = None):
+        self.app = app
+        self.sampling = SamplingRules(sample_rates)
+        self.max_body_bytes = max_body_bytes
+        self.body_skip_paths = LOG_BODY_SKIP_PATHS if body_skip_paths is None else body_skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        headers = dict(scope.get("headers") or ())
+        correlation_id = headers.get(b"x-correlation-id", b"").decode("latin-1") or str(uuid.uuid4())
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        sampled_out = self.sampling.never(path)
+        capture = not sampled_out and self.max_body_bytes > 0 and not any(
+            SamplingRules._matches(p, path) for p in self.body_skip_paths
+        )
+        start = time.perf_counter()
+        preview = bytearray()
+        body_size = 0
+        status_code = 500
+
+        async def receive_wrapper():
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                room = self.max_body_bytes + 1 - len(preview)
+                if room > 0:
+                    preview.extend(chunk[:room])
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-correlation-id", correlation_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper if capture else receive, send_wrapper)
+        finally:
+            if not sampled_out:
+                rate = self.sampling.rate(path, status_code)
+                if rate >= 1 or random.random() < rate:
+                    log_context = {
+                        "correlation_id": correlation_id,
+                        "method": scope.get("method"),
+                        "path": path,
+                        "client_ip": scope["client"][0] if scope.get("client") else "unknown",
+                        "status_code": status_code,
+                        "process_time_ms": (time.perf_counter() - start) * 1000,
+                    }
+                    if capture and body_size:
+                        if body_size > self.max_body_bytes:
+                            log_context["request_body"] = f"[omitted] size={body_size}"
+                        else:
+                            content_type = headers.get(b"content-type", b"").decode("latin-1")
+                            log_context["request_body"] = body_preview(bytes(preview), content_type)
+                    logger.info(f"{scope.get('method')} {path} {status_code}", extra={"extra_fields": log_context})
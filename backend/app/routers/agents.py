@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
-from .. import database, models, schemas, auth, execution
+import json
+from .. import database, models, schemas, auth, execution, chat_turns, pagination
+from ..scheduler import Priority, scheduler
 
 router = APIRouter(
     prefix="/agents",
@@ -11,7 +14,7 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.AgentResponse)
-def create_agent(agent: schemas.AgentCreate, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def create_agent(agent: schemas.AgentCreate, db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     new_agent = models.Agent(
         **agent.model_dump(),
         owner_id=current_user.id
@@ -22,19 +25,19 @@ def create_agent(agent: schemas.AgentCreate, db: Session = Depends(database.get_
     return new_agent
 
 @router.get("/", response_model=List[schemas.AgentResponse])
-def read_agents(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def read_agents(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     agents = db.query(models.Agent).filter(models.Agent.owner_id == current_user.id).offset(skip).limit(limit).all()
     return agents
 
 @router.get("/{agent_id}", response_model=schemas.AgentResponse)
-def read_agent(agent_id: str, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def read_agent(agent_id: str, db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     agent = db.query(models.Agent).filter(models.Agent.id == agent_id, models.Agent.owner_id == current_user.id).first()
     if agent is None:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
 
 @router.put("/{agent_id}", response_model=schemas.AgentResponse)
-def update_agent(agent_id: str, agent_update: schemas.AgentCreate, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def update_agent(agent_id: str, agent_update: schemas.AgentCreate, db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     db_agent = db.query(models.Agent).filter(models.Agent.id == agent_id, models.Agent.owner_id == current_user.id).first()
     if db_agent is None:
         raise HTTPException(status_code=404, detail="Agent not found")
@@ -42,8 +45,10 @@ def update_agent(agent_id: str, agent_update: schemas.AgentCreate, db: Session =
     update_data = agent_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_agent, key, value)
+    db_agent.version = (db_agent.version or 1) + 1
     
     db.commit()
+    execution.execution_service.invalidate_agent(agent_id)
     db.refresh(db_agent)
     return db_agent
 
@@ -51,7 +56,7 @@ def update_agent(agent_id: str, agent_update: schemas.AgentCreate, db: Session =
 def create_session(
     agent_id: str,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
     agent = db.query(models.Agent).filter(models.Agent.id == agent_id, models.Agent.owner_id == current_user.id).first()
     if not agent:
@@ -70,80 +75,91 @@ def create_session(
 @router.get("/{agent_id}/sessions", response_model=List[schemas.ChatSessionResponse])
 def get_sessions(
     agent_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    sessions = db.query(models.ChatSession).filter(
+    """The agent's sessions, most recently active first; follow X-Next-Cursor for older ones."""
+    query = db.query(models.ChatSession).filter(
         models.ChatSession.agent_id == agent_id,
         models.ChatSession.user_id == current_user.id
-    ).order_by(models.ChatSession.updated_at.desc()).all()
-    return sessions
+    )
+    sessions, next_cursor = pagination.keyset_page(
+        query, (models.ChatSession.last_message_at, models.ChatSession.id), cursor, limit
+    )
+    pagination.set_next_cursor(response, next_cursor)
+    # Counters come from the session row, so listing never reads chat_messages
+    return [
+        schemas.ChatSessionResponse(
+            id=session.id,
+            agent_id=session.agent_id,
+            name=session.name,
+            created_at=session.created_at,
+            message_count=session.message_count or 0,
+            last_message_at=session.last_message_at,
+        )
+        for session in sessions
+    ]
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
 @router.post("/sessions/{session_id}/execute", response_model=schemas.ChatResponse)
 async def execute_session_chat(
     session_id: str,
     request: schemas.PromptRequest,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    session = db.query(models.ChatSession).filter(
-        models.ChatSession.id == session_id,
-        models.ChatSession.user_id == current_user.id
-    ).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    agent = db.query(models.Agent).filter(models.Agent.id == session.agent_id).first()
-    
-    # Save User Message
-    user_msg = models.ChatMessage(session_id=session_id, role="user", content=request.prompt)
-    db.add(user_msg)
-    
-    # Context
-    db_history = db.query(models.ChatMessage).filter(models.ChatMessage.session_id == session_id).order_by(models.ChatMessage.created_at.asc()).all()
-    history_dicts = [{"role": msg.role, "content": msg.content} for msg in db_history]
+    session, agent, history_dicts = await chat_turns.load_chat_context(db, session_id, current_user.id)
     
-    execution_result = await execution.execution_service.execute_agent(agent, request.prompt, history_dicts)
-    response_text = execution_result["response_text"]
-    log_data = execution_result["log_data"]
-    tool_calls = log_data.get("tool_events", [])
-    
-    # Merge tool_events into prompt_context for persistence
-    log_context = log_data["prompt_context"]
-    log_context["tool_events"] = tool_calls
-
-    # Save Execution Log
-    new_log = models.AgentExecutionLog(
-        agent_id=agent.id,
-        session_id=session_id,
-        prompt_context=log_context,
-        raw_response=log_data["raw_response"],
-        thought_process=log_data["thought_process"],
-        execution_time_ms=log_data["execution_time_ms"]
-    )
-    db.add(new_log)
-    
-    # Save Assistant Message with Tool Calls
-    assistant_msg = models.ChatMessage(
-        session_id=session_id, 
-        role="assistant", 
-        content=response_text,
-        tool_calls=tool_calls
+    async with scheduler.slot(owner=current_user.id, flow=session_id, priority=Priority.INTERACTIVE):
+        execution_result = await execution.execution_service.execute_agent(agent, request.prompt, history_dicts, summary=session.summary)
+    return await chat_turns.persist_chat_turn(db, session, agent, request.prompt, execution_result)
+
+@router.post("/sessions/{session_id}/execute/stream")
+async def stream_session_chat(
+    session_id: str,
+    request: schemas.PromptRequest,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """
+    Server-Sent Events variant of execute_session_chat.
+    Emits `token`, `tool_call_start` and `tool_call_end` events while the agent runs,
+    then persists the turn and emits a final `summary` event.
+    """
+    session, agent, history_dicts = await chat_turns.load_chat_context(db, session_id, current_user.id)
+
+    async def event_stream():
+        try:
+            async for event in chat_turns.stream_chat_turn(db, session, agent, history_dicts, request.prompt):
+                yield _sse(event["event"], event["data"])
+        except HTTPException as e:
+            # Headers are already sent; report the rejection in-band
+            yield _sse("error", {"detail": e.detail, "status_code": e.status_code})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    db.add(assistant_msg)
-    
-    # Update session timestamp
-    session.updated_at = func.now()
-    
-    db.commit()
-    return {"response": response_text, "tool_calls": tool_calls}
 
 @router.get("/sessions/{session_id}/history", response_model=List[schemas.ChatMessageResponse])
 def get_session_history(
     session_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
+    """
+    The latest `limit` messages, oldest first. When there are older ones,
+    X-Next-Cursor holds the cursor that loads the page before them.
+    """
     session = db.query(models.ChatSession).filter(
         models.ChatSession.id == session_id,
         models.ChatSession.user_id == current_user.id
@@ -151,24 +167,30 @@ def get_session_history(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
         
-    messages = db.query(models.ChatMessage).filter(models.ChatMessage.session_id == session_id).order_by(models.ChatMessage.created_at.asc()).all()
-    return messages
+    # Pages walk backwards on the (session_id, created_at, id) index; each page is returned oldest-first
+    query = db.query(models.ChatMessage).filter(models.ChatMessage.session_id == session_id)
+    messages, next_cursor = pagination.keyset_page(
+        query, (models.ChatMessage.created_at, models.ChatMessage.id), cursor, limit
+    )
+    pagination.set_next_cursor(response, next_cursor)
+    return list(reversed(messages))
 
 @router.delete("/{agent_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_agent(agent_id: str, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def delete_agent(agent_id: str, db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     db_agent = db.query(models.Agent).filter(models.Agent.id == agent_id, models.Agent.owner_id == current_user.id).first()
     if db_agent is None:
         raise HTTPException(status_code=404, detail="Agent not found")
     
     db.delete(db_agent)
     db.commit()
+    execution.execution_service.invalidate_agent(agent_id)
     return None
 
 @router.get("/{agent_id}/tools", response_model=List[schemas.ToolResponse])
 def get_agent_tools(
     agent_id: str,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
     agent = db.query(models.Agent).filter(models.Agent.id == agent_id, models.Agent.owner_id == current_user.id).first()
     if not agent:
@@ -180,7 +202,7 @@ def add_tool_to_agent(
     agent_id: str,
     tool_id: str,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
     agent = db.query(models.Agent).filter(models.Agent.id == agent_id, models.Agent.owner_id == current_user.id).first()
     tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
@@ -191,6 +213,7 @@ def add_tool_to_agent(
     if tool not in agent.tools:
         agent.tools.append(tool)
         db.commit()
+        execution.execution_service.invalidate_agent(agent_id)
     return {"message": "Tool added"}
 
 @router.delete("/{agent_id}/tools/{tool_id}")
@@ -198,7 +221,7 @@ def remove_tool_from_agent(
     agent_id: str,
     tool_id: str,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
     agent = db.query(models.Agent).filter(models.Agent.id == agent_id, models.Agent.owner_id == current_user.id).first()
     tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
@@ -209,4 +232,5 @@ def remove_tool_from_agent(
     if tool in agent.tools:
         agent.tools.remove(tool)
         db.commit()
+        execution.execution_service.invalidate_agent(agent_id)
     return {"message": "Tool removed"}
@@ -0,0 +1,126 @@
+from contextlib import aclosing
+from typing import List, Optional
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from .. import database, models, schemas, auth, pagination
+from ..jobs import FINISHED_STATUSES, job_payload, job_runner
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+def _session_factory(db: AsyncSession) -> async_sessionmaker:
+    # Jobs outlive the request, so they open their own sessions on the same engine
+    return async_sessionmaker(db.bind, autoflush=False, expire_on_commit=False)
+
+async def _get_owned_job(db: AsyncSession, job_id: str, user_id: int) -> models.AgentJob:
+    job = (await db.execute(select(models.AgentJob).where(
+        models.AgentJob.id == job_id,
+        models.AgentJob.owner_id == user_id
+    ))).scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/chat", response_model=schemas.JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_chat_job(
+    request: schemas.ChatJobCreate,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """
+    Run a chat turn in the background. Returns the queued job at once; poll
+    GET /jobs/{id} or follow GET /jobs/{id}/events for progress and the result.
+    """
+    session = (await db.execute(select(models.ChatSession.id).where(
+        models.ChatSession.id == request.session_id,
+        models.ChatSession.user_id == current_user.id
+    ))).scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    job = models.AgentJob(owner_id=current_user.id, kind="chat", session_id=request.session_id, prompt=request.prompt, status="queued")
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    job_runner.submit(job.id, _session_factory(db))
+    return job
+
+@router.get("/", response_model=List[schemas.JobResponse])
+def list_jobs(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """The user's jobs, newest first; follow X-Next-Cursor for older ones."""
+    query = db.query(models.AgentJob).filter(models.AgentJob.owner_id == current_user.id)
+    jobs, next_cursor = pagination.keyset_page(query, (models.AgentJob.created_at, models.AgentJob.id), cursor, limit)
+    pagination.set_next_cursor(response, next_cursor)
+    return jobs
+
+@router.get("/{job_id}", response_model=schemas.JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    return await _get_owned_job(db, job_id, current_user.id)
+
+@router.post("/{job_id}/cancel", response_model=schemas.JobResponse)
+async def cancel_job(
+    job_id: str,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    job = await _get_owned_job(db, job_id, current_user.id)
+    if not await job_runner.cancel(job.id, _session_factory(db)):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    await db.refresh(job)
+    return job
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """
+    Server-Sent Events for a job: `status`, the agent's `token`, `tool_call_start` and
+    `tool_call_end` events, then `done` with the finished job. Events published before
+    the client connected are replayed first.
+    """
+    job = await _get_owned_job(db, job_id, current_user.id)
+    session_factory = _session_factory(db)
+    # Streams can stay open for minutes: don't hold a pooled connection for the whole of it
+    await db.close()
+
+    async def event_stream():
+        async with aclosing(job_runner.events.subscribe(job.id)) as events:
+            async for event in events:
+                if event is None:
+                    # Caught up or idle: the job may have finished where we can't hear it
+                    async with session_factory() as check_db:
+                        current = await check_db.get(models.AgentJob, job.id)
+                    if current is not None and current.status in FINISHED_STATUSES:
+                        yield _sse("done", job_payload(current))
+                        return
+                    continue
+                yield _sse(event["event"], event["data"])
+                if event["event"] == "done":
+                    return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
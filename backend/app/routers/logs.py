@@ -1,43 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from .. import database, models, schemas, auth
+from .. import database, models, schemas, auth, pagination, flight_recorder
 
 router = APIRouter(
     prefix="/logs",
     tags=["Logs"]
 )
 
-@router.get("/", response_model=List[schemas.AgentExecutionLogResponse])
-def read_logs(
-    skip: int = 0, 
-    limit: int = 50, 
-    agent_id: Optional[str] = None,
-    simulation_id: Optional[str] = None,
-    session_id: Optional[str] = None,
-    db: Session = Depends(database.get_db), 
-    current_user: models.User = Depends(auth.get_current_user)
+def _owned_logs(
+    query,
+    current_user: auth.Principal,
+    agent_id: Optional[str],
+    simulation_id: Optional[str],
+    session_id: Optional[str],
 ):
-    query = db.query(models.AgentExecutionLog)
-    
     # Filter by ownership (via agent)
-    query = query.join(models.Agent).filter(models.Agent.owner_id == current_user.id)
-    
+    query = query.join(models.Agent, models.AgentExecutionLog.agent_id == models.Agent.id).filter(
+        models.Agent.owner_id == current_user.id
+    )
+
     if agent_id:
         query = query.filter(models.AgentExecutionLog.agent_id == agent_id)
     if simulation_id:
         query = query.filter(models.AgentExecutionLog.simulation_id == simulation_id)
     if session_id:
         query = query.filter(models.AgentExecutionLog.session_id == session_id)
-        
-    logs = query.order_by(models.AgentExecutionLog.created_at.desc()).offset(skip).limit(limit).all()
+    return query
+
+@router.get("/", response_model=List[schemas.AgentExecutionLogResponse])
+def read_logs(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    skip: int = Query(0, ge=0, deprecated=True),
+    agent_id: Optional[str] = None,
+    simulation_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    db: Session = Depends(database.get_db), 
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """
+    Newest logs first. Pass the X-Next-Cursor header of a page as `cursor` to get the next one.
+    `skip` is kept for old clients and ignored when a cursor is given.
+    """
+    query = _owned_logs(db.query(models.AgentExecutionLog), current_user, agent_id, simulation_id, session_id)
+
+    logs, next_cursor = pagination.keyset_page(
+        query,
+        (models.AgentExecutionLog.created_at, models.AgentExecutionLog.id),
+        cursor,
+        limit,
+        offset=0 if cursor else skip,
+    )
+    pagination.set_next_cursor(response, next_cursor)
     return logs
 
+@router.get("/summary", response_model=List[schemas.AgentExecutionLogSummary])
+def read_log_summaries(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    agent_id: Optional[str] = None,
+    simulation_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """
+    Same listing as GET /logs/ but with scalar columns and short previews only.
+    prompt_context and raw_response are never loaded; fetch GET /logs/{log_id} for those.
+    """
+    log = models.AgentExecutionLog
+    preview_chars = flight_recorder.LOG_PREVIEW_CHARS
+    query = db.query(
+        log.id,
+        log.agent_id,
+        log.session_id,
+        log.simulation_id,
+        log.execution_time_ms,
+        log.created_at,
+        log.tool_event_count,
+        # Rows written before the denormalized columns existed fall back to SQL-side length/substr
+        func.coalesce(log.response_length, func.length(log.raw_response)).label("response_length"),
+        log.user_prompt_preview,
+        func.coalesce(log.response_preview, func.substr(log.raw_response, 1, preview_chars)).label("response_preview"),
+        func.substr(log.thought_process, 1, preview_chars).label("thought_preview"),
+    ).select_from(log)
+    query = _owned_logs(query, current_user, agent_id, simulation_id, session_id)
+
+    rows, next_cursor = pagination.keyset_page(query, (log.created_at, log.id), cursor, limit)
+    pagination.set_next_cursor(response, next_cursor)
+    return rows
+
 @router.get("/{log_id}", response_model=schemas.AgentExecutionLogResponse)
 def read_log(
     log_id: str, 
     db: Session = Depends(database.get_db), 
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
     log = db.query(models.AgentExecutionLog).join(models.Agent).filter(
         models.AgentExecutionLog.id == log_id,
@@ -1,19 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+import asyncio
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.concurrency import run_in_threadpool
-from sqlalchemy.orm import Session, subqueryload
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload, sessionmaker, subqueryload
 from typing import List, Tuple, Optional
-from .. import database, models, schemas, auth, execution
+from .. import database, models, schemas, auth, execution, flight_recorder, context_window, pagination
+from ..simulation_runner import MAX_AUTORUN_TURNS, new_runner_id, runner_is_live, simulation_runner
+from ..simulation_locks import simulation_locks
+from ..scheduler import Priority, scheduler
 
 router = APIRouter(
     prefix="/simulations",
     tags=["Simulations"]
 )
 
+# Max agents of one broadcast round whose model calls are in flight at once
+ROUND_CONCURRENCY = int(os.getenv("SIMULATION_ROUND_CONCURRENCY", "10"))
+
 @router.post("/", response_model=schemas.SimulationResponse)
 def create_simulation(
     sim_data: schemas.SimulationCreate, 
     db: Session = Depends(database.get_db), 
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
     # Verify agents exist and belong to user
     agents = db.query(models.Agent).filter(
@@ -24,10 +35,13 @@ def create_simulation(
     if len(agents) != len(sim_data.agent_ids):
         raise HTTPException(status_code=400, detail="One or more agents not found")
 
+    topic = f"Topic: {sim_data.initial_topic}"
     new_sim = models.Simulation(
         name=sim_data.name,
         agent_ids=sim_data.agent_ids,
-        owner_id=current_user.id
+        owner_id=current_user.id,
+        message_count=1,
+        last_message_preview=flight_recorder.preview_text(topic)
     )
     db.add(new_sim)
     db.commit()
@@ -38,7 +52,7 @@ def create_simulation(
         simulation_id=new_sim.id,
         sender_id="system",
         sender_name="System",
-        content=f"Topic: {sim_data.initial_topic}"
+        content=topic
     )
     db.add(initial_msg)
     db.commit()
@@ -46,32 +60,130 @@ def create_simulation(
     
     return new_sim
 
-@router.get("/", response_model=List[schemas.SimulationResponse])
+@router.get("/", response_model=List[schemas.SimulationResponse], deprecated=True)
 def get_simulations(
     db: Session = Depends(database.get_db), 
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
+    """Every simulation with every message. Use /simulations/summaries and /simulations/{sim_id}/messages instead."""
     # Eagerly load messages to avoid N+1 problem
     sims = db.query(models.Simulation).options(subqueryload(models.Simulation.messages)).filter(
         models.Simulation.owner_id == current_user.id
     ).order_by(models.Simulation.updated_at.desc()).all()
     return sims
 
+@router.get("/summaries", response_model=List[schemas.SimulationSummary])
+def get_simulation_summaries(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """Most recently active simulations first, without their messages."""
+    query = db.query(models.Simulation).filter(models.Simulation.owner_id == current_user.id)
+    sims, next_cursor = pagination.keyset_page(
+        query, (models.Simulation.last_message_at, models.Simulation.id), cursor, limit
+    )
+
+    # One lookup for the participants of the whole page
+    agent_ids = {agent_id for sim in sims for agent_id in (sim.agent_ids or [])}
+    names = dict(db.query(models.Agent.id, models.Agent.name).filter(models.Agent.id.in_(agent_ids)).all()) if agent_ids else {}
+
+    pagination.set_next_cursor(response, next_cursor)
+    return [
+        schemas.SimulationSummary(
+            id=sim.id,
+            name=sim.name,
+            status=sim.status,
+            agent_ids=sim.agent_ids or [],
+            participants=[
+                schemas.SimulationParticipant(id=agent_id, name=names.get(agent_id, "Unknown agent"))
+                for agent_id in (sim.agent_ids or [])
+            ],
+            message_count=sim.message_count or 0,
+            last_message_preview=sim.last_message_preview,
+            last_message_at=sim.last_message_at,
+            created_at=sim.created_at,
+        )
+        for sim in sims
+    ]
+
+@router.get("/scheduler/stats")
+def get_scheduler_stats(current_user: auth.Principal = Depends(auth.get_current_user)):
+    """Queue depth, in-flight calls and wait times of the model-call scheduler (chat and simulations)."""
+    return scheduler.stats()
+
+def _message_page(db: Session, sim_id: str, cursor: Optional[str], limit: int) -> Tuple[List[models.SimulationMessage], Optional[str]]:
+    # Pages walk backwards from the newest message; each page is returned oldest-first
+    query = db.query(models.SimulationMessage).filter(models.SimulationMessage.simulation_id == sim_id)
+    messages, next_cursor = pagination.keyset_page(
+        query, (models.SimulationMessage.created_at, models.SimulationMessage.id), cursor, limit
+    )
+    return list(reversed(messages)), next_cursor
+
 @router.get("/{sim_id}", response_model=schemas.SimulationResponse)
 def get_simulation(
     sim_id: str, 
+    response: Response,
+    message_limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(database.get_db), 
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    sim = db.query(models.Simulation).options(subqueryload(models.Simulation.messages)).filter(
-        models.Simulation.id == sim_id,
-        models.Simulation.owner_id == current_user.id
-    ).first()
-    if not sim:
-        raise HTTPException(status_code=404, detail="Simulation not found")
-    return sim
+    """
+    The simulation with its latest `message_limit` messages. When there are older ones,
+    X-Next-Cursor holds the cursor for GET /simulations/{sim_id}/messages.
+    """
+    sim = _get_owned_simulation(db, sim_id, current_user.id)
+    messages, next_cursor = _message_page(db, sim.id, None, message_limit)
+    pagination.set_next_cursor(response, next_cursor)
+    return schemas.SimulationResponse(
+        id=sim.id,
+        name=sim.name,
+        agent_ids=sim.agent_ids,
+        status=sim.status,
+        created_at=sim.created_at,
+        messages=[schemas.SimulationMessageResponse.model_validate(m) for m in messages],
+    )
+
+@router.get("/{sim_id}/messages", response_model=List[schemas.SimulationMessageResponse])
+def get_simulation_messages(
+    sim_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """A page of messages, newest page first; follow X-Next-Cursor for older ones."""
+    sim = _get_owned_simulation(db, sim_id, current_user.id)
+    messages, next_cursor = _message_page(db, sim.id, cursor, limit)
+    pagination.set_next_cursor(response, next_cursor)
+    return messages
 
-def get_simulation_context(db: Session, sim_id: str, user_id: int) -> Tuple[Optional[models.Simulation], Optional[models.Agent], List[models.SimulationMessage]]:
+def _load_simulation_window(db: Session, sim_id: str) -> Tuple[Optional[context_window.WindowMessage], List[context_window.WindowMessage]]:
+    messages = db.query(models.SimulationMessage).filter(models.SimulationMessage.simulation_id == sim_id)
+    first = messages.order_by(models.SimulationMessage.created_at.asc(), models.SimulationMessage.id.asc()).first()
+    # Newest first on the (simulation_id, created_at, id) index, then back to chronological order
+    latest = messages.order_by(
+        models.SimulationMessage.created_at.desc(), models.SimulationMessage.id.desc()
+    ).limit(context_window.SIMULATION_CONTEXT_MESSAGES).all()
+    recent = [context_window.WindowMessage.from_model(m) for m in reversed(latest)]
+    return (context_window.WindowMessage.from_model(first) if first else None), recent
+
+def _simulation_window(db: Session, sim_id: str, latest_id: Optional[int]) -> List[context_window.WindowMessage]:
+    window = context_window.simulation_windows.get(sim_id, latest_id)
+    if window is None:
+        window = _load_simulation_window(db, sim_id)
+        context_window.simulation_windows.put(sim_id, *window)
+    pinned, recent = window
+
+    recent = context_window.trim_to_budget(recent, context_window.SIMULATION_CONTEXT_MAX_TOKENS)
+    if pinned and (not recent or recent[0].id != pinned.id):
+        recent = [pinned] + recent
+    return recent
+
+def get_simulation_context(db: Session, sim_id: str, user_id: int) -> Tuple[Optional[models.Simulation], Optional[models.Agent], List[context_window.WindowMessage]]:
     sim = db.query(models.Simulation).filter(
         models.Simulation.id == sim_id,
         models.Simulation.owner_id == user_id
@@ -81,10 +193,10 @@ def get_simulation_context(db: Session, sim_id: str, user_id: int) -> Tuple[Opti
         return None, None, []
 
     # Simple Round-Robin Logic
-    # 1. Get last message to see who spoke
-    last_msg = db.query(models.SimulationMessage).filter(
+    # 1. Get last message to see who spoke; its id also tells us whether the cached window is current
+    last_msg = db.query(models.SimulationMessage.id, models.SimulationMessage.sender_id).filter(
         models.SimulationMessage.simulation_id == sim_id
-    ).order_by(models.SimulationMessage.created_at.desc()).first()
+    ).order_by(models.SimulationMessage.created_at.desc(), models.SimulationMessage.id.desc()).first()
 
     # 2. Determine next agent
     next_agent_id = sim.agent_ids[0]
@@ -95,17 +207,27 @@ def get_simulation_context(db: Session, sim_id: str, user_id: int) -> Tuple[Opti
         except ValueError:
             pass # Default to first agent
             
-    agent = db.query(models.Agent).filter(models.Agent.id == next_agent_id).first()
+    # Tools are loaded here, in the threadpool, so compiling the agent doesn't lazy-load them on the event loop
+    agent = db.query(models.Agent).options(selectinload(models.Agent.tools)).filter(models.Agent.id == next_agent_id).first()
     
-    # 3. Construct context from previous messages
-    # We'll take the last 10 messages for context
-    recent_messages = db.query(models.SimulationMessage).filter(
-        models.SimulationMessage.simulation_id == sim_id
-    ).order_by(models.SimulationMessage.created_at.asc()).limit(10).all()
-    
-    return sim, agent, recent_messages
+    # 3. Construct context: the opening topic plus the latest messages
+    return sim, agent, _simulation_window(db, sim_id, last_msg.id if last_msg else None)
+
+def _add_simulation_messages(db: Session, sim_id: str, messages: List[models.SimulationMessage]):
+    # Added in order, so ids (the created_at tie-breaker) follow the list order
+    for message in messages:
+        db.add(message)
+    # Counter and preview for the summary listing, updated in the same transaction
+    db.query(models.Simulation).filter(models.Simulation.id == sim_id).update({
+        models.Simulation.message_count: func.coalesce(models.Simulation.message_count, 0) + len(messages),
+        models.Simulation.last_message_preview: flight_recorder.preview_text(messages[-1].content),
+        models.Simulation.last_message_at: func.now(),
+    }, synchronize_session=False)
 
-def save_simulation_message(db: Session, sim_id: str, agent_id: str, agent_name: str, content: str, tool_calls: Optional[List[dict]] = None) -> models.SimulationMessage:
+def save_simulation_message(db: Session, sim_id: str, agent_id: str, agent_name: str, content: str, tool_calls: Optional[List[dict]] = None, log_data: Optional[dict] = None) -> models.SimulationMessage:
+    if log_data is not None:
+        # Save Execution Log (and its tool invocations) in the same transaction
+        flight_recorder.record_execution(db, agent_id, log_data, simulation_id=sim_id)
     new_msg = models.SimulationMessage(
         simulation_id=sim_id,
         sender_id=agent_id,
@@ -113,67 +235,281 @@ def save_simulation_message(db: Session, sim_id: str, agent_id: str, agent_name:
         content=content,
         tool_calls=tool_calls
     )
-    db.add(new_msg)
+    _add_simulation_messages(db, sim_id, [new_msg])
     db.commit()
     db.refresh(new_msg)
+    context_window.simulation_windows.append(sim_id, context_window.WindowMessage.from_model(new_msg))
     return new_msg
 
+def _turn_prompt(recent_messages: List[context_window.WindowMessage], agent: models.Agent) -> str:
+    # Format history for the agent
+    history_prompt = "Conversation History:\n" + "".join(
+        f"{msg.sender_name}: {msg.content}\n" for msg in recent_messages
+    )
+    return f"{history_prompt}\nResponse as {agent.name}:"
+
+async def _run_to_completion(func, *args):
+    """run_in_threadpool for work on a turn's session: a cancel still waits for the thread to finish."""
+    work = asyncio.ensure_future(run_in_threadpool(func, *args))
+    try:
+        return await asyncio.shield(work)
+    except asyncio.CancelledError:
+        # The thread can't be interrupted; closing its session or releasing the turn lock
+        # while it still runs would race it
+        await asyncio.wait({work})
+        raise
+
+@asynccontextmanager
+async def _turn_lock(db: Session, sim_id: str):
+    # One turn in flight per simulation; a concurrent caller gets 409 instead of a duplicate model call
+    if not await _run_to_completion(simulation_locks.try_acquire, db, sim_id):
+        raise HTTPException(status_code=409, detail="Another turn is already in progress for this simulation")
+    try:
+        yield
+    finally:
+        simulation_locks.release(db, sim_id)
+
+async def run_simulation_turn(db: Session, sim_id: str, user_id: int, autorun: bool = False) -> models.SimulationMessage:
+    """Advance a simulation by one agent turn; shared by manual stepping and the autorun runner."""
+    async with _turn_lock(db, sim_id):
+        sim, agent, recent_messages = await _run_to_completion(get_simulation_context, db, sim_id, user_id)
+
+        if not sim:
+            raise HTTPException(status_code=404, detail="Simulation not found")
+
+        if not autorun and sim.status == "running":
+            raise HTTPException(status_code=409, detail="Simulation is running autonomously; pause or cancel it first")
+
+        if not agent:
+             # Should not happen if logic is correct but safe handling
+             raise HTTPException(status_code=500, detail="Could not determine next agent")
+
+        # Execution
+        # We treat the history as the user prompt context
+        async with scheduler.slot(owner=user_id, flow=sim.id, priority=Priority.BACKGROUND):
+            execution_result = await execution.execution_service.execute_agent(
+                agent, 
+                user_prompt=_turn_prompt(recent_messages, agent),
+                history=[] # We provide context in the prompt itself for multi-agent simulation for simplicity
+            )
+    
+        response_text = execution_result["response_text"]
+        log_data = execution_result["log_data"]
+        tool_calls = log_data.get("tool_events", [])
+
+        # 4. Save response and its execution log
+        return await _run_to_completion(
+            save_simulation_message,
+            db,
+            sim.id,
+            agent.id,
+            agent.name,
+            response_text,
+            tool_calls,
+            log_data
+        )
+
 @router.post("/{sim_id}/step", response_model=schemas.SimulationMessageResponse)
 async def step_simulation(
     sim_id: str,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    sim, agent, recent_messages = await run_in_threadpool(get_simulation_context, db, sim_id, current_user.id)
+    return await run_simulation_turn(db, sim_id, current_user.id)
 
+def get_round_context(db: Session, sim_id: str, user_id: int) -> Tuple[Optional[models.Simulation], List[models.Agent], List[context_window.WindowMessage]]:
+    sim = db.query(models.Simulation).filter(
+        models.Simulation.id == sim_id,
+        models.Simulation.owner_id == user_id
+    ).first()
     if not sim:
-        raise HTTPException(status_code=404, detail="Simulation not found")
+        return None, [], []
 
-    if not agent:
-         # Should not happen if logic is correct but safe handling
-         raise HTTPException(status_code=500, detail="Could not determine next agent")
+    latest_id = db.query(models.SimulationMessage.id).filter(
+        models.SimulationMessage.simulation_id == sim_id
+    ).order_by(models.SimulationMessage.created_at.desc(), models.SimulationMessage.id.desc()).limit(1).scalar()
 
-    # Format history for the agent
-    history_prompt = "Conversation History:\n" + "".join(
-        f"{msg.sender_name}: {msg.content}\n" for msg in recent_messages
-    )
-    
-    # Execution
-    # We treat the history as the user prompt context
-    execution_result = await execution.execution_service.execute_agent(
-        agent, 
-        user_prompt=f"{history_prompt}\nResponse as {agent.name}:",
-        history=[] # We provide context in the prompt itself for multi-agent simulation for simplicity
-    )
-    
-    response_text = execution_result["response_text"]
-    log_data = execution_result["log_data"]
-    tool_calls = log_data.get("tool_events", [])
+    # Participants in the simulation's own order, which is also the order replies are stored in
+    # With their tools, so nothing is lazy-loaded once the agents run on the event loop
+    by_id = {a.id: a for a in db.query(models.Agent).options(selectinload(models.Agent.tools)).filter(models.Agent.id.in_(sim.agent_ids)).all()}
+    agents = [by_id[agent_id] for agent_id in sim.agent_ids if agent_id in by_id]
+    return sim, agents, _simulation_window(db, sim_id, latest_id)
+
+def save_round_messages(db: Session, sim_id: str, replies: List[Tuple[models.Agent, dict]]) -> List[models.SimulationMessage]:
+    messages = []
+    for agent, execution_result in replies:
+        log_data = execution_result["log_data"]
+        flight_recorder.record_execution(db, agent.id, log_data, simulation_id=sim_id)
+        messages.append(models.SimulationMessage(
+            simulation_id=sim_id,
+            sender_id=agent.id,
+            sender_name=agent.name,
+            content=execution_result["response_text"],
+            tool_calls=log_data.get("tool_events", [])
+        ))
+    _add_simulation_messages(db, sim_id, messages)
+    db.commit()
+    for message in messages:
+        db.refresh(message)
+        context_window.simulation_windows.append(sim_id, context_window.WindowMessage.from_model(message))
+    return messages
+
+@router.post("/{sim_id}/round", response_model=List[schemas.SimulationMessageResponse])
+async def round_simulation(
+    sim_id: str,
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """
+    Broadcast step: every participant answers the same context snapshot concurrently.
+    Replies are stored together, in the simulation's agent order, in one transaction.
+    """
+    async with _turn_lock(db, sim_id):
+        sim, agents, recent_messages = await _run_to_completion(get_round_context, db, sim_id, current_user.id)
+        if not sim:
+            raise HTTPException(status_code=404, detail="Simulation not found")
+        if sim.status == "running":
+            raise HTTPException(status_code=409, detail="Simulation is running autonomously; pause or cancel it first")
+        if not agents:
+            raise HTTPException(status_code=400, detail="Simulation has no available agents")
 
-    # Merge tool_events into prompt_context for persistence
-    log_context = log_data["prompt_context"]
-    log_context["tool_events"] = tool_calls
+        semaphore = asyncio.Semaphore(max(1, ROUND_CONCURRENCY))
 
-    # Save Execution Log
-    new_log = models.AgentExecutionLog(
-        agent_id=agent.id,
+        async def respond(agent: models.Agent) -> dict:
+            async with semaphore, scheduler.slot(owner=current_user.id, flow=sim.id, priority=Priority.BACKGROUND):
+                return await execution.execution_service.execute_agent(
+                    agent,
+                    user_prompt=_turn_prompt(recent_messages, agent),
+                    history=[]
+                )
+
+        results = await asyncio.gather(*(respond(agent) for agent in agents))
+        return await _run_to_completion(save_round_messages, db, sim.id, list(zip(agents, results)))
+
+# --- Autorun ---
+
+def _autorun_progress(sim: models.Simulation) -> schemas.SimulationAutorunProgress:
+    return schemas.SimulationAutorunProgress(
         simulation_id=sim.id,
-        prompt_context=log_context,
-        raw_response=log_data["raw_response"],
-        thought_process=log_data["thought_process"],
-        execution_time_ms=log_data["execution_time_ms"]
+        status=sim.status,
+        active=simulation_runner.is_active(sim.id) or runner_is_live(sim),
+        target_turns=sim.autorun_target_turns,
+        completed_turns=sim.autorun_completed_turns or 0,
+        stop_phrase=sim.autorun_stop_phrase,
+        stop_reason=sim.autorun_stop_reason,
     )
-    db.add(new_log)
-    
-    # 4. Save response
-    new_msg = await run_in_threadpool(
-        save_simulation_message,
-        db,
-        sim.id,
-        agent.id,
-        agent.name,
-        response_text,
-        tool_calls
-    )
-    
-    return new_msg
+
+def _get_owned_simulation(db: Session, sim_id: str, user_id: int) -> models.Simulation:
+    sim = db.query(models.Simulation).filter(
+        models.Simulation.id == sim_id,
+        models.Simulation.owner_id == user_id
+    ).first()
+    if not sim:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    return sim
+
+def _start_runner(db: Session, sim: models.Simulation, runner_id: str, user_id: int):
+    # The runner outlives this request, so it opens its own sessions on the same engine
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    simulation_runner.start(sim.id, runner_id, user_id, session_factory, lambda s, sid, uid: run_simulation_turn(s, sid, uid, autorun=True))
+
+@router.post("/{sim_id}/autorun", response_model=schemas.SimulationAutorunProgress)
+async def start_autorun(
+    sim_id: str,
+    request: schemas.SimulationAutorunRequest,
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """Run up to `turns` turns in the background, stopping early when a reply contains `stop_phrase`."""
+    if request.turns > MAX_AUTORUN_TURNS:
+        raise HTTPException(status_code=400, detail=f"turns must be at most {MAX_AUTORUN_TURNS}")
+
+    sim = await run_in_threadpool(_get_owned_simulation, db, sim_id, current_user.id)
+    if sim.status in ("running", "paused") or simulation_runner.is_active(sim.id):
+        raise HTTPException(status_code=409, detail="Simulation already has an autorun in progress")
+
+    # A runner of an earlier run that is still winding down sees the new owner and exits
+    runner_id = new_runner_id()
+    sim.status = "running"
+    sim.autorun_runner_id = runner_id
+    sim.autorun_heartbeat_at = datetime.now(timezone.utc)
+    sim.autorun_target_turns = request.turns
+    sim.autorun_completed_turns = 0
+    sim.autorun_stop_phrase = request.stop_phrase
+    sim.autorun_stop_reason = None
+    await run_in_threadpool(db.commit)
+
+    _start_runner(db, sim, runner_id, current_user.id)
+    return _autorun_progress(sim)
+
+@router.get("/{sim_id}/autorun", response_model=schemas.SimulationAutorunProgress)
+def get_autorun_progress(
+    sim_id: str,
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    return _autorun_progress(_get_owned_simulation(db, sim_id, current_user.id))
+
+@router.post("/{sim_id}/pause", response_model=schemas.SimulationAutorunProgress)
+def pause_autorun(
+    sim_id: str,
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    # The runner finishes the turn in flight and then waits
+    sim = _get_owned_simulation(db, sim_id, current_user.id)
+    if sim.status != "running":
+        raise HTTPException(status_code=409, detail="Simulation is not running")
+    sim.status = "paused"
+    db.commit()
+    return _autorun_progress(sim)
+
+def _claim_paused_run(db: Session, sim_id: str, user_id: int) -> models.Simulation:
+    sim = _get_owned_simulation(db, sim_id, user_id)
+    # Conditional, so two concurrent resumes can't both start a runner
+    claimed = db.query(models.Simulation).filter(
+        models.Simulation.id == sim.id,
+        models.Simulation.status == "paused"
+    ).update({"status": "running", "autorun_stop_reason": None}, synchronize_session=False)
+    db.commit()
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Simulation is not paused")
+    db.refresh(sim)
+    return sim
+
+@router.post("/{sim_id}/resume", response_model=schemas.SimulationAutorunProgress)
+async def resume_autorun(
+    sim_id: str,
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    sim = await run_in_threadpool(_claim_paused_run, db, sim_id, current_user.id)
+
+    runner_id = await run_in_threadpool(simulation_runner.claim, db, sim.id)
+    if runner_id:
+        # Paused by a restart or an error: no runner attached in any process
+        _start_runner(db, sim, runner_id, current_user.id)
+    else:
+        # The live runner picks the run back up; at once if it is in this process
+        simulation_runner.wake(sim.id)
+    await run_in_threadpool(db.refresh, sim)
+    return _autorun_progress(sim)
+
+@router.post("/{sim_id}/cancel", response_model=schemas.SimulationAutorunProgress)
+async def cancel_autorun(
+    sim_id: str,
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    sim = await run_in_threadpool(_get_owned_simulation, db, sim_id, current_user.id)
+    if sim.status not in ("running", "paused"):
+        raise HTTPException(status_code=409, detail="Simulation has no autorun in progress")
+    sim.status = "active"
+    sim.autorun_stop_reason = "cancelled"
+    await run_in_threadpool(db.commit)
+
+    # A turn still waiting on the model is dropped; one whose reply is already being
+    # saved is let finish (the thread can't be interrupted), so it still lands as a message
+    await simulation_runner.cancel(sim.id)
+    await run_in_threadpool(db.refresh, sim)
+    return _autorun_progress(sim)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
-import re
-from .. import database, models, schemas, auth, tools_registry
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from .. import database, models, schemas, auth, tools_registry, execution, pagination
 
 router = APIRouter(
     prefix="/tools",
@@ -10,17 +11,22 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[schemas.ToolResponse])
-def read_tools(db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def read_tools(db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     return db.query(models.Tool).all()
 
+@router.get("/pool/stats")
+def get_pool_stats(current_user: auth.Principal = Depends(auth.get_current_user)):
+    """Connection pool usage of the shared HTTP client used by API tools."""
+    return tools_registry.tool_service.pool_stats()
+
 @router.post("/{tool_id}/test")
 async def test_tool(
     tool_id: str, 
     arguments: dict,
-    db: Session = Depends(database.get_db), 
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(database.get_async_db), 
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
-    tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
+    tool = (await db.execute(select(models.Tool).where(models.Tool.id == tool_id))).scalar_one_or_none()
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
         
@@ -28,7 +34,7 @@ async def test_tool(
     return {"result": result, "metadata": metadata}
 
 @router.post("/", response_model=schemas.ToolResponse)
-def create_tool(tool: schemas.ToolCreate, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def create_tool(tool: schemas.ToolCreate, db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     # Simple check for duplicates
     existing = db.query(models.Tool).filter(models.Tool.name == tool.name).first()
     if existing:
@@ -46,7 +52,7 @@ def create_tool(tool: schemas.ToolCreate, db: Session = Depends(database.get_db)
     return new_tool
 
 @router.put("/{tool_id}", response_model=schemas.ToolResponse)
-def update_tool(tool_id: str, tool_update: schemas.ToolCreate, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def update_tool(tool_id: str, tool_update: schemas.ToolCreate, db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     db_tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
     if not db_tool:
         raise HTTPException(status_code=404, detail="Tool not found")
@@ -64,22 +70,25 @@ def update_tool(tool_id: str, tool_update: schemas.ToolCreate, db: Session = Dep
 
     for key, value in tool_data.items():
         setattr(db_tool, key, value)
+    db_tool.version = (db_tool.version or 1) + 1
 
     db.commit()
+    execution.execution_service.invalidate_tool(tool_id)
     db.refresh(db_tool)
     return db_tool
 
 @router.delete("/{tool_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_tool(tool_id: str, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def delete_tool(tool_id: str, db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
     db.delete(tool)
     db.commit()
+    execution.execution_service.invalidate_tool(tool_id)
     return None
 
 @router.post("/seed")
-def seed_tools(db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def seed_tools(db: Session = Depends(database.get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     # Add initial built-in tools
     builtin_tools = [
         {
@@ -123,35 +132,37 @@ def seed_tools(db: Session = Depends(database.get_db), current_user: models.User
     return {"message": "Built-in tools seeded"}
 
 @router.get("/{tool_id}/logs", response_model=List[schemas.ToolExecutionLog])
-def get_tool_logs(tool_id: str, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def get_tool_logs(
+    tool_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    """The tool's calls, newest first; follow X-Next-Cursor for older ones."""
     tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
-        
-    # Query last 200 logs to scan for tool usage
-    # Optimization: In prod, use JSON containment query or separate table
-    logs = db.query(models.AgentExecutionLog).order_by(models.AgentExecutionLog.created_at.desc()).limit(200).all()
-    
-    # Sanitize tool name to match what is sent to/from Gemini
-    safe_name = re.sub(r'[^a-zA-Z0-9_]', '_', tool.name)
-    
-    tool_logs = []
-    for log in logs:
-        prompt_context = log.prompt_context or {}
-        tool_events = prompt_context.get("tool_events", [])
-        
-        for event in tool_events:
-            # Check both original name (just in case) and safe name
-            if event.get("tool") == tool.name or event.get("tool") == safe_name:
-                metadata = event.get("metadata", {})
-                tool_logs.append({
-                    "tool_name": tool.name,
-                    "agent_id": log.agent_id,
-                    "input_args": event.get("input", {}),
-                    "output_result": str(event.get("output", "")),
-                    "request_url": metadata.get("url") if metadata else None,
-                    "created_at": log.created_at,
-                    "execution_time_ms": log.execution_time_ms
-                })
-    
-    return tool_logs
+
+    # Served by ix_tool_invocations_tool_id_created_at_id
+    query = db.query(models.ToolInvocation).filter(models.ToolInvocation.tool_id == tool_id)
+    invocations, next_cursor = pagination.keyset_page(
+        query, (models.ToolInvocation.created_at, models.ToolInvocation.id), cursor, limit
+    )
+    pagination.set_next_cursor(response, next_cursor)
+
+    return [
+        {
+            "tool_name": inv.tool_name,
+            "agent_id": inv.agent_id,
+            "log_id": inv.log_id,
+            "status": inv.status,
+            "input_args": inv.input_args or {},
+            "output_result": inv.output_result or "",
+            "request_url": inv.request_url,
+            "created_at": inv.created_at,
+            "execution_time_ms": inv.latency_ms or 0
+        }
+        for inv in invocations
+    ]
@@ -0,0 +1,297 @@
+"""
+Fair scheduler for model calls.
+
+Every agent execution (chat turn, simulation step, broadcast round reply) takes a slot
+here before calling the LLM provider:
+- a global cap bounds the calls in flight,
+- interactive work (chat) is always dispatched before background work (simulations),
+- within a priority class, owners share slots by weighted fair queuing (the owner with
+  the lowest virtual time goes next, and each grant advances it by 1/weight), and each
+  owner's flows (simulations, chat sessions) take turns round-robin.
+
+Queueing is always in-process. With SCHEDULER_BACKEND=redis, a granted caller also
+takes a lease in a Redis sorted set, so the cap holds across worker processes.
+"""
+import os
+import time
+import uuid
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Deque, Dict, Hashable, List, Optional
+from fastapi import HTTPException
+from .logger import logger
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+class _Waiter:
+    __slots__ = ("future", "owner", "flow", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, owner: Hashable, flow: Hashable):
+        self.future = future
+        self.owner = owner
+        self.flow = flow
+        self.enqueued_at = time.monotonic()
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class RedisSlotBackend:
+    """Global in-flight cap shared by all workers: a sorted set of leases scored by expiry."""
+    _ACQUIRE = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+        redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, limit: int, key: str = "agentic:scheduler:slots", lease_seconds: float = 120.0, poll_interval: float = 0.05):
+        import redis.asyncio as redis_asyncio
+        self.client = redis_asyncio.from_url(url)
+        self.limit = limit
+        self.key = key
+        # A lease outlives a crashed worker by at most this long; live holders keep renewing it
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._script = self.client.register_script(self._ACQUIRE)
+        self._renewals: Dict[str, asyncio.Task] = {}
+
+    async def acquire(self) -> str:
+        token = uuid.uuid4().hex
+        while True:
+            now = time.time()
+            if await self._script(keys=[self.key], args=[now, self.limit, now + self.lease_seconds, token]):
+                self._renewals[token] = asyncio.create_task(self._renew(token))
+                return token
+            await asyncio.sleep(self.poll_interval)
+
+    async def _renew(self, token: str):
+        # Model calls can outlast the lease; without renewal other workers would see a free slot
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                # XX: only extend a lease we still hold, never recreate an expired one
+                await self.client.zadd(self.key, {token: time.time() + self.lease_seconds}, xx=True)
+            except Exception as e:
+                logger.warning("Scheduler lease renewal failed", extra={"extra_fields": {"error": str(e)}})
+
+    async def release(self, token: str):
+        renewal = self._renewals.pop(token, None)
+        if renewal is not None:
+            renewal.cancel()
+            await asyncio.gather(renewal, return_exceptions=True)
+        await self.client.zrem(self.key, token)
+
+    async def close(self):
+        await self.client.aclose()
+
+class FairScheduler:
+    def __init__(
+        self,
+        max_in_flight: int,
+        weights: Optional[Dict[Hashable, float]] = None,
+        max_wait_seconds: Optional[float] = None,
+        backend: Optional[RedisSlotBackend] = None,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.weights = weights or {}
+        self.max_wait_seconds = max_wait_seconds
+        self.backend = backend
+
+        self._in_flight = 0
+        # priority -> owner -> flow -> FIFO of waiters
+        self._queues: Dict[Priority, Dict[Hashable, "OrderedDict[Hashable, Deque[_Waiter]]"]] = {p: {} for p in Priority}
+        self._depth = {p: 0 for p in Priority}
+        self._vtime: Dict[Hashable, float] = {}
+        self._clock = 0.0
+
+        self.granted_total = 0
+        self.timeouts_total = 0
+        self._wait_ms: Deque[float] = deque(maxlen=1000)
+
+    # --- Slots ---
+
+    @asynccontextmanager
+    async def slot(self, owner: Hashable, flow: Hashable = None, priority: Priority = Priority.BACKGROUND):
+        """Hold one model-call slot for the duration of the block."""
+        await self._acquire(owner, flow, priority)
+        try:
+            token = await self._acquire_global() if self.backend else None
+            try:
+                yield
+            finally:
+                if token:
+                    await self.backend.release(token)
+        finally:
+            self._release()
+
+    async def _acquire(self, owner: Hashable, flow: Hashable, priority: Priority):
+        if self._in_flight < self.max_in_flight and not any(self._depth.values()):
+            self._grant(owner, 0.0)
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), owner, flow)
+        self._enqueue(priority, waiter)
+        try:
+            if self.max_wait_seconds:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait_seconds)
+            else:
+                await waiter.future
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                return
+            self._remove(priority, waiter)
+            self.timeouts_total += 1
+            raise HTTPException(status_code=503, detail="Model capacity is saturated, try again shortly")
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we were cancelled: hand the slot on
+                self._release()
+            else:
+                self._remove(priority, waiter)
+            raise
+
+    async def _acquire_global(self) -> str:
+        try:
+            if self.max_wait_seconds:
+                return await asyncio.wait_for(self.backend.acquire(), self.max_wait_seconds)
+            return await self.backend.acquire()
+        except asyncio.TimeoutError:
+            self.timeouts_total += 1
+            raise HTTPException(status_code=503, detail="Model capacity is saturated, try again shortly")
+
+    def _grant(self, owner: Hashable, waited_ms: float):
+        self._in_flight += 1
+        self.granted_total += 1
+        self._wait_ms.append(waited_ms)
+        self._clock = max(self._clock, self._vtime.get(owner, self._clock))
+        self._vtime[owner] = self._vtime.get(owner, self._clock) + 1.0 / self.weights.get(owner, 1.0)
+        if len(self._vtime) > 10_000:
+            # Owners at or behind the clock would be reset on their next enqueue anyway
+            queued = {o for q in self._queues.values() for o in q}
+            self._vtime = {o: t for o, t in self._vtime.items() if t > self._clock or o in queued}
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    # --- Queues ---
+
+    def _enqueue(self, priority: Priority, waiter: _Waiter):
+        owners = self._queues[priority]
+        if waiter.owner not in owners:
+            owners[waiter.owner] = OrderedDict()
+            # An owner returning from idle starts at the current clock; idle time earns no credit
+            self._vtime[waiter.owner] = max(self._vtime.get(waiter.owner, 0.0), self._clock)
+        owners[waiter.owner].setdefault(waiter.flow, deque()).append(waiter)
+        self._depth[priority] += 1
+
+    def _remove(self, priority: Priority, waiter: _Waiter):
+        flows = self._queues[priority].get(waiter.owner)
+        if not flows or waiter.flow not in flows:
+            return
+        try:
+            flows[waiter.flow].remove(waiter)
+        except ValueError:
+            return
+        self._depth[priority] -= 1
+        self._prune(priority, waiter.owner, waiter.flow)
+
+    def _prune(self, priority: Priority, owner: Hashable, flow: Hashable):
+        flows = self._queues[priority][owner]
+        if not flows[flow]:
+            del flows[flow]
+        if not flows:
+            del self._queues[priority][owner]
+            if self._vtime.get(owner, 0.0) <= self._clock and not any(owner in q for q in self._queues.values()):
+                self._vtime.pop(owner, None)
+
+    def _next_waiter(self) -> Optional[tuple]:
+        for priority in Priority:
+            owners = self._queues[priority]
+            if not owners:
+                continue
+            owner = min(owners, key=lambda o: self._vtime.get(o, 0.0))
+            flows = owners[owner]
+            flow, waiters = next(iter(flows.items()))
+            waiter = waiters.popleft()
+            # Round-robin between the owner's flows
+            flows.move_to_end(flow)
+            self._depth[priority] -= 1
+            self._prune(priority, owner, flow)
+            return waiter
+        return None
+
+    def _dispatch(self):
+        while self._in_flight < self.max_in_flight:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            if waiter.future.done():
+                continue
+            self._grant(waiter.owner, (time.monotonic() - waiter.enqueued_at) * 1000)
+            waiter.future.set_result(True)
+
+    # --- Metrics ---
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_ms)
+        return {
+            "backend": "redis" if self.backend else "local",
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "queued": {p.name.lower(): self._depth[p] for p in Priority},
+            "queued_owners": {p.name.lower(): len(self._queues[p]) for p in Priority},
+            "granted_total": self.granted_total,
+            "timeouts_total": self.timeouts_total,
+            "wait_ms": {
+                "p50": round(_percentile(waits, 50), 2),
+                "p95": round(_percentile(waits, 95), 2),
+                "max": round(waits[-1], 2) if waits else 0.0,
+                "samples": len(waits),
+            },
+        }
+
+    async def shutdown(self):
+        if self.backend:
+            await self.backend.close()
+
+def _parse_weights(spec: str) -> Dict[Hashable, float]:
+    # "owner_id:weight,..." e.g. "1:2,7:0.5"; owner ids are user ids
+    weights: Dict[Hashable, float] = {}
+    for item in spec.split(","):
+        owner, _, weight = item.partition(":")
+        if owner.strip() and weight.strip():
+            key = int(owner) if owner.strip().isdigit() else owner.strip()
+            weights[key] = float(weight)
+    return weights
+
+def _build_scheduler() -> FairScheduler:
+    max_in_flight = int(os.getenv("SCHEDULER_MAX_IN_FLIGHT", "16"))
+    backend = None
+    if os.getenv("SCHEDULER_BACKEND", "local").lower() == "redis":
+        try:
+            backend = RedisSlotBackend(
+                os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                limit=int(os.getenv("SCHEDULER_GLOBAL_MAX_IN_FLIGHT", str(max_in_flight))),
+                lease_seconds=float(os.getenv("SCHEDULER_REDIS_LEASE_SECONDS", "120")),
+            )
+        except ImportError:
+            logger.warning("SCHEDULER_BACKEND=redis but the 'redis' package is not installed; using the local scheduler only")
+    max_wait = float(os.getenv("SCHEDULER_MAX_WAIT_SECONDS", "120"))
+    return FairScheduler(
+        max_in_flight=max_in_flight,
+        weights=_parse_weights(os.getenv("SCHEDULER_OWNER_WEIGHTS", "")),
+        max_wait_seconds=max_wait or None,
+        backend=backend,
+    )
+
+scheduler = _build_scheduler()
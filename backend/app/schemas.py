@@ -33,6 +33,8 @@ class AgentBase(BaseModel):
     description: Optional[str] = None
     purpose: Optional[str] = None
     personality_config: Optional[dict] = Field(default_factory=dict)
+    # Chat memory policy, e.g. {"history_messages": 20, "history_max_tokens": 4000}
+    knowledge_config: Optional[dict] = Field(default_factory=dict)
     
 class AgentCreate(AgentBase):
     pass
@@ -73,6 +75,24 @@ class ChatResponse(BaseModel):
     response: str
     tool_calls: Optional[List[Dict[str, Any]]] = Field(default_factory=list)
 
+# Background job schemas
+class ChatJobCreate(BaseModel):
+    session_id: str
+    prompt: str
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    session_id: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 class ChatSessionBase(BaseModel):
     name: str
 
@@ -83,6 +103,8 @@ class ChatSessionResponse(ChatSessionBase):
     id: str
     agent_id: str
     created_at: datetime
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -131,6 +153,34 @@ class SimulationResponse(SimulationBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class SimulationParticipant(BaseModel):
+    id: str
+    name: str
+
+class SimulationSummary(BaseModel):
+    id: str
+    name: str
+    status: str
+    agent_ids: List[str]
+    participants: List[SimulationParticipant] = Field(default_factory=list)
+    message_count: int = 0
+    last_message_preview: Optional[str] = None
+    last_message_at: Optional[datetime] = None
+    created_at: datetime
+
+class SimulationAutorunRequest(BaseModel):
+    turns: int = Field(10, ge=1)
+    stop_phrase: Optional[str] = None
+
+class SimulationAutorunProgress(BaseModel):
+    simulation_id: str
+    status: str
+    active: bool # a live runner (in any process) is attached to this simulation
+    target_turns: Optional[int] = None
+    completed_turns: int = 0
+    stop_phrase: Optional[str] = None
+    stop_reason: Optional[str] = None
+
 # Log Schemas
 class AgentExecutionLogBase(BaseModel):
     agent_id: str
@@ -151,9 +201,27 @@ class AgentExecutionLogResponse(AgentExecutionLogBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class AgentExecutionLogSummary(BaseModel):
+    """List-view projection of an execution log; the full record is at GET /logs/{log_id}."""
+    id: str
+    agent_id: str
+    session_id: Optional[str] = None
+    simulation_id: Optional[str] = None
+    execution_time_ms: Optional[int] = None
+    created_at: datetime
+    tool_event_count: Optional[int] = None
+    response_length: Optional[int] = None
+    user_prompt_preview: Optional[str] = None
+    response_preview: Optional[str] = None
+    thought_preview: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 class ToolExecutionLog(BaseModel):
     tool_name: str
     agent_id: str
+    log_id: Optional[str] = None
+    status: Optional[str] = None
     input_args: Dict[str, Any]
     output_result: str
     request_url: Optional[str] = None
@@ -0,0 +1,51 @@
+"""
+Per-simulation turn locks.
+
+Only one turn (step, broadcast round or autorun turn) may be in flight per simulation;
+otherwise concurrent callers read the same last message, the same agent speaks twice and
+the model is called twice. Turns on different simulations never wait on each other.
+
+On PostgreSQL the lock is a transaction-scoped advisory lock taken on the turn's own
+session, so it holds across worker processes and is released by the commit that stores
+the reply (or by the rollback if the turn fails). Other databases (SQLite in dev/tests)
+fall back to an in-process set of held simulation ids, which covers a single worker.
+"""
+import hashlib
+import threading
+from typing import Set
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+def _advisory_key(sim_id: str) -> int:
+    digest = hashlib.sha256(f"simulation:{sim_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+class SimulationTurnLocks:
+    def __init__(self):
+        self._held: Set[str] = set()
+        self._guard = threading.Lock()
+
+    @staticmethod
+    def _uses_advisory_locks(db: Session) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    def try_acquire(self, db: Session, sim_id: str) -> bool:
+        """Take the turn lock without waiting; False if another turn holds it."""
+        if self._uses_advisory_locks(db):
+            return bool(db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _advisory_key(sim_id)}
+            ).scalar())
+        with self._guard:
+            if sim_id in self._held:
+                return False
+            self._held.add(sim_id)
+            return True
+
+    def release(self, db: Session, sim_id: str):
+        # Advisory xact locks end with the session's transaction
+        if self._uses_advisory_locks(db):
+            return
+        with self._guard:
+            self._held.discard(sim_id)
+
+simulation_locks = SimulationTurnLocks()
@@ -0,0 +1,228 @@
+"""
+Server-side autorun for simulations.
+
+A started simulation is driven by an asyncio task in one process that runs turns
+back to back until the target turn count, a stop phrase, or a pause/cancel. Control
+goes through `Simulation.status`: "running" while the runner advances it, "paused"
+to hold it, and back to "active" (manual stepping) once the run ends or is cancelled.
+Progress is kept on the simulation row, so a paused run can be resumed by any worker.
+
+The row also records which runner owns the run (`autorun_runner_id`), refreshed by a
+heartbeat while the runner is attached. A new runner is only started when no live one
+owns the run in any process; a runner that finds the run owned by another one exits.
+"""
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, sessionmaker
+from . import models
+from .logger import logger
+
+# Upper bound on turns for a single autorun request
+MAX_AUTORUN_TURNS = int(os.getenv("SIMULATION_AUTORUN_MAX_TURNS", "200"))
+# How often a paused runner re-checks the status written by other workers
+PAUSE_POLL_SECONDS = float(os.getenv("SIMULATION_AUTORUN_POLL_SECONDS", "2"))
+# Back-off before retrying a turn while a manual step or round holds the turn lock
+BUSY_RETRY_SECONDS = float(os.getenv("SIMULATION_AUTORUN_BUSY_RETRY_SECONDS", "1"))
+# How often an attached runner marks itself alive; one silent for three intervals is presumed gone
+HEARTBEAT_SECONDS = float(os.getenv("SIMULATION_AUTORUN_HEARTBEAT_SECONDS", "10"))
+
+TurnFunc = Callable[[Session, str, int], Awaitable[models.SimulationMessage]]
+
+def new_runner_id() -> str:
+    return uuid.uuid4().hex
+
+def _stale_before() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=3 * HEARTBEAT_SECONDS)
+
+def runner_is_live(sim: models.Simulation) -> bool:
+    """Whether a runner in some process still owns this simulation's run."""
+    heartbeat = sim.autorun_heartbeat_at
+    if not sim.autorun_runner_id or heartbeat is None:
+        return False
+    if heartbeat.tzinfo is None:
+        # SQLite hands back naive UTC timestamps
+        heartbeat = heartbeat.replace(tzinfo=timezone.utc)
+    return heartbeat > _stale_before()
+
+class SimulationRunner:
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._wake: Dict[str, asyncio.Event] = {}
+        self._shutting_down = False
+
+    def is_active(self, sim_id: str) -> bool:
+        task = self._tasks.get(sim_id)
+        return task is not None and not task.done()
+
+    @staticmethod
+    def claim(db: Session, sim_id: str) -> Optional[str]:
+        """Take ownership of a run no live runner holds; returns the new runner id, or None."""
+        runner_id = new_runner_id()
+        claimed = db.query(models.Simulation).filter(
+            models.Simulation.id == sim_id,
+            or_(
+                models.Simulation.autorun_runner_id.is_(None),
+                models.Simulation.autorun_heartbeat_at.is_(None),
+                models.Simulation.autorun_heartbeat_at < _stale_before(),
+            ),
+        ).update(
+            {"autorun_runner_id": runner_id, "autorun_heartbeat_at": datetime.now(timezone.utc)},
+            synchronize_session=False,
+        )
+        db.commit()
+        return runner_id if claimed else None
+
+    def start(self, sim_id: str, runner_id: str, user_id: int, session_factory: sessionmaker, turn: TurnFunc):
+        """Attach a runner task to a simulation whose row is "running" and owned by `runner_id`."""
+        # A runner still attached here under another id sees the new owner and exits
+        self._wake[sim_id] = asyncio.Event()
+        self._tasks[sim_id] = asyncio.create_task(self._run(sim_id, runner_id, user_id, session_factory, turn))
+
+    def wake(self, sim_id: str):
+        event = self._wake.get(sim_id)
+        if event:
+            event.set()
+
+    async def cancel(self, sim_id: str):
+        task = self._tasks.get(sim_id)
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def shutdown(self):
+        self._shutting_down = True
+        for sim_id in list(self._tasks):
+            await self.cancel(sim_id)
+        self._shutting_down = False
+
+    # --- State on the simulation row ---
+
+    @staticmethod
+    def _load(session_factory: sessionmaker, sim_id: str) -> Optional[models.Simulation]:
+        db = session_factory()
+        try:
+            sim = db.query(models.Simulation).filter(models.Simulation.id == sim_id).first()
+            if sim:
+                db.expunge(sim)
+            return sim
+        finally:
+            db.close()
+
+    @staticmethod
+    def _update(session_factory: sessionmaker, sim_id: str, values: dict, only_if_status: Optional[str] = None,
+                only_if_runner: Optional[str] = None):
+        db = session_factory()
+        try:
+            query = db.query(models.Simulation).filter(models.Simulation.id == sim_id)
+            # Guarded transitions never overwrite a pause/cancel written while a turn was in flight
+            if only_if_status:
+                query = query.filter(models.Simulation.status == only_if_status)
+            if only_if_runner:
+                query = query.filter(models.Simulation.autorun_runner_id == only_if_runner)
+            query.update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    async def _heartbeat(self, session_factory: sessionmaker, sim_id: str, runner_id: str, stop: asyncio.Event):
+        # Also covers long turns, during which the run loop itself writes nothing
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), HEARTBEAT_SECONDS)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await run_in_threadpool(
+                    self._update, session_factory, sim_id,
+                    {"autorun_heartbeat_at": datetime.now(timezone.utc)}, None, runner_id,
+                )
+            except Exception as e:
+                logger.warning("Autorun heartbeat failed", extra={"extra_fields": {"simulation_id": sim_id, "error": str(e)}})
+
+    async def _detach(self, session_factory: sessionmaker, sim_id: str, runner_id: str, heartbeat: asyncio.Task):
+        await heartbeat
+        # Lets a resume start a new runner straight away instead of waiting out the heartbeat
+        await run_in_threadpool(self._update, session_factory, sim_id, {"autorun_runner_id": None}, None, runner_id)
+
+    async def _run(self, sim_id: str, runner_id: str, user_id: int, session_factory: sessionmaker, turn: TurnFunc):
+        wake = self._wake[sim_id]
+        stop_heartbeat = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(session_factory, sim_id, runner_id, stop_heartbeat))
+        try:
+            while True:
+                sim = await run_in_threadpool(self._load, session_factory, sim_id)
+                if not sim or sim.status not in ("running", "paused") or sim.autorun_runner_id != runner_id:
+                    return
+
+                if sim.status == "paused":
+                    wake.clear()
+                    try:
+                        await asyncio.wait_for(wake.wait(), PAUSE_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                completed = sim.autorun_completed_turns or 0
+                if completed >= (sim.autorun_target_turns or 0):
+                    await run_in_threadpool(
+                        self._update, session_factory, sim_id,
+                        {"status": "active", "autorun_stop_reason": "max_turns"}, "running",
+                    )
+                    return
+
+                db = session_factory()
+                try:
+                    message = await turn(db, sim_id, user_id)
+                    content = message.content or ""
+                except HTTPException as e:
+                    if e.status_code != 409:
+                        raise
+                    # Someone else's turn is in flight; not a failure of the run
+                    await asyncio.sleep(BUSY_RETRY_SECONDS)
+                    continue
+                finally:
+                    db.close()
+
+                # In SQL, so the count stays right even if another runner took over meanwhile
+                values = {"autorun_completed_turns": models.Simulation.autorun_completed_turns + 1}
+                await run_in_threadpool(self._update, session_factory, sim_id, values)
+
+                phrase = sim.autorun_stop_phrase
+                if phrase and phrase.lower() in content.lower():
+                    await run_in_threadpool(
+                        self._update, session_factory, sim_id,
+                        {"status": "completed", "autorun_stop_reason": "stop_phrase"}, "running",
+                    )
+                    return
+        except asyncio.CancelledError:
+            if self._shutting_down:
+                # Leave the run resumable after a restart
+                await run_in_threadpool(
+                    self._update, session_factory, sim_id,
+                    {"status": "paused", "autorun_stop_reason": "shutdown"}, "running",
+                )
+            raise
+        except Exception as e:
+            logger.error(f"Autorun failed for simulation {sim_id}: {e}", exc_info=True)
+            await run_in_threadpool(
+                self._update, session_factory, sim_id,
+                {"status": "paused", "autorun_stop_reason": f"error: {e}"}, "running",
+            )
+        finally:
+            stop_heartbeat.set()
+            await asyncio.shield(self._detach(session_factory, sim_id, runner_id, heartbeat))
+            if self._tasks.get(sim_id) is asyncio.current_task():
+                self._tasks.pop(sim_id, None)
+                self._wake.pop(sim_id, None)
+
+simulation_runner = SimulationRunner()
@@ -1,18 +1,25 @@
+import os
+import tempfile
 import pytest
+
+# Cheap hashes keep the many register/login calls fast; must be set before the app is imported
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db, to_async_url
+from app.principals import principal_cache
 
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+# File-backed SQLite so the sync engine and the async (aiosqlite) engine see the same data
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='agentic-tests-'), 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -35,7 +42,19 @@ def client(db):
             yield db
         finally:
             db.close()
-    
+
+    # No pooling: each TestClient runs its own event loop, and aiosqlite connections belong to one
+    async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Each test starts from empty tables, where ids and emails get reused
+    principal_cache.clear()
     with TestClient(app) as c:
         yield c
+    app.dependency_overrides.pop(get_async_db, None)
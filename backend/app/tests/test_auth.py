@@ -35,3 +35,62 @@ def test_login_invalid_password(client):
         data={"username": "test@example.com", "password": "wrongpassword"},
     )
     assert response.status_code == 401
+
+def _login(client, email="cache@example.com"):
+    client.post("/auth/register", json={"email": email, "password": "password123"})
+    token = client.post("/auth/token", data={"username": email, "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_principal_is_cached_between_requests(client):
+    from app.principals import principal_cache
+    headers = _login(client)
+
+    assert client.get("/users/me", headers=headers).status_code == 200
+    hits = principal_cache.hits
+    me = client.get("/users/me", headers=headers)
+    assert me.status_code == 200
+    assert me.json()["email"] == "cache@example.com"
+    assert principal_cache.hits == hits + 1
+
+def test_deactivated_user_is_rejected_at_once(client, db):
+    from app import models
+    headers = _login(client)
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    def set_user(**values):
+        # Requests close the shared test session, so look the user up each time
+        user = db.query(models.User).filter(models.User.email == "cache@example.com").first()
+        for name, value in values.items():
+            setattr(user, name, value)
+        db.commit()
+
+    set_user(role=models.UserRole.ADMIN)
+    assert client.get("/users/me", headers=headers).json()["role"] == "admin"
+
+    set_user(is_active=False)
+    db.commit()
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Inactive user"
+
+def test_login_rehashes_to_configured_cost(client, db):
+    from app import auth, models
+    client.post("/auth/register", json={"email": "old@example.com", "password": "password123"})
+    user = db.query(models.User).filter(models.User.email == "old@example.com").first()
+    user.password_hash = auth.get_password_hash("password123", rounds=5)
+    db.commit()
+
+    response = client.post("/auth/token", data={"username": "old@example.com", "password": "password123"})
+    assert response.status_code == 200
+    db.expire_all()
+    stored = db.query(models.User).filter(models.User.email == "old@example.com").first().password_hash
+    assert auth.hash_rounds(stored) == auth.password_hasher.rounds
+    assert auth.verify_password("password123", stored)
+
+def test_saturated_password_hasher_returns_503(client):
+    from unittest.mock import patch
+    from app import auth
+    with patch.object(auth.password_hasher, "max_pending", 0):
+        response = client.post("/auth/register", json={"email": "busy@example.com", "password": "password123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,55 @@
+import json
+import pytest
+from benchmarks.harness import BenchmarkConfig, compare_to_baseline, percentile, run_in_process
+from benchmarks.webhook_server import FakeWebhookServer
+
+
+def test_percentile_nearest_rank():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile(samples, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_to_baseline_flags_regressions():
+    def report(p95, rps, error_rate):
+        return {"stages": [{"concurrency": 5, "operations": {"chat.execute": {"p95_ms": p95, "rps": rps, "error_rate": error_rate}}}]}
+
+    assert compare_to_baseline(report(110, 10, 0), report(100, 10, 0)) == []
+    regressions = compare_to_baseline(report(200, 5, 0.1), report(100, 10, 0))
+    assert len(regressions) == 3
+
+
+@pytest.mark.asyncio
+async def test_in_process_benchmark_smoke():
+    with FakeWebhookServer() as webhook:
+        config = BenchmarkConfig(ramp=[2], stage_duration=0.5, webhook_url=webhook.url)
+        report = await run_in_process(config)
+
+    stage = report["stages"][0]
+    assert stage["users_ready"] == 2
+    assert stage["requests"] > 0
+    ops = stage["operations"]
+    for op in ("auth.register", "auth.login", "agents.create"):
+        assert ops[op]["errors"] == 0
+    executed = [op for op in ("chat.execute", "simulation.step", "logs.list", "tools.test", "agents.get") if op in ops]
+    assert executed
+    assert all(ops[op]["error_rate"] == 0 for op in executed)
+    assert {"p50_ms", "p95_ms", "p99_ms", "rps"} <= set(ops["auth.login"])
+
+
+def test_in_process_report_on_stdout_is_plain_json(capsys):
+    import sys
+    from unittest.mock import patch
+    from app.logger import logger
+    from benchmarks.__main__ import main
+
+    # As in a real run, the app's log handler writes to the stdout the report is printed to
+    handler = logger.handlers[0]
+    with patch.object(handler, "stream", sys.stdout):
+        assert main(["--in-process", "--ramp", "1", "--duration", "0.3", "--no-webhook"]) == 0
+    out, err = capsys.readouterr()
+    # App log lines go to stderr, so the report can be piped into a JSON reader
+    assert json.loads(out)["target"] == "in-process"
+    assert '"path"' in err
@@ -0,0 +1,223 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from google.genai import types
+from app.execution import ExecutionService
+
+
+def _response(*parts):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=list(parts)))]
+    )
+
+
+def _calc_agent():
+    tool = SimpleNamespace(
+        id="t1",
+        name="calculator",
+        description="Math",
+        type="builtin",
+        is_active=True,
+        parameter_schema={"type": "object", "properties": {"expression": {"type": "string"}}},
+        configuration={},
+    )
+    return SimpleNamespace(id="a1", name="Calc", purpose="Math", personality_config={}, tools=[tool])
+
+
+class FakeStreamingChat:
+    def __init__(self, turns):
+        self.turns = list(turns)
+        self.sent = []
+
+    async def send_message_stream(self, message):
+        self.sent.append(message)
+        chunks = self.turns.pop(0)
+
+        async def gen():
+            for chunk in chunks:
+                yield chunk
+        return gen()
+
+
+@pytest.mark.asyncio
+async def test_stream_agent_emits_tokens_tool_events_and_done():
+    service = ExecutionService()
+    chat = FakeStreamingChat([
+        [_response(types.Part(function_call=types.FunctionCall(name="calculator", args={"expression": "2+2"})))],
+        [_response(types.Part(text="The answer ")), _response(types.Part(text="is 4"))],
+    ])
+    service.provider = MagicMock()
+    service.provider.create_chat.return_value = chat
+
+    with patch("app.execution.tool_service.execute_tool", new_callable=AsyncMock) as mock_tool:
+        mock_tool.return_value = ("4", {})
+        events = [e async for e in service.stream_agent(_calc_agent(), "What is 2+2?")]
+
+    names = [e["event"] for e in events]
+    assert names == ["tool_call_start", "tool_call_end", "token", "token", "done"]
+    done = events[-1]["data"]
+    assert done["response_text"] == "The answer is 4"
+    assert done["log_data"]["tool_events"][0]["output"] == "4"
+    # Tool results go back to the model as function responses
+    assert chat.sent[1][0].function_response.response == {"result": "4"}
+
+
+class FakeChat:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    async def send_message(self, message):
+        self.sent.append(message)
+        return self.responses.pop(0)
+
+
+def _multi_tool_agent(names):
+    tools = [
+        SimpleNamespace(
+            id=f"t-{name}", name=name, description=name, type="api", is_active=True,
+            parameter_schema={"type": "object", "properties": {}}, configuration={},
+        )
+        for name in names
+    ]
+    return SimpleNamespace(id="a2", name="Multi", purpose="Fan out", personality_config={}, tools=tools)
+
+
+@pytest.mark.asyncio
+async def test_parallel_function_calls_run_concurrently_and_keep_order():
+    import asyncio
+    import time
+
+    names = ["slow_a", "slow_b", "slow_c"]
+    service = ExecutionService()
+    chat = FakeChat([
+        _response(*[types.Part(function_call=types.FunctionCall(name=n, args={})) for n in names]),
+        _response(types.Part(text="done")),
+    ])
+    service.provider = MagicMock()
+    service.provider.create_chat.return_value = chat
+
+    delays = {"slow_a": 0.2, "slow_b": 0.1, "slow_c": 0.15}
+
+    async def fake_execute(tool_model, args):
+        await asyncio.sleep(delays[tool_model.name])
+        return tool_model.name, {}
+
+    with patch("app.execution.tool_service.execute_tool", side_effect=fake_execute):
+        start = time.perf_counter()
+        result = await service.execute_agent(_multi_tool_agent(names), "go")
+        elapsed = time.perf_counter() - start
+
+    # Max of the latencies, not their sum
+    assert elapsed < 0.4
+    assert [p.function_response.name for p in chat.sent[1]] == names
+    events = result["log_data"]["tool_events"]
+    assert [e["tool"] for e in events] == names
+    assert all(e["latency_ms"] >= 90 for e in events)
+
+
+@pytest.mark.asyncio
+async def test_parallel_function_calls_respect_concurrency_cap():
+    import asyncio
+
+    names = ["c1", "c2", "c3", "c4"]
+    service = ExecutionService()
+    chat = FakeChat([
+        _response(*[types.Part(function_call=types.FunctionCall(name=n, args={})) for n in names]),
+        _response(types.Part(text="done")),
+    ])
+    service.provider = MagicMock()
+    service.provider.create_chat.return_value = chat
+
+    in_flight = 0
+    peak = 0
+
+    async def fake_execute(tool_model, args):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "ok", {}
+
+    with patch("app.execution.tool_service.execute_tool", side_effect=fake_execute):
+        await service.execute_agent(_multi_tool_agent(names), "go", max_concurrent_tools=2)
+
+    assert peak == 2
+
+
+def test_compile_agent_is_cached_until_fingerprint_changes():
+    service = ExecutionService()
+    agent = _calc_agent()
+
+    first = service.compile_agent(agent)
+    assert service.compile_agent(agent) is first
+    assert service.compiled_cache.hits == 1
+    assert "calculator" in first.tools_map
+
+    # A tool edit bumps its version, which changes the fingerprint
+    agent.tools[0].version = 2
+    second = service.compile_agent(agent)
+    assert second is not first
+
+    # Explicit invalidation by tool id drops every agent using it
+    service.invalidate_tool("t1")
+    assert len(service.compiled_cache) == 0
+
+
+def test_compiled_agent_cache_is_bounded():
+    from app.execution import CompiledAgentCache
+
+    service = ExecutionService()
+    service.compiled_cache = CompiledAgentCache(max_size=2)
+    for i in range(3):
+        agent = _calc_agent()
+        agent.id = f"agent-{i}"
+        service.compile_agent(agent)
+
+    assert len(service.compiled_cache) == 2
+    assert service.compiled_cache.get("agent-0", ()) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_agent_keeps_text_from_every_round():
+    service = ExecutionService()
+    chat = FakeStreamingChat([
+        [
+            _response(types.Part(text="Let me check. ")),
+            _response(types.Part(function_call=types.FunctionCall(name="calculator", args={"expression": "2+2"}))),
+        ],
+        [_response(types.Part(text="It is 4."))],
+    ])
+    service.provider = MagicMock()
+    service.provider.create_chat.return_value = chat
+
+    with patch("app.execution.tool_service.execute_tool", new_callable=AsyncMock) as mock_tool:
+        mock_tool.return_value = ("4", {})
+        events = [e async for e in service.stream_agent(_calc_agent(), "What is 2+2?")]
+
+    streamed = "".join(e["data"]["text"] for e in events if e["event"] == "token")
+    done = events[-1]["data"]
+    # The saved reply matches what was streamed, not just the last round
+    assert done["response_text"] == streamed == "Let me check. It is 4."
+
+
+@pytest.mark.asyncio
+async def test_stream_agent_uses_the_same_tool_round_budget_as_execute_agent():
+    from app.execution import MAX_TOOL_ROUNDS
+
+    call = types.Part(function_call=types.FunctionCall(name="calculator", args={"expression": "1+1"}))
+    service = ExecutionService()
+    # The model asks for a tool on every turn
+    chat = FakeStreamingChat([[_response(call)] for _ in range(MAX_TOOL_ROUNDS + 2)])
+    service.provider = MagicMock()
+    service.provider.create_chat.return_value = chat
+
+    with patch("app.execution.tool_service.execute_tool", new_callable=AsyncMock) as mock_tool:
+        mock_tool.return_value = ("2", {})
+        events = [e async for e in service.stream_agent(_calc_agent(), "Loop")]
+
+    assert len(chat.sent) == MAX_TOOL_ROUNDS + 1
+    # The last turn's calls are not dispatched: their results would never be sent back
+    assert mock_tool.await_count == MAX_TOOL_ROUNDS
+    assert events[-1]["event"] == "done"
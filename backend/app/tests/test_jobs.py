@@ -0,0 +1,186 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from app.jobs import job_runner
+
+
+@pytest.fixture
+def auth_headers(client):
+    client.post("/auth/register", json={"email": "jobs@example.com", "password": "password", "full_name": "Jobs"})
+    token = client.post("/auth/token", data={"username": "jobs@example.com", "password": "password"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def session_id(client, auth_headers):
+    agent_id = client.post("/agents/", json={"name": "Job Bot", "purpose": "Work"}, headers=auth_headers).json()["id"]
+    return client.post(f"/agents/{agent_id}/sessions", headers=auth_headers).json()["id"]
+
+
+def _fake_stream(delay: float = 0.0):
+    async def fake_stream(self, agent_model, user_prompt, history=[], summary=None):
+        await asyncio.sleep(delay)
+        yield {"event": "token", "data": {"text": "Do"}}
+        yield {"event": "token", "data": {"text": "ne"}}
+        yield {"event": "done", "data": {
+            "response_text": "Done",
+            "log_data": {"prompt_context": {}, "raw_response": "Done", "thought_process": "", "tool_events": [], "execution_time_ms": 3},
+        }}
+    return fake_stream
+
+
+def test_chat_job_runs_in_background(client, auth_headers, session_id):
+    with patch("app.execution.ExecutionService.stream_agent", _fake_stream()):
+        submitted = client.post("/jobs/chat", json={"session_id": session_id, "prompt": "Work hard"}, headers=auth_headers)
+        assert submitted.status_code == 202
+        job = submitted.json()
+        assert job["status"] == "queued"
+        client.portal.call(job_runner.wait, job["id"])
+
+    job = client.get(f"/jobs/{job['id']}", headers=auth_headers).json()
+    assert job["status"] == "succeeded"
+    assert job["result"]["response"] == "Done"
+    assert job["started_at"] and job["finished_at"]
+
+    # The turn was saved like any other chat turn
+    history = client.get(f"/agents/sessions/{session_id}/history", headers=auth_headers).json()
+    assert [m["content"] for m in history] == ["Work hard", "Done"]
+
+    listed = client.get("/jobs/", headers=auth_headers).json()
+    assert [j["id"] for j in listed] == [job["id"]]
+
+
+def test_job_events_are_streamed(client, auth_headers, session_id):
+    with patch("app.execution.ExecutionService.stream_agent", _fake_stream(delay=0.3)):
+        job_id = client.post("/jobs/chat", json={"session_id": session_id, "prompt": "Go"}, headers=auth_headers).json()["id"]
+        response = client.get(f"/jobs/{job_id}/events", headers=auth_headers)
+
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["status", "token", "token", "done"]
+    final = [line for line in response.text.splitlines() if line.startswith("data: ")][-1]
+    assert json.loads(final[len("data: "):])["status"] == "succeeded"
+
+    # A finished job still streams its outcome
+    again = client.get(f"/jobs/{job_id}/events", headers=auth_headers)
+    assert [line for line in again.text.splitlines() if line.startswith("event: ")][-1] == "event: done"
+
+
+def test_cancel_running_job(client, auth_headers, session_id):
+    with patch("app.execution.ExecutionService.stream_agent", _fake_stream(delay=5)):
+        job_id = client.post("/jobs/chat", json={"session_id": session_id, "prompt": "Slow"}, headers=auth_headers).json()["id"]
+        cancelled = client.post(f"/jobs/{job_id}/cancel", headers=auth_headers)
+
+    assert cancelled.status_code == 200
+    assert cancelled.json()["status"] == "cancelled"
+    assert client.post(f"/jobs/{job_id}/cancel", headers=auth_headers).status_code == 409
+    # Nothing was saved for the cancelled turn
+    assert client.get(f"/agents/sessions/{session_id}/history", headers=auth_headers).json() == []
+
+
+def test_jobs_are_owner_scoped(client, auth_headers, session_id):
+    client.post("/auth/register", json={"email": "other@example.com", "password": "password", "full_name": "Other"})
+    token = client.post("/auth/token", data={"username": "other@example.com", "password": "password"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+
+    assert client.post("/jobs/chat", json={"session_id": session_id, "prompt": "Hi"}, headers=other).status_code == 404
+    with patch("app.execution.ExecutionService.stream_agent", _fake_stream()):
+        job_id = client.post("/jobs/chat", json={"session_id": session_id, "prompt": "Hi"}, headers=auth_headers).json()["id"]
+        client.portal.call(job_runner.wait, job_id)
+    assert client.get(f"/jobs/{job_id}", headers=other).status_code == 404
+
+
+def test_stale_running_job_is_reclaimed(client, auth_headers, session_id, db):
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+    from app import models
+    from app.database import to_async_url
+    from app.jobs import JOB_STALE_SECONDS, LocalJobEvents, run_chat_job
+    from app.tests.conftest import SQLALCHEMY_DATABASE_URL
+
+    owner_id = db.query(models.User.id).filter(models.User.email == "jobs@example.com").scalar()
+    now = datetime.now(timezone.utc)
+    # A worker claimed this one and died; the other is still heartbeating somewhere
+    lost = models.AgentJob(owner_id=owner_id, session_id=session_id, prompt="Lost", status="running",
+                           heartbeat_at=now - timedelta(seconds=JOB_STALE_SECONDS + 60))
+    alive = models.AgentJob(owner_id=owner_id, session_id=session_id, prompt="Alive", status="running",
+                            heartbeat_at=now)
+    db.add_all([lost, alive])
+    db.commit()
+
+    async def redeliver(job_id):
+        engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+        try:
+            session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+            return await run_chat_job(job_id, session_factory, LocalJobEvents())
+        finally:
+            await engine.dispose()
+
+    with patch("app.execution.ExecutionService.stream_agent", _fake_stream()):
+        assert client.portal.call(redeliver, lost.id) is True
+        assert client.portal.call(redeliver, alive.id) is False
+
+    assert client.get(f"/jobs/{lost.id}", headers=auth_headers).json()["status"] == "succeeded"
+    assert client.get(f"/jobs/{alive.id}", headers=auth_headers).json()["status"] == "running"
+
+
+def test_worker_runs_every_task_on_one_event_loop():
+    import threading
+    from unittest.mock import AsyncMock
+    from app import worker
+
+    loops = []
+
+    async def fake_run(job_id, session_factory, events):
+        loops.append(asyncio.get_running_loop())
+
+    def run_tasks():
+        worker._init_worker_process()
+        try:
+            with patch.object(worker._WorkerState, "open", AsyncMock()), \
+                    patch("app.worker.jobs.run_chat_job", fake_run):
+                worker.run_chat_job_task("job-1")
+                worker.run_chat_job_task("job-2")
+        finally:
+            worker._state.loop.close()
+            worker._state = None
+
+    # Its own thread, like a worker process: the test's loop is left alone
+    thread = threading.Thread(target=run_tasks)
+    thread.start()
+    thread.join()
+
+    # Clients bound to the loop by the first task are still usable in the second
+    assert len(loops) == 2 and loops[0] is loops[1]
+
+
+def test_job_events_poll_the_job_row_when_no_events_arrive(client, auth_headers, session_id, db):
+    from app import models
+
+    owner_id = db.query(models.User.id).filter(models.User.email == "jobs@example.com").scalar()
+    # Finished in another process: nothing was published to this one
+    job = models.AgentJob(owner_id=owner_id, session_id=session_id, prompt="Elsewhere", status="succeeded",
+                          result={"response": "Done"})
+    db.add(job)
+    db.commit()
+
+    response = client.get(f"/jobs/{job.id}/events", headers=auth_headers)
+    lines = response.text.splitlines()
+    assert [line for line in lines if line.startswith("event: ")] == ["event: done"]
+    assert json.loads(lines[1][len("data: "):])["status"] == "succeeded"
+
+
+def test_failed_job_logs_its_context(client, auth_headers, session_id, caplog):
+    from unittest.mock import AsyncMock
+    from app.logger import JsonFormatter
+
+    with patch("app.chat_turns.load_chat_context", AsyncMock(side_effect=ValueError("boom"))), \
+            caplog.at_level("WARNING", logger="agentic_platform"):
+        job_id = client.post("/jobs/chat", json={"session_id": session_id, "prompt": "Fail"}, headers=auth_headers).json()["id"]
+        client.portal.call(job_runner.wait, job_id)
+
+    record = next(r for r in caplog.records if r.getMessage() == "Background job failed")
+    logged = json.loads(JsonFormatter().format(record))
+    assert logged["job_id"] == job_id
+    assert logged["error"] == "boom"
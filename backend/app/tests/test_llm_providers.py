@@ -0,0 +1,90 @@
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from app.execution import ExecutionService
+from app.llm_providers import StubProvider, LatencyDistribution, get_provider, GeminiProvider
+
+
+def _agent_with_tool():
+    tool = SimpleNamespace(
+        id="t-weather", name="get_weather", description="Weather", type="api", is_active=True,
+        parameter_schema={"type": "object", "properties": {}}, configuration={},
+    )
+    return SimpleNamespace(id="stub-agent", name="Stubby", purpose="Testing", personality_config={}, tools=[tool])
+
+
+def test_get_provider_selects_by_env(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    assert isinstance(get_provider(), StubProvider)
+    monkeypatch.setenv("LLM_PROVIDER", "gemini")
+    assert isinstance(get_provider(), GeminiProvider)
+    with pytest.raises(ValueError):
+        get_provider("unknown")
+
+
+def test_latency_distributions_are_seeded():
+    provider = StubProvider(latency="uniform:100,200", seed=7)
+    samples = [provider.latency.sample_ms(provider.rng_for("same prompt")) for _ in range(3)]
+    assert len(set(samples)) == 1
+    assert 100 <= samples[0] <= 200
+    assert LatencyDistribution("constant:5").sample_ms(provider.rng_for("x")) == 5
+    with pytest.raises(ValueError):
+        LatencyDistribution("zipf:1")
+
+
+@pytest.mark.asyncio
+async def test_stub_provider_is_deterministic():
+    service = ExecutionService()
+    service.provider = StubProvider(seed=1, response_tokens=8)
+    agent = SimpleNamespace(id="plain", name="Plain", purpose="Chat", personality_config={}, tools=[])
+
+    first = await service.execute_agent(agent, "hello")
+    second = await service.execute_agent(agent, "hello")
+    assert first["response_text"] == second["response_text"]
+    assert len(first["response_text"].split()) == 8
+
+
+@pytest.mark.asyncio
+async def test_stub_provider_scripted_function_calls_and_latency():
+    service = ExecutionService()
+    service.provider = StubProvider(
+        latency="constant:50",
+        script=[{"match": "weather", "function_calls": [{"name": "*", "args": {"city": "Paris"}}], "text": "Sunny"}],
+    )
+
+    with patch("app.execution.tool_service.execute_tool", new_callable=AsyncMock) as mock_tool:
+        mock_tool.return_value = ("20C", {})
+        start = time.perf_counter()
+        result = await service.execute_agent(_agent_with_tool(), "what's the weather?")
+        elapsed = time.perf_counter() - start
+
+    # Two model turns: the function call, then the reply
+    assert elapsed >= 0.1
+    assert result["response_text"] == "Sunny"
+    assert result["log_data"]["tool_events"][0]["input"] == {"city": "Paris"}
+
+
+@pytest.mark.asyncio
+async def test_stub_provider_streams_tokens():
+    service = ExecutionService()
+    service.provider = StubProvider(response_tokens=5, tokens_per_sec=1000)
+    agent = SimpleNamespace(id="streamer", name="Streamer", purpose="Chat", personality_config={}, tools=[])
+
+    events = [e async for e in service.stream_agent(agent, "hi")]
+    tokens = [e for e in events if e["event"] == "token"]
+    assert len(tokens) == 5
+    assert events[-1]["data"]["response_text"] == "".join(t["data"]["text"] for t in tokens)
+
+
+@pytest.mark.asyncio
+async def test_summary_goes_into_system_prompt():
+    service = ExecutionService()
+    service.provider = StubProvider(seed=1, response_tokens=4)
+    agent = SimpleNamespace(id="plain", name="Plain", purpose="Chat", personality_config={}, tools=[])
+
+    result = await service.execute_agent(agent, "hello", summary="User prefers metric units.")
+    assert result["log_data"]["prompt_context"]["system_prompt"].endswith("User prefers metric units.")
+
+    summary = await service.summarize("Earlier summary", [{"role": "user", "content": "hi"}])
+    assert summary
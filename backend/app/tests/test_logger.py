@@ -0,0 +1,53 @@
+import io
+import json
+import logging
+import threading
+from app.logger import BatchingQueueHandler, JsonFormatter
+
+def _logger(handler, name):
+    handler.setFormatter(JsonFormatter())
+    log = logging.getLogger(name)
+    log.handlers = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log
+
+def test_records_are_written_in_batches_off_the_caller_thread():
+    stream = io.StringIO()
+    handler = BatchingQueueHandler(stream, batch_size=50)
+    log = _logger(handler, "test.batching")
+
+    for i in range(120):
+        log.info("event %d", i, extra={"extra_fields": {"n": i}})
+    handler.flush()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["n"] for line in lines] == list(range(120))
+    assert lines[0]["message"] == "event 0" and lines[0]["level"] == "INFO"
+    assert handler.written_total == 120
+    handler.close()
+
+def test_full_queue_drops_and_reports_instead_of_blocking():
+    class SlowStream(io.StringIO):
+        def __init__(self):
+            super().__init__()
+            self.release = threading.Event()
+        def write(self, text):
+            self.release.wait(5)
+            return super().write(text)
+
+    stream = SlowStream()
+    handler = BatchingQueueHandler(stream, max_queue=5, batch_size=1)
+    log = _logger(handler, "test.dropping")
+
+    for i in range(50):
+        log.info("event %d", i)
+    assert handler.dropped_total > 0
+
+    stream.release.set()
+    handler.flush()
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    dropped = [line for line in lines if line["logger"] == "log-writer"]
+    assert sum(line["dropped"] for line in dropped) == handler.dropped_total
+    assert handler.written_total + handler.dropped_total == 50
+    handler.close()
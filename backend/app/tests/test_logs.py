@@ -77,3 +77,112 @@ def test_logs_get_denies_other_user(client, db):
     # user B cannot access user A log
     res = client.get(f"/logs/{log.id}", headers=headers_b)
     assert res.status_code == 404
+
+
+def test_logs_cursor_pagination_walks_all_rows_once(client, auth_header, db):
+    agent = client.post(
+        "/agents/",
+        json={"name": "Paged Agent", "purpose": "testing"},
+        headers=auth_header,
+    ).json()
+
+    from app import models
+    # Inserted in one go, so most rows share the same created_at second
+    for i in range(7):
+        db.add(models.AgentExecutionLog(
+            agent_id=agent["id"],
+            prompt_context={"user_prompt": f"u{i}"},
+            raw_response=f"r{i}",
+            execution_time_ms=1,
+        ))
+    db.commit()
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3, "agent_id": agent["id"]}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get("/logs/", params=params, headers=auth_header)
+        assert res.status_code == 200
+        seen.extend(log["id"] for log in res.json())
+        pages += 1
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+
+def test_logs_legacy_skip_still_pages(client, auth_header, db):
+    agent = client.post(
+        "/agents/",
+        json={"name": "Skip Agent", "purpose": "testing"},
+        headers=auth_header,
+    ).json()
+
+    from app import models
+    for i in range(5):
+        db.add(models.AgentExecutionLog(
+            agent_id=agent["id"],
+            prompt_context={"user_prompt": f"u{i}"},
+            raw_response=f"r{i}",
+            execution_time_ms=1,
+        ))
+    db.commit()
+
+    everything = client.get("/logs/", params={"agent_id": agent["id"]}, headers=auth_header).json()
+    res = client.get("/logs/", params={"agent_id": agent["id"], "skip": 2, "limit": 2}, headers=auth_header)
+    assert res.status_code == 200
+    assert [log["id"] for log in res.json()] == [log["id"] for log in everything[2:4]]
+
+
+def test_logs_invalid_cursor_rejected(client, auth_header):
+    res = client.get("/logs/", params={"cursor": "not-a-cursor"}, headers=auth_header)
+    assert res.status_code == 400
+
+
+def test_logs_summary_omits_heavy_columns(client, auth_header, db):
+    agent = client.post(
+        "/agents/",
+        json={"name": "Summary Agent", "purpose": "testing"},
+        headers=auth_header,
+    ).json()
+
+    from app import models, flight_recorder
+    log = flight_recorder.record_execution(db, agent["id"], {
+        "prompt_context": {"system_prompt": "s" * 5000, "history": [], "user_prompt": "What is the weather?"},
+        "raw_response": "<thought>check tool</thought>It is sunny.",
+        "thought_process": "check tool",
+        "tool_events": [{"tool": "weather", "input": {}, "output": "sunny"}],
+        "execution_time_ms": 12,
+    })
+    # A row written without the denormalized columns
+    legacy = models.AgentExecutionLog(
+        agent_id=agent["id"],
+        prompt_context={"user_prompt": "old"},
+        raw_response="legacy reply",
+        execution_time_ms=3,
+    )
+    db.add(legacy)
+    db.commit()
+    log_id, legacy_id = log.id, legacy.id
+
+    res = client.get("/logs/summary", params={"agent_id": agent["id"]}, headers=auth_header)
+    assert res.status_code == 200
+    rows = {row["id"]: row for row in res.json()}
+    assert set(rows) == {log_id, legacy_id}
+
+    summary = rows[log_id]
+    assert "prompt_context" not in summary and "raw_response" not in summary
+    assert summary["tool_event_count"] == 1
+    assert summary["user_prompt_preview"] == "What is the weather?"
+    assert summary["response_preview"] == "It is sunny."
+    assert summary["thought_preview"] == "check tool"
+    assert summary["response_length"] == len("<thought>check tool</thought>It is sunny.")
+
+    assert rows[legacy_id]["response_length"] == len("legacy reply")
+    assert rows[legacy_id]["response_preview"] == "legacy reply"
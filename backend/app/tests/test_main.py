@@ -1,3 +1,4 @@
+import json
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -34,3 +35,71 @@ def test_logs_ingest_accepts_payload():
     response = client.post("/logs/ingest", json=payload)
     assert response.status_code == 200
     assert response.json() == {"status": "received"}
+
+def test_async_database_url_uses_async_drivers():
+    from app.database import to_async_url
+    assert to_async_url("postgresql://u:p@db:5432/x") == "postgresql+asyncpg://u:p@db:5432/x"
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert to_async_url("postgresql+asyncpg://u@db/x") == "postgresql+asyncpg://u@db/x"
+
+def test_request_logging_redacts_and_echoes_correlation_id(client):
+    from unittest.mock import patch
+    with patch("app.request_logging.logger") as log:
+        response = client.post("/auth/token", data={"username": "nobody@example.com", "password": "hunter2"},
+                               headers={"X-Correlation-ID": "corr-1"})
+        client.get("/health")
+    assert response.headers["X-Correlation-ID"] == "corr-1"
+    # /health is sampled out by default; the login is logged once, redacted
+    assert log.info.call_count == 1
+    fields = log.info.call_args.kwargs["extra"]["extra_fields"]
+    assert fields["correlation_id"] == "corr-1"
+    assert fields["status_code"] == response.status_code
+    assert fields["request_body"] == {"username": "nobody@example.com", "password": "[REDACTED]"}
+
+def test_request_logging_sampling_rules():
+    from app.request_logging import SamplingRules
+    rules = SamplingRules("/health:*=0,/logs:2xx=0.1,*:5xx=1,*:2xx=0.5")
+    assert rules.rate("/health", 200) == 0 and rules.never("/health")
+    assert rules.rate("/logs/ingest", 200) == 0.1
+    assert rules.rate("/logs/ingest", 500) == 1
+    assert rules.rate("/agents/", 201) == 0.5
+    assert rules.rate("/agents/", 404) == 1.0
+    assert not rules.never("/logs")
+    assert rules.rate("/healthz", 200) == 0.5
+
+def _log_entry(level="info", i=0):
+    return {"level": level, "message": f"event {i}", "context": {"correlationId": "abc", "token": "secret"}, "timestamp": "2026-02-03T00:00:00Z"}
+
+def test_logs_ingest_batch_accepts_gzip_and_redacts():
+    import gzip
+    from unittest.mock import patch
+    from app import log_ingest
+    body = gzip.compress(json.dumps([_log_entry(i=i) for i in range(3)]).encode())
+    with patch("app.log_ingest.ingest_limiter", log_ingest.TokenBucketLimiter(10, 10)), \
+         patch("app.log_ingest.logger") as log:
+        response = client.post("/logs/ingest/batch", content=body,
+                               headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.json() == {"status": "received", "accepted": 3, "rate_limited": 0, "sampled_out": 0}
+    assert log.info.call_count == 3
+    fields = log.info.call_args.kwargs["extra"]["extra_fields"]
+    assert fields["correlation_id"] == "abc" and fields["token"] == "[REDACTED]"
+
+def test_logs_ingest_batch_rate_limits_and_samples():
+    from unittest.mock import patch
+    from app import log_ingest
+    entries = [_log_entry(i=i) for i in range(4)] + [_log_entry("debug", i) for i in range(4)]
+    with patch("app.log_ingest.ingest_limiter", log_ingest.TokenBucketLimiter(0.001, 6)), \
+         patch("app.log_ingest.sample_rates", {"debug": 0}), \
+         patch("app.log_ingest.logger"):
+        first = client.post("/logs/ingest/batch", json=entries)
+        second = client.post("/logs/ingest/batch", json=entries)
+    # Six tokens: four info entries kept, two debug entries sampled out, two over the limit
+    assert first.json() == {"status": "received", "accepted": 4, "rate_limited": 2, "sampled_out": 2}
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
+
+def test_logs_ingest_batch_rejects_bad_payloads():
+    assert client.post("/logs/ingest/batch", json=[{"level": "info"}]).status_code == 422
+    assert client.post("/logs/ingest/batch", content=b"not gzip",
+                       headers={"Content-Encoding": "gzip"}).status_code == 400
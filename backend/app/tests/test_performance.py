@@ -10,7 +10,9 @@ from app.routers import simulation
 # Import fixtures from conftest implicitly
 
 @pytest_asyncio.fixture
-async def async_client(db):
+async def async_client(client, db):
+    # Depends on `client` so this per-request session override is installed after its
+    # shared-session one: concurrent requests must not share (and close) one Session
     from app.database import get_db
     from app.tests.conftest import TestingSessionLocal
 
@@ -43,15 +45,17 @@ def agents(client, auth_token):
 
 @pytest.mark.asyncio
 async def test_concurrent_step_simulation_performance(async_client, client, auth_token, agents):
-    # Setup: Create a simulation
+    # Setup: Create simulations; steps on one simulation are serialized, so use one per request
     agent_ids = [a["id"] for a in agents]
-    sim = client.post(
-        "/simulations/",
-        json={"name": "Perf Sim", "agent_ids": agent_ids, "initial_topic": "Start"},
-        headers={"Authorization": f"Bearer {auth_token}"}
-    ).json()
-
-    sim_id = sim["id"]
+    sim_ids = [
+        client.post(
+            "/simulations/",
+            json={"name": f"Perf Sim {i}", "agent_ids": agent_ids, "initial_topic": "Start"},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        ).json()["id"]
+        for i in range(5)
+    ]
+    sim_id = sim_ids[0]
 
     # Mock objects to return
     mock_sim = MagicMock()
@@ -107,8 +111,8 @@ async def test_concurrent_step_simulation_performance(async_client, client, auth
         headers = {"Authorization": f"Bearer {auth_token}"}
 
         tasks = []
-        for _ in range(5):
-            tasks.append(async_client.post(f"/simulations/{sim_id}/step", headers=headers))
+        for target in sim_ids:
+            tasks.append(async_client.post(f"/simulations/{target}/step", headers=headers))
 
         responses = await asyncio.gather(*tasks)
 
@@ -130,3 +134,34 @@ async def test_concurrent_step_simulation_performance(async_client, client, auth
 
         assert duration < 0.8
         return duration
+
+@pytest.mark.asyncio
+async def test_concurrent_steps_on_same_simulation_conflict(async_client, client, auth_token, agents):
+    agent_ids = [a["id"] for a in agents]
+    sim_id = client.post(
+        "/simulations/",
+        json={"name": "Busy Sim", "agent_ids": agent_ids, "initial_topic": "Start"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    ).json()["id"]
+
+    async def slow_execute(*args, **kwargs):
+        await asyncio.sleep(0.2)
+        return {
+            "response_text": "Response",
+            "log_data": {"prompt_context": {}, "raw_response": "Response", "thought_process": "", "execution_time_ms": 1}
+        }
+
+    with patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock) as mock_execute:
+        mock_execute.side_effect = slow_execute
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        responses = await asyncio.gather(*(
+            async_client.post(f"/simulations/{sim_id}/step", headers=headers) for _ in range(3)
+        ))
+
+        codes = sorted(r.status_code for r in responses)
+        # Exactly one turn ran; the others were refused instead of calling the model again
+        assert codes == [200, 409, 409]
+        assert mock_execute.await_count == 1
+
+        # The lock is released afterwards
+        assert (await async_client.post(f"/simulations/{sim_id}/step", headers=headers)).status_code == 200
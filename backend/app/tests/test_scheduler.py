@@ -0,0 +1,168 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.scheduler import FairScheduler, Priority, _parse_weights
+
+
+async def _run_jobs(scheduler, jobs, hold=0.01):
+    """Start jobs (owner, flow, priority) in order while one blocker holds the only slot; return grant order."""
+    order = []
+    release_blocker = asyncio.Event()
+
+    async def blocker():
+        async with scheduler.slot(owner="blocker"):
+            await release_blocker.wait()
+
+    async def job(label, owner, flow, priority):
+        async with scheduler.slot(owner=owner, flow=flow, priority=priority):
+            order.append(label)
+            await asyncio.sleep(hold)
+
+    blocking = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = []
+    for label, owner, flow, priority in jobs:
+        tasks.append(asyncio.create_task(job(label, owner, flow, priority)))
+        await asyncio.sleep(0)
+    release_blocker.set()
+    await asyncio.gather(blocking, *tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_global_cap_is_respected():
+    scheduler = FairScheduler(max_in_flight=2)
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        async with scheduler.slot(owner=1):
+            peak = max(peak, scheduler.stats()["in_flight"])
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(job() for _ in range(6)))
+    assert peak == 2
+    assert scheduler.stats()["in_flight"] == 0
+    assert scheduler.stats()["granted_total"] == 6
+
+
+@pytest.mark.asyncio
+async def test_owners_share_fairly_and_flows_round_robin():
+    scheduler = FairScheduler(max_in_flight=1)
+    # Owner 1 floods the queue before owner 2 shows up
+    jobs = [(f"a{i}", 1, "sim-a" if i % 2 == 0 else "sim-b", Priority.BACKGROUND) for i in range(6)]
+    jobs += [("b0", 2, "sim-c", Priority.BACKGROUND), ("b1", 2, "sim-c", Priority.BACKGROUND)]
+
+    order = await _run_jobs(scheduler, jobs)
+    # Owner 2 is interleaved rather than waiting behind all of owner 1
+    assert order.index("b0") <= 2
+    assert order.index("b1") <= 4
+    # Owner 1's simulations alternate
+    owner_one = [label for label in order if label.startswith("a")]
+    assert owner_one == ["a0", "a1", "a2", "a3", "a4", "a5"]
+
+
+@pytest.mark.asyncio
+async def test_weights_give_more_slots():
+    scheduler = FairScheduler(max_in_flight=1, weights={1: 3.0})
+    jobs = [(f"a{i}", 1, None, Priority.BACKGROUND) for i in range(6)]
+    jobs += [(f"b{i}", 2, None, Priority.BACKGROUND) for i in range(6)]
+
+    order = await _run_jobs(scheduler, jobs)
+    first_eight = order[:8]
+    assert sum(label.startswith("a") for label in first_eight) == 6
+
+
+@pytest.mark.asyncio
+async def test_interactive_work_goes_first():
+    scheduler = FairScheduler(max_in_flight=1)
+    jobs = [(f"sim{i}", 1, "sim", Priority.BACKGROUND) for i in range(3)]
+    jobs += [("chat", 2, "session", Priority.INTERACTIVE)]
+
+    order = await _run_jobs(scheduler, jobs)
+    assert order[0] == "chat"
+
+
+@pytest.mark.asyncio
+async def test_wait_timeout_and_metrics():
+    scheduler = FairScheduler(max_in_flight=1, max_wait_seconds=0.05)
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(owner=1):
+            await release.wait()
+
+    holding = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+
+    waiter = asyncio.create_task(scheduler.slot(owner=2).__aenter__())
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queued"]["background"] == 1
+
+    with pytest.raises(HTTPException) as exc:
+        await waiter
+    assert exc.value.status_code == 503
+
+    release.set()
+    await holding
+    stats = scheduler.stats()
+    assert stats["queued"]["background"] == 0
+    assert stats["timeouts_total"] == 1
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = FairScheduler(max_in_flight=1)
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(owner=1):
+            await release.wait()
+
+    async def waiter():
+        async with scheduler.slot(owner=2):
+            pass
+
+    holding = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert scheduler.stats()["queued"]["background"] == 0
+    release.set()
+    await holding
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_parse_weights():
+    assert _parse_weights("1:2, 7:0.5,team:3") == {1: 2.0, 7: 0.5, "team": 3.0}
+    assert _parse_weights("") == {}
+
+
+@pytest.mark.asyncio
+async def test_redis_lease_is_renewed_while_held():
+    from unittest.mock import AsyncMock
+    from app.scheduler import RedisSlotBackend
+
+    backend = RedisSlotBackend("redis://localhost:6379/0", limit=1, lease_seconds=0.03)
+    backend._script = AsyncMock(return_value=1)
+    backend.client.zadd = AsyncMock()
+    backend.client.zrem = AsyncMock()
+    scheduler = FairScheduler(max_in_flight=1, backend=backend)
+
+    async with scheduler.slot(owner=1):
+        # A call longer than the lease keeps its slot
+        await asyncio.sleep(0.1)
+    renewals = backend.client.zadd.await_count
+    assert renewals >= 2
+    assert all(call.kwargs == {"xx": True} for call in backend.client.zadd.await_args_list)
+    backend.client.zrem.assert_awaited_once()
+
+    # Released: no more renewals
+    await asyncio.sleep(0.05)
+    assert backend.client.zadd.await_count == renewals
+    await backend.close()
@@ -82,3 +82,388 @@ def test_list_simulations(client, auth_token, agents):
     names = [s["name"] for s in data]
     assert "Sim 1" in names
     assert "Sim 2" in names
+
+def _wait_for_autorun(client, sim_id, headers, timeout=5.0):
+    import time
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        progress = client.get(f"/simulations/{sim_id}/autorun", headers=headers).json()
+        if not progress["active"]:
+            return progress
+        time.sleep(0.02)
+    raise AssertionError("autorun did not finish")
+
+def _mock_reply(text):
+    return {
+        "response_text": text,
+        "log_data": {"prompt_context": {}, "raw_response": text, "thought_process": "", "execution_time_ms": 1}
+    }
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_autorun_runs_requested_turns(mock_execute, client, auth_token, agents):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    agent_ids = [a["id"] for a in agents]
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Auto Sim", "agent_ids": agent_ids, "initial_topic": "Start"},
+        headers=headers
+    ).json()
+    mock_execute.return_value = _mock_reply("Next turn.")
+
+    res = client.post(f"/simulations/{sim['id']}/autorun", json={"turns": 3}, headers=headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "running"
+
+    progress = _wait_for_autorun(client, sim["id"], headers)
+    assert progress["completed_turns"] == 3
+    assert progress["stop_reason"] == "max_turns"
+    assert progress["status"] == "active"
+
+    messages = client.get(f"/simulations/{sim['id']}", headers=headers).json()["messages"]
+    assert len(messages) == 4
+    # Turns alternate between the agents like manual steps do
+    assert messages[1]["sender_id"] != messages[2]["sender_id"]
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_autorun_stops_on_phrase(mock_execute, client, auth_token, agents):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    agent_ids = [a["id"] for a in agents]
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Phrase Sim", "agent_ids": agent_ids, "initial_topic": "Start"},
+        headers=headers
+    ).json()
+    mock_execute.side_effect = [_mock_reply("Still talking."), _mock_reply("We are DONE here."), _mock_reply("Extra")]
+
+    client.post(f"/simulations/{sim['id']}/autorun", json={"turns": 10, "stop_phrase": "done"}, headers=headers)
+    progress = _wait_for_autorun(client, sim["id"], headers)
+    assert progress["completed_turns"] == 2
+    assert progress["stop_reason"] == "stop_phrase"
+    assert progress["status"] == "completed"
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_autorun_pause_resume_cancel(mock_execute, client, auth_token, agents):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    agent_ids = [a["id"] for a in agents]
+    import asyncio
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Control Sim", "agent_ids": agent_ids, "initial_topic": "Start"},
+        headers=headers
+    ).json()
+
+    async def slow_reply(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        return _mock_reply("Thinking out loud.")
+    mock_execute.side_effect = slow_reply
+
+    client.post(f"/simulations/{sim['id']}/autorun", json={"turns": 50}, headers=headers)
+
+    # Manual steps are refused while the runner owns the simulation
+    assert client.post(f"/simulations/{sim['id']}/step", headers=headers).status_code == 409
+    assert client.post(f"/simulations/{sim['id']}/autorun", json={"turns": 1}, headers=headers).status_code == 409
+
+    res = client.post(f"/simulations/{sim['id']}/pause", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "paused"
+
+    res = client.post(f"/simulations/{sim['id']}/resume", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "running"
+
+    res = client.post(f"/simulations/{sim['id']}/cancel", headers=headers)
+    assert res.status_code == 200
+    progress = client.get(f"/simulations/{sim['id']}/autorun", headers=headers).json()
+    assert progress["active"] is False
+    assert progress["status"] == "active"
+    assert progress["stop_reason"] == "cancelled"
+    assert progress["completed_turns"] < 50
+
+    # Back to manual stepping
+    assert client.post(f"/simulations/{sim['id']}/step", headers=headers).status_code == 200
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_step_uses_latest_messages_as_context(mock_execute, client, auth_token, agents):
+    from app import context_window
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Long Sim", "agent_ids": [a["id"] for a in agents], "initial_topic": "Rivers"},
+        headers=headers
+    ).json()
+
+    mock_execute.side_effect = [_mock_reply(f"Reply {i}") for i in range(15)]
+    for _ in range(15):
+        assert client.post(f"/simulations/{sim['id']}/step", headers=headers).status_code == 200
+
+    prompt = mock_execute.call_args.kwargs["user_prompt"]
+    # Topic stays pinned, the window slides over the most recent replies
+    assert "Topic: Rivers" in prompt
+    assert "Reply 13" in prompt
+    assert f"Reply {13 - context_window.SIMULATION_CONTEXT_MESSAGES}" not in prompt
+    assert context_window.simulation_windows.hits > 0
+
+def test_message_window_cache_tracks_latest_id():
+    from app.context_window import MessageWindowCache, WindowMessage, trim_to_budget
+    cache = MessageWindowCache(window_size=3, max_entries=2)
+    msgs = [WindowMessage(id=i, sender_id="a", sender_name="A", content=f"m{i}") for i in range(1, 5)]
+
+    cache.put("s1", msgs[0], msgs[:3])
+    assert cache.get("s1", latest_id=3) == (msgs[0], msgs[:3])
+    cache.append("s1", msgs[3])
+    assert cache.get("s1", latest_id=4) == (msgs[0], msgs[1:4])
+    # Someone else appended: stale window is not served
+    assert cache.get("s1", latest_id=5) is None
+
+    cache.put("s2", None, [])
+    cache.put("s3", None, [])
+    assert len(cache) == 2
+    assert cache.get("s1", latest_id=4) is None
+
+    long = [WindowMessage(id=i, sender_id="a", sender_name="A", content="x" * 40) for i in range(5)]
+    assert trim_to_budget(long, 25) == long[-2:]
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_simulation_summaries_paginate_without_messages(mock_execute, client, auth_token, agents):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    agent_ids = [a["id"] for a in agents]
+    sims = [
+        client.post("/simulations/", json={"name": f"Sim {i}", "agent_ids": agent_ids, "initial_topic": f"T{i}"}, headers=headers).json()
+        for i in range(3)
+    ]
+    mock_execute.return_value = _mock_reply("Latest words.")
+    client.post(f"/simulations/{sims[0]['id']}/step", headers=headers)
+
+    res = client.get("/simulations/summaries", params={"limit": 2}, headers=headers)
+    assert res.status_code == 200
+    first_page = res.json()
+    assert len(first_page) == 2
+    assert "messages" not in first_page[0]
+    cursor = res.headers["X-Next-Cursor"]
+
+    res = client.get("/simulations/summaries", params={"limit": 2, "cursor": cursor}, headers=headers)
+    second_page = res.json()
+    assert len(second_page) == 1
+    assert "X-Next-Cursor" not in res.headers
+
+    summaries = {s["id"]: s for s in first_page + second_page}
+    assert set(summaries) == {s["id"] for s in sims}
+    stepped = summaries[sims[0]["id"]]
+    assert stepped["message_count"] == 2
+    assert stepped["last_message_preview"] == "Latest words."
+    assert [p["name"] for p in stepped["participants"]] == ["Alice", "Bob"]
+    assert summaries[sims[1]["id"]]["last_message_preview"] == "Topic: T1"
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_simulation_messages_paginate_backwards(mock_execute, client, auth_token, agents):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Paged Sim", "agent_ids": [a["id"] for a in agents], "initial_topic": "Start"},
+        headers=headers
+    ).json()
+    mock_execute.side_effect = [_mock_reply(f"Reply {i}") for i in range(6)]
+    for _ in range(6):
+        client.post(f"/simulations/{sim['id']}/step", headers=headers)
+
+    # Latest messages come with the simulation, oldest first
+    res = client.get(f"/simulations/{sim['id']}", params={"message_limit": 3}, headers=headers)
+    assert [m["content"] for m in res.json()["messages"]] == ["Reply 3", "Reply 4", "Reply 5"]
+    cursor = res.headers["X-Next-Cursor"]
+
+    res = client.get(f"/simulations/{sim['id']}/messages", params={"limit": 3, "cursor": cursor}, headers=headers)
+    assert [m["content"] for m in res.json()] == ["Reply 0", "Reply 1", "Reply 2"]
+    res = client.get(f"/simulations/{sim['id']}/messages", params={"limit": 3, "cursor": res.headers["X-Next-Cursor"]}, headers=headers)
+    assert [m["content"] for m in res.json()] == ["Topic: Start"]
+    assert "X-Next-Cursor" not in res.headers
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_round_runs_all_agents_concurrently(mock_execute, client, auth_token, agents):
+    import asyncio
+    import time
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    carol = client.post("/agents/", json={"name": "Carol", "purpose": "Chat"}, headers=headers).json()
+    agent_ids = [a["id"] for a in agents] + [carol["id"]]
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Round Sim", "agent_ids": agent_ids, "initial_topic": "Ideas"},
+        headers=headers
+    ).json()
+
+    prompts = []
+    async def slow_reply(agent, user_prompt, history):
+        prompts.append(user_prompt)
+        # Finish in reverse order to show storage order does not depend on completion order
+        await asyncio.sleep(0.3 - 0.1 * len(prompts))
+        return _mock_reply(f"Idea from {agent.name}")
+    mock_execute.side_effect = slow_reply
+
+    start = time.time()
+    res = client.post(f"/simulations/{sim['id']}/round", headers=headers)
+    duration = time.time() - start
+    assert res.status_code == 200
+    assert duration < 0.5
+
+    replies = res.json()
+    assert [m["sender_id"] for m in replies] == agent_ids
+    assert [m["content"] for m in replies] == ["Idea from Alice", "Idea from Bob", "Idea from Carol"]
+    # Everyone answered the same snapshot
+    assert all("Idea from" not in p for p in prompts)
+
+    messages = client.get(f"/simulations/{sim['id']}", headers=headers).json()["messages"]
+    assert [m["content"] for m in messages[1:]] == [m["content"] for m in replies]
+
+def test_context_loaders_eager_load_agent_tools(client, auth_token, agents, db):
+    from app import models
+    from app.routers.simulation import get_round_context, get_simulation_context
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Tools Sim", "agent_ids": [a["id"] for a in agents], "initial_topic": "Start"},
+        headers=headers,
+    ).json()
+    user_id = db.query(models.User.id).filter(models.User.email == "sim@example.com").scalar()
+
+    # Loaded in the threadpool: nothing left to lazy-load on the event loop
+    _, agent, _ = get_simulation_context(db, sim["id"], user_id)
+    assert "tools" in agent.__dict__
+    _, round_agents, _ = get_round_context(db, sim["id"], user_id)
+    assert all("tools" in a.__dict__ for a in round_agents)
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_autorun_backs_off_while_turn_lock_is_held(mock_execute, client, auth_token, agents):
+    from app import simulation_runner as runner_module
+    from app.simulation_locks import simulation_locks
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Busy Sim", "agent_ids": [a["id"] for a in agents], "initial_topic": "Start"},
+        headers=headers
+    ).json()
+    mock_execute.return_value = _mock_reply("Next turn.")
+
+    # A manual step holds the lock for the runner's first two attempts
+    real_acquire = simulation_locks.try_acquire
+    attempts = []
+    def busy_then_free(db, sim_id):
+        attempts.append(sim_id)
+        return len(attempts) > 2 and real_acquire(db, sim_id)
+
+    with patch.object(runner_module, "BUSY_RETRY_SECONDS", 0.01), \
+            patch.object(simulation_locks, "try_acquire", side_effect=busy_then_free):
+        client.post(f"/simulations/{sim['id']}/autorun", json={"turns": 2}, headers=headers)
+        progress = _wait_for_autorun(client, sim["id"], headers)
+
+    assert progress["status"] == "active"
+    assert progress["stop_reason"] == "max_turns"
+    assert progress["completed_turns"] == 2
+
+def test_resume_claims_a_paused_run_once(client, auth_token, agents, db):
+    from fastapi import HTTPException
+    from app import models
+    from app.routers.simulation import _claim_paused_run
+    from app.tests.conftest import TestingSessionLocal
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Resume Sim", "agent_ids": [a["id"] for a in agents], "initial_topic": "Start"},
+        headers=headers
+    ).json()
+    db.query(models.Simulation).filter(models.Simulation.id == sim["id"]).update({"status": "paused"})
+    db.commit()
+    user_id = db.query(models.User.id).filter(models.User.email == "sim@example.com").scalar()
+
+    # Two concurrent resumes that both saw "paused": only one gets to start a runner
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    try:
+        assert _claim_paused_run(first, sim["id"], user_id).status == "running"
+        with pytest.raises(HTTPException) as exc:
+            _claim_paused_run(second, sim["id"], user_id)
+        assert exc.value.status_code == 409
+    finally:
+        first.close()
+        second.close()
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_resume_leaves_a_run_to_its_live_runner_elsewhere(mock_execute, client, auth_token, agents, db):
+    from datetime import datetime, timedelta, timezone
+    from app import models
+    from app.simulation_runner import HEARTBEAT_SECONDS, simulation_runner
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Shared Sim", "agent_ids": [a["id"] for a in agents], "initial_topic": "Start"},
+        headers=headers
+    ).json()
+    mock_execute.return_value = _mock_reply("Next turn.")
+
+    def set_owner(heartbeat_at):
+        db.query(models.Simulation).filter(models.Simulation.id == sim["id"]).update({
+            "status": "paused", "autorun_target_turns": 2, "autorun_completed_turns": 0,
+            "autorun_runner_id": "other-worker", "autorun_heartbeat_at": heartbeat_at,
+        })
+        db.commit()
+
+    # Another process's runner is still heartbeating: it resumes the run, not us
+    set_owner(datetime.now(timezone.utc))
+    res = client.post(f"/simulations/{sim['id']}/resume", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["active"] is True
+    assert not simulation_runner.is_active(sim["id"])
+    assert mock_execute.await_count == 0
+
+    # That process died: the run is taken over here
+    set_owner(datetime.now(timezone.utc) - timedelta(seconds=10 * HEARTBEAT_SECONDS))
+    assert client.post(f"/simulations/{sim['id']}/resume", headers=headers).status_code == 200
+    progress = _wait_for_autorun(client, sim["id"], headers)
+    assert progress["completed_turns"] == 2
+    assert progress["stop_reason"] == "max_turns"
+
+@patch("app.execution.ExecutionService.execute_agent", new_callable=AsyncMock)
+def test_cancelled_turn_waits_for_its_save_before_releasing_the_lock(mock_execute, client, auth_token, agents, db):
+    import asyncio
+    import threading
+    import time
+    from app import models
+    from app.routers import simulation as simulation_router
+    from app.simulation_locks import simulation_locks
+    from app.tests.conftest import TestingSessionLocal
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sim = client.post(
+        "/simulations/",
+        json={"name": "Cancel Sim", "agent_ids": [a["id"] for a in agents], "initial_topic": "Start"},
+        headers=headers
+    ).json()
+    user_id = db.query(models.User.id).filter(models.User.email == "sim@example.com").scalar()
+    mock_execute.return_value = _mock_reply("Saved anyway.")
+
+    real_save = simulation_router.save_simulation_message
+    saving = threading.Event()
+    seen = {}
+
+    def slow_save(*args):
+        saving.set()
+        time.sleep(0.2)
+        seen["lock_held"] = sim["id"] in simulation_locks._held
+        seen["message"] = real_save(*args)
+        return seen["message"]
+
+    async def cancel_during_save():
+        turn_db = TestingSessionLocal()
+        task = asyncio.create_task(simulation_router.run_simulation_turn(turn_db, sim["id"], user_id))
+        while not saving.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # Only now may the session go: the save has finished with it
+        assert "message" in seen
+        turn_db.close()
+
+    with patch.object(simulation_router, "save_simulation_message", slow_save):
+        client.portal.call(cancel_during_save)
+
+    assert seen["lock_held"] is True
+    assert sim["id"] not in simulation_locks._held
@@ -23,10 +23,8 @@ async def test_execute_api_dynamic_params():
 
     mock_client = AsyncMock()
     mock_client.get.return_value = mock_response
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__.return_value = None
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
+    with patch.object(tool_service, "_client", mock_client):
         result, metadata = await tool_service._execute_api(config, arguments)
     
     # Assertions
@@ -60,10 +58,8 @@ async def test_execute_api_dynamic_params_post():
     
     mock_client = AsyncMock()
     mock_client.post.return_value = mock_response
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__.return_value = None
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
+    with patch.object(tool_service, "_client", mock_client):
         result, metadata = await tool_service._execute_api(config, arguments)
     
     expected_url = "https://api.example.com/items/99"
@@ -25,11 +25,85 @@ async def test_execute_api_error_path():
 
     mock_client = AsyncMock()
     mock_client.get.side_effect = Exception("boom")
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__.return_value = None
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
+    with patch.object(service, "_client", mock_client):
         result, meta = await service._execute_api(config, arguments)
 
     assert "Error calling API tool" in result
     assert meta["method"] == "GET"
+
+@pytest.mark.asyncio
+async def test_execute_api_reuses_shared_client_and_per_tool_timeout():
+    import httpx
+
+    seen_timeouts = []
+
+    def handler(request: httpx.Request):
+        seen_timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200, json={"ok": True})
+
+    service = ToolService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = service._get_client()
+
+    config = {"url": "https://hooks.example.com/a", "method": "POST", "timeout": 2.5, "timeouts": {"connect": 0.5}}
+    await service._execute_api(config, {"x": 1})
+    await service._execute_api({"url": "https://hooks.example.com/b", "method": "GET"}, {})
+
+    assert service._get_client() is client
+    assert seen_timeouts[0]["connect"] == 0.5
+    assert seen_timeouts[0]["read"] == 2.5
+    assert seen_timeouts[1]["read"] == 10.0
+
+    stats = service.pool_stats()
+    assert stats["requests_total"] == 2
+    assert stats["in_flight"] == 0
+    # Idle hosts are not kept around
+    assert stats["hosts"] == {}
+
+    await service.shutdown()
+    assert service._client is None
+
+@pytest.mark.asyncio
+async def test_execute_api_caps_connections_per_host():
+    import asyncio
+    import httpx
+
+    service = ToolService()
+    service.max_connections_per_host = 2
+    peak = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal peak
+        peak = max(peak, service.pool_stats()["hosts"]["slow.example.com"]["in_flight"])
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={})
+
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    config = {"url": "https://slow.example.com/", "method": "GET"}
+    await asyncio.gather(*(service._execute_api(config, {}) for _ in range(5)))
+
+    assert peak == 2
+    await service.shutdown()
+
+@pytest.mark.asyncio
+async def test_host_slots_are_dropped_once_idle():
+    import httpx
+
+    service = ToolService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+    # Every distinct user-supplied host would otherwise leave an entry behind
+    for i in range(50):
+        await service._execute_api({"url": f"https://host{i}.example.com/", "method": "GET"}, {})
+
+    assert service._hosts == {}
+    assert service.pool_stats()["requests_total"] == 50
+    await service.shutdown()
+
+def test_pool_stats_endpoint(client):
+    client.post("/auth/register", json={"email": "pool@example.com", "password": "password"})
+    token = client.post("/auth/token", data={"username": "pool@example.com", "password": "password"}).json()["access_token"]
+
+    response = client.get("/tools/pool/stats", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert "limits" in response.json()
@@ -119,7 +119,9 @@ def test_test_tool_endpoint(mock_execute, client, auth_header):
     assert response.json() == {"result": '{"result": "mocked"}', "metadata": {"url": "http://test.com"}}
     mock_execute.assert_called_once()
 
-def test_tool_logs_include_prompt_context_events(client, auth_header, db):
+def test_tool_logs_list_recorded_invocations(client, auth_header, db):
+    from app.flight_recorder import record_execution
+
     # Create tool
     tool_data = {
         "name": "audit_tool",
@@ -133,32 +135,113 @@ def test_tool_logs_include_prompt_context_events(client, auth_header, db):
     # Create agent
     agent = client.post("/agents/", json={"name": "Logger Agent", "purpose": "Testing"}, headers=auth_header).json()
 
-    # Insert log with tool_events inside prompt_context
-    log = models.AgentExecutionLog(
-        agent_id=agent["id"],
-        prompt_context={
-            "system_prompt": "test",
-            "history": [],
-            "user_prompt": "test",
+    # Record executions the way the chat/simulation routes do
+    for i in range(3):
+        record_execution(db, agent["id"], {
+            "prompt_context": {"system_prompt": "test", "history": [], "user_prompt": "test"},
+            "raw_response": "raw",
+            "thought_process": "",
+            "execution_time_ms": 12,
             "tool_events": [
                 {
                     "tool": tool["name"],
-                    "input": {"q": "1"},
-                    "output": "ok",
-                    "metadata": {"url": "https://api.example.com"}
-                }
+                    "tool_id": tool["id"],
+                    "input": {"q": str(i)},
+                    "output": "ok" if i else "Error calling API tool: boom",
+                    "metadata": {"url": "https://api.example.com"},
+                    "latency_ms": 7,
+                },
+                {"tool": "other", "tool_id": "other-id", "input": {}, "output": "x"},
             ]
-        },
-        raw_response="raw",
-        thought_process="",
-        execution_time_ms=12
-    )
-    db.add(log)
+        })
     db.commit()
 
     response = client.get(f"/tools/{tool['id']}/logs", headers=auth_header)
     assert response.status_code == 200
     logs = response.json()
-    assert len(logs) == 1
+    assert len(logs) == 3
     assert logs[0]["tool_name"] == tool["name"]
     assert logs[0]["request_url"] == "https://api.example.com"
+    assert logs[0]["execution_time_ms"] == 7
+    assert sorted(l["status"] for l in logs) == ["error", "success", "success"]
+
+    # Keyset pages, newest first
+    first = client.get(f"/tools/{tool['id']}/logs?limit=2", headers=auth_header)
+    assert len(first.json()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/tools/{tool['id']}/logs", params={"limit": 2, "cursor": cursor}, headers=auth_header)
+    assert "X-Next-Cursor" not in second.headers
+    assert [l["input_args"] for l in first.json() + second.json()] == [l["input_args"] for l in logs]
+
+def test_backfill_tool_invocations_from_older_logs(client, auth_header, db):
+    from app import flight_recorder
+
+    tool = client.post("/tools/", json={
+        "name": "legacy tool", "description": "Old", "type": "api",
+        "parameter_schema": {"type": "object", "properties": {}}, "configuration": {},
+    }, headers=auth_header).json()
+    agent = client.post("/agents/", json={"name": "Old Agent", "purpose": "Testing"}, headers=auth_header).json()
+
+    # Logged before tool_invocations existed: the call only lives in prompt_context, under the
+    # name as sent to the model
+    for i in range(3):
+        db.add(models.AgentExecutionLog(
+            id=f"legacy-{i}", agent_id=agent["id"], raw_response="", execution_time_ms=1,
+            prompt_context={"tool_events": [{"tool": "legacy_tool", "input": {"n": i}, "output": "ok"}]},
+        ))
+    db.commit()
+    assert client.get(f"/tools/{tool['id']}/logs", headers=auth_header).json() == []
+
+    assert flight_recorder.backfill_tool_invocations(db, batch_size=2) == 3
+    logs = client.get(f"/tools/{tool['id']}/logs", headers=auth_header).json()
+    assert sorted(l["input_args"]["n"] for l in logs) == [0, 1, 2]
+    # Re-running adds nothing
+    assert flight_recorder.backfill_tool_invocations(db) == 0
+
+def test_record_execution_truncates_invocation_payloads(db):
+    from app import flight_recorder
+
+    user = models.User(email="trunc@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    agent = models.Agent(name="Trunc", owner_id=user.id)
+    db.add(agent)
+    db.commit()
+
+    big = "x" * (flight_recorder.MAX_INVOCATION_CHARS + 100)
+    log = flight_recorder.record_execution(db, agent.id, {
+        "prompt_context": {},
+        "raw_response": "",
+        "thought_process": "",
+        "execution_time_ms": 1,
+        "tool_events": [{"tool": "t", "tool_id": "t1", "input": {"blob": big}, "output": big}],
+    })
+    db.commit()
+
+    inv = db.query(models.ToolInvocation).filter(models.ToolInvocation.log_id == log.id).one()
+    assert inv.output_result.endswith("...[truncated]")
+    assert len(inv.output_result) < len(big)
+    assert "_truncated" in inv.input_args
+
+def test_update_tool_invalidates_compiled_agents(client, auth_header):
+    from app.execution import execution_service
+
+    agent_id = client.post("/agents/", json={"name": "Cache Agent", "purpose": "Testing"}, headers=auth_header).json()["id"]
+    tool = client.post("/tools/", json={"name": "cache_tool", "description": "v1", "type": "api", "parameter_schema": {}, "configuration": {}}, headers=auth_header).json()
+    client.post(f"/agents/{agent_id}/tools/{tool['id']}", headers=auth_header)
+
+    from app.tests.conftest import TestingSessionLocal
+    db = TestingSessionLocal()
+    agent = db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+    compiled = execution_service.compile_agent(agent)
+    assert compiled.gemini_tools[0].function_declarations[0].description == "v1"
+    db.close()
+
+    client.put(f"/tools/{tool['id']}", json={"name": "cache_tool", "description": "v2", "type": "api", "parameter_schema": {}, "configuration": {}}, headers=auth_header)
+
+    db = TestingSessionLocal()
+    agent = db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+    assert agent.tools[0].version == 2
+    compiled = execution_service.compile_agent(agent)
+    assert compiled.gemini_tools[0].function_declarations[0].description == "v2"
+    db.close()
@@ -1,8 +1,22 @@
 import httpx
 import json
+import os
 import asyncio
-from typing import Dict, Any, Callable
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Callable, Optional
 from datetime import datetime
+from .logger import logger
+
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("TOOL_HTTP_TIMEOUT", "10.0"))
+
+class _HostSlots:
+    __slots__ = ("semaphore", "users", "in_flight")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0  # waiting or in flight
+        self.in_flight = 0
 
 class ToolService:
     def __init__(self):
@@ -11,6 +25,117 @@ class ToolService:
             "calculator": self._calculator
         }
 
+        # Shared HTTP client for API tools (created on app startup, or lazily on first use)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.max_connections = int(os.getenv("TOOL_HTTP_MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = int(os.getenv("TOOL_HTTP_MAX_KEEPALIVE", "20"))
+        self.keepalive_expiry = float(os.getenv("TOOL_HTTP_KEEPALIVE_EXPIRY", "30.0"))
+        self.max_connections_per_host = int(os.getenv("TOOL_HTTP_MAX_PER_HOST", "10"))
+        self.http2 = os.getenv("TOOL_HTTP_HTTP2", "false").lower() == "true"
+
+        # httpx only limits connections pool-wide, so per-host caps are enforced here.
+        # Only hosts with calls waiting or in flight have an entry: tool URLs are user-supplied
+        self._hosts: Dict[str, _HostSlots] = {}
+        self._requests_total = 0
+        self._errors_total = 0
+
+    # --- Shared HTTP client lifecycle ---
+
+    def _create_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("TOOL_HTTP_HTTP2 is enabled but the 'h2' package is not installed; falling back to HTTP/1.1")
+            http2 = False
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=DEFAULT_TOOL_TIMEOUT,
+            http2=http2,
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    async def startup(self):
+        self._get_client()
+
+    async def shutdown(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "keepalive_expiry": self.keepalive_expiry,
+                "max_connections_per_host": self.max_connections_per_host,
+            },
+            "http2": self.http2,
+            "requests_total": self._requests_total,
+            "errors_total": self._errors_total,
+            "in_flight": sum(slots.in_flight for slots in self._hosts.values()),
+            "hosts": {
+                host: {
+                    "in_flight": slots.in_flight,
+                    "available_slots": max(0, self.max_connections_per_host - slots.in_flight),
+                }
+                for host, slots in self._hosts.items()
+            },
+            "connections": None,
+        }
+        # Connection-level numbers come from httpcore's pool when it is reachable
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if isinstance(connections, list):
+            stats["connections"] = {
+                "open": len(connections),
+                "idle": sum(1 for c in connections if c.is_idle()),
+                "active": sum(1 for c in connections if not c.is_idle()),
+            }
+        return stats
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        slots = self._hosts.get(host)
+        if slots is None:
+            slots = self._hosts[host] = _HostSlots(self.max_connections_per_host)
+        slots.users += 1
+        try:
+            async with slots.semaphore:
+                slots.in_flight += 1
+                try:
+                    yield
+                finally:
+                    slots.in_flight -= 1
+        finally:
+            slots.users -= 1
+            if slots.users == 0:
+                # Idle: nobody holds or waits on this semaphore, so it can go
+                del self._hosts[host]
+
+    def _build_timeout(self, config: Dict[str, Any]) -> httpx.Timeout:
+        """
+        Per-tool timeouts from Tool.configuration:
+        `timeout` (seconds, overall) and/or `timeouts` with connect/read/write/pool keys.
+        """
+        timeout = httpx.Timeout(config.get("timeout", DEFAULT_TOOL_TIMEOUT))
+        overrides = config.get("timeouts") or {}
+        if overrides:
+            timeout = httpx.Timeout(
+                connect=overrides.get("connect", timeout.connect),
+                read=overrides.get("read", timeout.read),
+                write=overrides.get("write", timeout.write),
+                pool=overrides.get("pool", timeout.pool),
+            )
+        return timeout
+
     async def execute_tool(self, tool_model: Any, arguments: Dict[str, Any]) -> tuple[str, Dict[str, Any]]:
         if tool_model.type == "builtin":
             result = await self._execute_builtin(tool_model.name, arguments)
@@ -49,16 +174,25 @@ class ToolService:
         
         metadata = {"url": url, "method": method}
 
-        async with httpx.AsyncClient() as client:
+        client = self._get_client()
+        try:
+            host = httpx.URL(url).netloc.decode("ascii")
+        except Exception:
+            host = ""
+        timeout = self._build_timeout(config)
+
+        async with self._host_slot(host):
+            self._requests_total += 1
             try:
                 if method == "GET":
-                    response = await client.get(url, params=request_args, headers=headers, timeout=10.0)
+                    response = await client.get(url, params=request_args, headers=headers, timeout=timeout)
                 else:
-                    response = await client.post(url, json=request_args, headers=headers, timeout=10.0)
+                    response = await client.post(url, json=request_args, headers=headers, timeout=timeout)
                 
                 response.raise_for_status()
                 return json.dumps(response.json()), metadata
             except Exception as e:
+                self._errors_total += 1
                 return f"Error calling API tool: {str(e)}", metadata
 
     # --- Builtin Tool Implementations ---
@@ -0,0 +1,86 @@
+"""
+Celery worker for background jobs (JOB_BACKEND=celery).
+
+    celery -A app.worker worker --concurrency 4
+
+Each worker process runs its jobs on one long-lived event loop, so the clients that bind
+to a loop on first use (the scheduler's Redis client, the LLM provider, the tools HTTP
+client) stay valid from one task to the next. The database engine and the Redis event
+stream are opened once per process on that loop too. Progress goes to the job's Redis
+stream for the web processes to relay.
+"""
+import asyncio
+from typing import Optional
+from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from . import database, jobs
+from .chat_compaction import chat_compactor
+from .tools_registry import tool_service
+
+celery_app = Celery("agentic", broker=jobs.CELERY_BROKER_URL)
+celery_app.conf.update(
+    # A job lost with its worker is redelivered and reclaimed once its heartbeat goes stale;
+    # the claim on the job row keeps a live job from running twice
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    task_ignore_result=True,
+)
+
+class _WorkerState:
+    """This process's event loop and the resources created on it."""
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.engine = None
+        self.session_factory: Optional[async_sessionmaker] = None
+        self.events: Optional[jobs.RedisJobEvents] = None
+
+    async def open(self):
+        # Created from inside the loop, which some clients bind to on construction
+        if self.engine is None:
+            self.engine = create_async_engine(database.ASYNC_DATABASE_URL, pool_pre_ping=True)
+            self.session_factory = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+            self.events = jobs.RedisJobEvents()
+
+    async def close(self):
+        await chat_compactor.shutdown()
+        await tool_service.shutdown()
+        if self.events is not None:
+            await self.events.close()
+        if self.engine is not None:
+            await self.engine.dispose()
+
+_state: Optional[_WorkerState] = None
+
+def _worker_state() -> _WorkerState:
+    global _state
+    if _state is None or _state.loop.is_closed():
+        _state = _WorkerState()
+    return _state
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    # Forked children must not reuse a loop (or connections) inherited from the parent
+    global _state
+    _state = None
+    _worker_state()
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    global _state
+    if _state is not None and not _state.loop.is_closed():
+        _state.loop.run_until_complete(_state.close())
+        _state.loop.close()
+    _state = None
+
+async def _run_chat_job(state: _WorkerState, job_id: str):
+    await state.open()
+    await jobs.run_chat_job(job_id, state.session_factory, state.events)
+    # Compactions spawned by the turn only make progress while the loop is running
+    await chat_compactor.drain()
+
+@celery_app.task(name="agentic.jobs.run_chat_job")
+def run_chat_job_task(job_id: str):
+    state = _worker_state()
+    state.loop.run_until_complete(_run_chat_job(state, job_id))
@@ -0,0 +1,17 @@
+"""
+One-off: fill tool_invocations from execution logs recorded before the table existed.
+
+Tool call history (GET /tools/{id}/logs) only reads tool_invocations, so calls logged
+earlier show up once this has run. Safe to re-run.
+
+    DATABASE_URL=... python backfill_tool_invocations.py
+"""
+from app.database import SessionLocal
+from app.flight_recorder import backfill_tool_invocations
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        print(f"Added {backfill_tool_invocations(db)} tool invocations")
+    finally:
+        db.close()
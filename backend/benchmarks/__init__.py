@@ -0,0 +1,11 @@
+"""
+End-to-end load-testing harness for the Agentic Platform API.
+
+Drives register/login, agent CRUD, chat execution, simulation steps, log listing and tool
+tests at increasing concurrency, against a running instance (`--url`) or the ASGI app
+in-process (`--in-process`), with the stub LLM and a local fake webhook server.
+Reports RPS, p50/p95/p99 latency and error rates per operation as JSON.
+
+    python -m benchmarks --in-process --ramp 1,5,10 --duration 10 --output report.json
+    python -m benchmarks --url http://localhost:8001 --baseline baseline.json
+"""
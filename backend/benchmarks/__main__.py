@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from .harness import BenchmarkConfig, DEFAULT_MIX, compare_to_baseline, run_against_url, run_in_process, write_report
+from .webhook_server import FakeWebhookServer
+
+def parse_mix(value: str):
+    mix = {name: 0 for name in DEFAULT_MIX}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Load test the Agentic Platform API.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Base URL of a running instance (start it with LLM_PROVIDER=stub)")
+    target.add_argument("--in-process", action="store_true", help="Drive the ASGI app in-process on a temporary SQLite DB")
+    parser.add_argument("--ramp", default="1,5,10", help="Comma-separated concurrency levels, one stage each")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per stage")
+    parser.add_argument("--mix", type=parse_mix, default=None, help=f"Operation weights, e.g. chat.execute=4,logs.list=1 (ops: {', '.join(DEFAULT_MIX)})")
+    parser.add_argument("--webhook-delay-ms", type=float, default=20.0, help="Latency of the fake webhook server")
+    parser.add_argument("--webhook-host", default="127.0.0.1", help="Interface for the fake webhook (must be reachable from the target)")
+    parser.add_argument("--no-webhook", action="store_true", help="Skip API tools and the fake webhook server")
+    parser.add_argument("--stub-latency", default="constant:0", help="Stub LLM latency spec for --in-process runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a stored report; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression vs. baseline")
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(
+        ramp=[int(c) for c in args.ramp.split(",") if c.strip()],
+        stage_duration=args.duration,
+        mix=args.mix or dict(DEFAULT_MIX),
+        seed=args.seed,
+    )
+
+    webhook = None
+    if not args.no_webhook:
+        webhook = FakeWebhookServer(host=args.webhook_host, delay_ms=args.webhook_delay_ms).start()
+        config.webhook_url = webhook.url
+    try:
+        if args.in_process:
+            report = asyncio.run(run_in_process(config, stub_latency=args.stub_latency))
+        else:
+            report = asyncio.run(run_against_url(args.url, config))
+            report["target"] = args.url
+    finally:
+        if webhook:
+            webhook.stop()
+    if webhook:
+        report["webhook_requests"] = webhook.requests
+
+    write_report(report, args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
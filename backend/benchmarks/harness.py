@@ -0,0 +1,340 @@
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+# Relative weight of each operation in the steady-state mix of a virtual user
+DEFAULT_MIX: Dict[str, int] = {
+    "agents.crud": 1,
+    "chat.execute": 4,
+    "simulation.step": 3,
+    "logs.list": 2,
+    "tools.test": 2,
+}
+
+@dataclass
+class BenchmarkConfig:
+    ramp: List[int] = field(default_factory=lambda: [1, 5, 10])
+    stage_duration: float = 10.0
+    mix: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    webhook_url: Optional[str] = None
+    seed: int = 0
+    request_timeout: float = 60.0
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty sample."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+class StageRecorder:
+    """Latency samples and error counts per operation for one concurrency stage."""
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, op: str, latency_ms: float, ok: bool):
+        self.latencies.setdefault(op, []).append(latency_ms)
+        if not ok:
+            self.errors[op] = self.errors.get(op, 0) + 1
+
+    def summary(self, elapsed_s: float) -> Dict[str, Any]:
+        ops = {}
+        total = 0
+        total_errors = 0
+        for op, samples in sorted(self.latencies.items()):
+            errors = self.errors.get(op, 0)
+            total += len(samples)
+            total_errors += errors
+            ops[op] = {
+                "count": len(samples),
+                "errors": errors,
+                "error_rate": errors / len(samples),
+                "rps": len(samples) / elapsed_s if elapsed_s else 0.0,
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "mean_ms": sum(samples) / len(samples),
+                "max_ms": max(samples),
+            }
+        return {
+            "elapsed_s": elapsed_s,
+            "requests": total,
+            "errors": total_errors,
+            "error_rate": total_errors / total if total else 0.0,
+            "rps": total / elapsed_s if elapsed_s else 0.0,
+            "operations": ops,
+        }
+
+class VirtualUser:
+    """
+    One simulated user: registers, logs in, creates an agent with a webhook tool,
+    a chat session and a simulation, then runs the operation mix until the stage ends.
+    """
+    def __init__(self, client: httpx.AsyncClient, config: BenchmarkConfig, recorder: StageRecorder, rng: random.Random):
+        self.client = client
+        self.config = config
+        self.recorder = recorder
+        self.rng = rng
+        self.tag = uuid.uuid4().hex[:10]
+        self.headers: Dict[str, str] = {}
+        self.agent_id: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.sim_id: Optional[str] = None
+        self.tool_id: Optional[str] = None
+
+    async def call(self, op: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.recorder.record(op, (time.perf_counter() - start) * 1000, ok)
+        return response if ok else None
+
+    async def setup(self) -> bool:
+        email = f"bench-{self.tag}@example.com"
+        password = "bench-password"
+        if not await self.call("auth.register", "POST", "/auth/register", json={"email": email, "password": password, "full_name": "Bench"}):
+            return False
+        token = await self.call("auth.login", "POST", "/auth/token", data={"username": email, "password": password})
+        if not token:
+            return False
+        self.headers = {"Authorization": f"Bearer {token.json()['access_token']}"}
+
+        agent = await self.call("agents.create", "POST", "/agents/", json={"name": f"Bench {self.tag}", "purpose": "Load testing"})
+        second = await self.call("agents.create", "POST", "/agents/", json={"name": f"Bench peer {self.tag}", "purpose": "Load testing"})
+        if not agent or not second:
+            return False
+        self.agent_id = agent.json()["id"]
+
+        if self.config.webhook_url:
+            tool = await self.call("tools.create", "POST", "/tools/", json={
+                "name": f"bench_webhook_{self.tag}",
+                "description": "Benchmark webhook",
+                "type": "api",
+                "parameter_schema": {"type": "object", "properties": {"q": {"type": "string"}}},
+                "configuration": {"url": f"{self.config.webhook_url}/hook", "method": "POST"},
+            })
+            if tool:
+                self.tool_id = tool.json()["id"]
+                await self.call("agents.add_tool", "POST", f"/agents/{self.agent_id}/tools/{self.tool_id}")
+
+        session = await self.call("sessions.create", "POST", f"/agents/{self.agent_id}/sessions")
+        sim = await self.call("simulations.create", "POST", "/simulations/", json={
+            "name": f"Bench sim {self.tag}",
+            "agent_ids": [self.agent_id, second.json()["id"]],
+            "initial_topic": "Load testing",
+        })
+        if not session or not sim:
+            return False
+        self.session_id = session.json()["id"]
+        self.sim_id = sim.json()["id"]
+        return True
+
+    async def agents_crud(self):
+        created = await self.call("agents.create", "POST", "/agents/", json={"name": f"Temp {self.tag}", "purpose": "CRUD"})
+        if not created:
+            return
+        agent_id = created.json()["id"]
+        await self.call("agents.get", "GET", f"/agents/{agent_id}")
+        await self.call("agents.update", "PUT", f"/agents/{agent_id}", json={"name": f"Temp {self.tag} v2"})
+        await self.call("agents.list", "GET", "/agents/")
+        await self.call("agents.delete", "DELETE", f"/agents/{agent_id}")
+
+    async def chat_execute(self):
+        # "webhook" in the prompt lets a scripted stub LLM route the turn through the tool
+        await self.call("chat.execute", "POST", f"/agents/sessions/{self.session_id}/execute", json={"prompt": "Please call the webhook"})
+
+    async def simulation_step(self):
+        await self.call("simulation.step", "POST", f"/simulations/{self.sim_id}/step")
+
+    async def logs_list(self):
+        await self.call("logs.list", "GET", "/logs/", params={"limit": 50})
+
+    async def tools_test(self):
+        if self.tool_id:
+            await self.call("tools.test", "POST", f"/tools/{self.tool_id}/test", json={"q": self.tag})
+
+    def operations(self) -> Dict[str, Callable[[], Awaitable[None]]]:
+        return {
+            "agents.crud": self.agents_crud,
+            "chat.execute": self.chat_execute,
+            "simulation.step": self.simulation_step,
+            "logs.list": self.logs_list,
+            "tools.test": self.tools_test,
+        }
+
+    async def run_until(self, deadline: float):
+        ops = self.operations()
+        names = [n for n, w in self.config.mix.items() if w > 0 and n in ops]
+        weights = [self.config.mix[n] for n in names]
+        while time.perf_counter() < deadline:
+            await ops[self.rng.choices(names, weights)[0]]()
+
+async def run_stage(client: httpx.AsyncClient, config: BenchmarkConfig, concurrency: int) -> Dict[str, Any]:
+    recorder = StageRecorder()
+    rng = random.Random(f"{config.seed}:{concurrency}")
+    users = [VirtualUser(client, config, recorder, random.Random(rng.random())) for _ in range(concurrency)]
+
+    setup_start = time.perf_counter()
+    ready = await asyncio.gather(*(u.setup() for u in users))
+    setup_elapsed = time.perf_counter() - setup_start
+
+    start = time.perf_counter()
+    deadline = start + config.stage_duration
+    await asyncio.gather(*(u.run_until(deadline) for u, ok in zip(users, ready) if ok))
+    elapsed = time.perf_counter() - start
+
+    summary = recorder.summary(elapsed)
+    summary["concurrency"] = concurrency
+    summary["users_ready"] = sum(ready)
+    summary["setup_s"] = setup_elapsed
+    return summary
+
+async def run_benchmark(client: httpx.AsyncClient, config: BenchmarkConfig) -> Dict[str, Any]:
+    stages = []
+    for concurrency in config.ramp:
+        stages.append(await run_stage(client, config, concurrency))
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "ramp": config.ramp,
+            "stage_duration": config.stage_duration,
+            "mix": config.mix,
+            "webhook": bool(config.webhook_url),
+            "seed": config.seed,
+        },
+        "stages": stages,
+    }
+
+async def run_against_url(base_url: str, config: BenchmarkConfig) -> Dict[str, Any]:
+    """Drive a running instance. Start it with LLM_PROVIDER=stub to keep model latency out of the numbers."""
+    limits = httpx.Limits(max_connections=max(config.ramp) * 2, max_keepalive_connections=max(config.ramp) * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=config.request_timeout, limits=limits) as client:
+        return await run_benchmark(client, config)
+
+@contextmanager
+def _app_logs_to_stderr():
+    # The app logs JSON lines to stdout, where the report may be going
+    from app.logger import flush_logs, logger
+    flush_logs()
+    redirected = [(handler, handler.stream) for handler in logger.handlers if hasattr(handler, "stream")]
+    for handler, _ in redirected:
+        handler.stream = sys.stderr
+    try:
+        yield
+    finally:
+        flush_logs()
+        for handler, stream in redirected:
+            handler.stream = stream
+
+async def run_in_process(config: BenchmarkConfig, stub_latency: str = "constant:0", database_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Drive the ASGI app in this process against a throwaway SQLite database and the stub LLM.
+    The stub calls the agent's webhook tool whenever a prompt mentions "webhook".
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.main import app
+    from app.database import Base, get_db, get_async_db, to_async_url
+    from app.execution import execution_service
+    from app.llm_providers import StubProvider
+    from app.principals import principal_cache
+    from app.tools_registry import tool_service
+
+    tmpdir = None
+    if database_url is None:
+        tmpdir = tempfile.mkdtemp(prefix="agentic-bench-")
+        database_url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = create_engine(database_url, connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {})
+    Base.metadata.create_all(bind=engine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_engine = create_async_engine(to_async_url(database_url))
+    AsyncBenchSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        db = BenchSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncBenchSession() as db:
+            yield db
+
+    previous_provider = execution_service.provider
+    previous_overrides = {dep: app.dependency_overrides.get(dep) for dep in (get_db, get_async_db)}
+    execution_service.provider = StubProvider(
+        latency=stub_latency,
+        script=[{"match": "webhook", "function_calls": [{"name": "*", "args": {"q": "bench"}}]}],
+    )
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Principals cached against another database would resolve to the wrong ids
+    principal_cache.clear()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        with _app_logs_to_stderr():
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=config.request_timeout) as client:
+                report = await run_benchmark(client, config)
+    finally:
+        # ASGITransport skips the lifespan, so close the shared tool client ourselves
+        await tool_service.shutdown()
+        execution_service.provider = previous_provider
+        for dep, previous in previous_overrides.items():
+            if previous is None:
+                app.dependency_overrides.pop(dep, None)
+            else:
+                app.dependency_overrides[dep] = previous
+        await async_engine.dispose()
+        engine.dispose()
+    report["target"] = "in-process"
+    return report
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """
+    Regressions of `report` against `baseline`, matched by stage concurrency and operation:
+    p95 latency or throughput worse by more than `tolerance`, or a higher error rate.
+    """
+    regressions = []
+    baseline_stages = {s["concurrency"]: s for s in baseline.get("stages", [])}
+    for stage in report.get("stages", []):
+        base = baseline_stages.get(stage["concurrency"])
+        if not base:
+            continue
+        for op, stats in stage["operations"].items():
+            ref = base["operations"].get(op)
+            if not ref:
+                continue
+            label = f"c={stage['concurrency']} {op}"
+            if ref["p95_ms"] and stats["p95_ms"] > ref["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{label}: p95 {stats['p95_ms']:.1f}ms vs baseline {ref['p95_ms']:.1f}ms")
+            if ref["rps"] and stats["rps"] < ref["rps"] * (1 - tolerance):
+                regressions.append(f"{label}: rps {stats['rps']:.2f} vs baseline {ref['rps']:.2f}")
+            if stats["error_rate"] > ref["error_rate"] + 0.01:
+                regressions.append(f"{label}: error rate {stats['error_rate']:.2%} vs baseline {ref['error_rate']:.2%}")
+    return regressions
+
+def write_report(report: Dict[str, Any], path: Optional[str]):
+    text = json.dumps(report, indent=2)
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+    else:
+        print(text)
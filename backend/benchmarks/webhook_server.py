@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    # Keep-alive so the platform's pooled client can reuse connections
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, payload: dict):
+        delay_ms = self.server.delay_ms
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.requests += 1
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self._reply({"ok": True, "method": "GET", "path": urlparse(self.path).path, "query": query})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            data = json.loads(raw or b"{}")
+        except ValueError:
+            data = None
+        self._reply({"ok": True, "method": "POST", "path": self.path, "echo": data})
+
+    def log_message(self, format, *args):
+        # Silence per-request stderr logging; it would dominate a load test
+        pass
+
+class FakeWebhookServer:
+    """
+    Local JSON webhook used as the target of API tools during load tests.
+    Answers any GET/POST after `delay_ms` with a small JSON payload.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay_ms: float = 0):
+        self.httpd = ThreadingHTTPServer((host, port), _WebhookHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.delay_ms = delay_ms
+        self.httpd.requests = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    def start(self) -> "FakeWebhookServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeWebhookServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
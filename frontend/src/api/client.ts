@@ -39,25 +39,53 @@ const summarizePayload = (data: any) => {
   return typeof data;
 };
 
-// Simple Log Bridge
+// Log Bridge: entries are buffered and shipped in batches to /logs/ingest/batch
+const LOG_BATCH_SIZE = 50;
+const LOG_FLUSH_MS = 2000;
+let logBuffer: any[] = [];
+let logFlushTimer: ReturnType<typeof setTimeout> | null = null;
+
+const flushLogs = async (keepalive = false) => {
+    if (logFlushTimer) {
+        clearTimeout(logFlushTimer);
+        logFlushTimer = null;
+    }
+    if (logBuffer.length === 0) return;
+    const batch = logBuffer;
+    logBuffer = [];
+
+    // We post manually to avoid using the interceptor-laden client
+    const json = JSON.stringify(batch);
+    const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+    let body: BodyInit = json;
+    if (!keepalive && typeof CompressionStream !== 'undefined') {
+        body = await new Response(new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'))).blob();
+        headers['Content-Encoding'] = 'gzip';
+    }
+    fetch(`${baseURL}/logs/ingest/batch`, { method: 'POST', headers, body, keepalive })
+        .catch(err => console.error("Failed to ship logs", err));
+};
+
+if (typeof window !== 'undefined') {
+    // Don't lose the tail of the buffer when the tab goes away
+    window.addEventListener('pagehide', () => { flushLogs(true); });
+}
+
 const shipLog = (level: 'info' | 'error' | 'debug', message: string, context: any) => {
     // Prevent infinite loop: Don't log the log shipping itself
     if (context.url && context.url.includes('/logs/ingest')) return;
 
-    // Use sendBeacon or simple fetch without waiting for response to avoid blocking
-    // We construct the payload manually to avoid using the interceptor-laden client
-    const payload = {
+    logBuffer.push({
         level,
         message,
         timestamp: new Date().toISOString(),
         context: scrubValue(context)
-    };
-
-    fetch(`${baseURL}/logs/ingest`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(payload)
-    }).catch(err => console.error("Failed to ship log", err));
+    });
+    if (logBuffer.length >= LOG_BATCH_SIZE || level === 'error') {
+        flushLogs();
+    } else if (!logFlushTimer) {
+        logFlushTimer = setTimeout(() => { flushLogs(); }, LOG_FLUSH_MS);
+    }
 };
 
 apiClient.interceptors.request.use((config) => {
@@ -120,6 +148,14 @@ export const checkHealth = async () => {
 };
 
 // Agent API
+export interface KnowledgeConfig {
+  // Chat history sent with each turn: latest N messages, then an optional token budget (0 = none)
+  history_messages?: number;
+  history_max_tokens?: number;
+  // Fold turns older than the window into a rolling session summary
+  summarize?: boolean;
+}
+
 export interface Agent {
   id: string;
   name: string;
@@ -132,6 +168,7 @@ export interface Agent {
     empathy?: number;
     assertiveness?: number;
   };
+  knowledge_config?: KnowledgeConfig;
   status: string;
   created_at: string;
   tools?: Tool[];
@@ -203,9 +240,10 @@ export interface ToolExecutionLog {
   execution_time_ms: number;
 }
 
-export const getToolLogs = async (toolId: string) => {
-  const response = await apiClient.get<ToolExecutionLog[]>(`/tools/${toolId}/logs`);
-  return response.data;
+// Newest calls first; pass nextCursor for older ones
+export const getToolLogs = async (toolId: string, params?: { cursor?: string; limit?: number }) => {
+  const response = await apiClient.get<ToolExecutionLog[]>(`/tools/${toolId}/logs`, { params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined };
 };
 
 export const testTool = async (toolId: string, arguments_payload: any) => {
@@ -224,6 +262,7 @@ export interface AgentCreate {
     empathy?: number;
     assertiveness?: number;
   };
+  knowledge_config?: KnowledgeConfig;
 }
 
 export const getAgents = async () => {
@@ -269,6 +308,16 @@ export interface ChatSession {
   agent_id: string;
   name: string;
   created_at: string;
+  message_count: number;
+  last_message_at?: string | null;
+}
+
+export interface ChatMessage {
+  id: number;
+  role: string;
+  content: string;
+  tool_calls?: any[];
+  created_at: string;
 }
 
 export const createSession = async (agentId: string) => {
@@ -276,9 +325,9 @@ export const createSession = async (agentId: string) => {
   return response.data;
 };
 
-export const getSessions = async (agentId: string) => {
-  const response = await apiClient.get<ChatSession[]>(`/agents/${agentId}/sessions`);
-  return response.data;
+export const getSessions = async (agentId: string, params?: { cursor?: string; limit?: number }) => {
+  const response = await apiClient.get<ChatSession[]>(`/agents/${agentId}/sessions`, { params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined };
 };
 
 export const executeSessionChat = async (sessionId: string, prompt: string) => {
@@ -288,11 +337,50 @@ export const executeSessionChat = async (sessionId: string, prompt: string) => {
   return response.data;
 };
 
-export const getSessionHistory = async (sessionId: string) => {
-  const response = await apiClient.get<{role: string, content: string, tool_calls?: any[]}[]>(`/agents/sessions/${sessionId}/history`);
+// Latest messages first page; pass nextCursor to load the page before them
+export const getSessionHistory = async (sessionId: string, params?: { cursor?: string; limit?: number }) => {
+  const response = await apiClient.get<ChatMessage[]>(`/agents/sessions/${sessionId}/history`, { params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined };
+};
+
+// Background jobs: long chat turns run outside the request; poll until finished
+export interface Job {
+  id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  session_id?: string | null;
+  result?: { response: string; tool_calls?: any[]; execution_time_ms?: number } | null;
+  error?: string | null;
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+}
+
+export const submitChatJob = async (sessionId: string, prompt: string) => {
+  const response = await apiClient.post<Job>('/jobs/chat', { session_id: sessionId, prompt });
   return response.data;
 };
 
+export const getJob = async (jobId: string) => {
+  const response = await apiClient.get<Job>(`/jobs/${jobId}`);
+  return response.data;
+};
+
+export const cancelJob = async (jobId: string) => {
+  const response = await apiClient.post<Job>(`/jobs/${jobId}/cancel`);
+  return response.data;
+};
+
+export const waitForJob = async (jobId: string, intervalMs = 1000) => {
+  for (;;) {
+    const job = await getJob(jobId);
+    if (job.status === 'succeeded' || job.status === 'failed' || job.status === 'cancelled') {
+      return job;
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+};
+
 // Simulation API
 export interface SimulationMessage {
   id: number;
@@ -325,6 +413,28 @@ export const getSimulations = async () => {
   return response.data;
 };
 
+export interface SimulationSummary {
+  id: string;
+  name: string;
+  status: string;
+  agent_ids: string[];
+  participants: { id: string; name: string }[];
+  message_count: number;
+  last_message_preview?: string | null;
+  last_message_at?: string | null;
+  created_at: string;
+}
+
+export const getSimulationSummaries = async (params?: { cursor?: string; limit?: number }) => {
+  const response = await apiClient.get<SimulationSummary[]>('/simulations/summaries', { params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined };
+};
+
+export const getSimulationMessages = async (id: string, params?: { cursor?: string; limit?: number }) => {
+  const response = await apiClient.get<SimulationMessage[]>(`/simulations/${id}/messages`, { params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined };
+};
+
 export const getSimulation = async (id: string) => {
   const response = await apiClient.get<Simulation>(`/simulations/${id}`);
   return response.data;
@@ -335,6 +445,46 @@ export const stepSimulation = async (id: string) => {
   return response.data;
 };
 
+export const roundSimulation = async (id: string) => {
+  const response = await apiClient.post<SimulationMessage[]>(`/simulations/${id}/round`);
+  return response.data;
+};
+
+export interface SimulationAutorunProgress {
+  simulation_id: string;
+  status: string;
+  active: boolean;
+  target_turns?: number | null;
+  completed_turns: number;
+  stop_phrase?: string | null;
+  stop_reason?: string | null;
+}
+
+export const startAutorun = async (id: string, turns: number, stop_phrase?: string) => {
+  const response = await apiClient.post<SimulationAutorunProgress>(`/simulations/${id}/autorun`, { turns, stop_phrase });
+  return response.data;
+};
+
+export const getAutorunProgress = async (id: string) => {
+  const response = await apiClient.get<SimulationAutorunProgress>(`/simulations/${id}/autorun`);
+  return response.data;
+};
+
+export const pauseAutorun = async (id: string) => {
+  const response = await apiClient.post<SimulationAutorunProgress>(`/simulations/${id}/pause`);
+  return response.data;
+};
+
+export const resumeAutorun = async (id: string) => {
+  const response = await apiClient.post<SimulationAutorunProgress>(`/simulations/${id}/resume`);
+  return response.data;
+};
+
+export const cancelAutorun = async (id: string) => {
+  const response = await apiClient.post<SimulationAutorunProgress>(`/simulations/${id}/cancel`);
+  return response.data;
+};
+
 // Logs API
 export interface AgentExecutionLog {
   id: string;
@@ -357,11 +507,30 @@ export interface AgentExecutionLog {
   created_at: string;
 }
 
-export const getLogs = async (params?: { agent_id?: string; simulation_id?: string; session_id?: string; skip?: number; limit?: number }) => {
+export const getLogs = async (params?: { agent_id?: string; simulation_id?: string; session_id?: string; cursor?: string; skip?: number; limit?: number }) => {
   const response = await apiClient.get<AgentExecutionLog[]>('/logs/', { params });
   return response.data;
 };
 
+export interface AgentExecutionLogSummary {
+  id: string;
+  agent_id: string;
+  session_id?: string;
+  simulation_id?: string;
+  execution_time_ms?: number;
+  created_at: string;
+  tool_event_count?: number | null;
+  response_length?: number | null;
+  user_prompt_preview?: string | null;
+  response_preview?: string | null;
+  thought_preview?: string | null;
+}
+
+export const getLogSummaries = async (params?: { agent_id?: string; simulation_id?: string; session_id?: string; cursor?: string; limit?: number }) => {
+  const response = await apiClient.get<AgentExecutionLogSummary[]>('/logs/summary', { params });
+  return response.data;
+};
+
 export const getLog = async (id: string) => {
   const response = await apiClient.get<AgentExecutionLog>(`/logs/${id}`);
   return response.data;
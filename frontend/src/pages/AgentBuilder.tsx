@@ -19,7 +19,7 @@ import {
 } from '@mui/material';
 import { useNavigate, useParams } from 'react-router-dom';
 import { createAgent, getAgent, updateAgent, getTools, addToolToAgent, removeToolFromAgent } from '../api/client';
-import type { AgentCreate, Tool } from '../api/client';
+import type { AgentCreate, KnowledgeConfig, Tool } from '../api/client';
 import ConstructionIcon from '@mui/icons-material/Construction';
 
 export default function AgentBuilder() {
@@ -45,6 +45,13 @@ export default function AgentBuilder() {
     assertiveness: 0.5
   });
 
+  // Conversation memory
+  const [memory, setMemory] = useState<Required<KnowledgeConfig>>({
+    history_messages: 20,
+    history_max_tokens: 0,
+    summarize: false
+  });
+
   useEffect(() => {
     fetchTools();
     if (isEditing && id) {
@@ -58,6 +65,9 @@ export default function AgentBuilder() {
           if (agent.personality_config) {
             setTraits(prev => ({ ...prev, ...agent.personality_config }));
           }
+          if (agent.knowledge_config) {
+            setMemory(prev => ({ ...prev, ...agent.knowledge_config }));
+          }
           if (agent.tools) {
             setActiveToolIds(agent.tools.map(t => t.id));
           }
@@ -107,7 +117,8 @@ export default function AgentBuilder() {
       name,
       description,
       purpose,
-      personality_config: traits
+      personality_config: traits,
+      knowledge_config: memory
     };
     
     try {
@@ -232,6 +243,43 @@ export default function AgentBuilder() {
               </Stack>
             </Grid>
 
+            {/* Memory Section */}
+            <Grid size={{ xs: 12 }}>
+              <Divider sx={{ my: 4 }} />
+              <Typography variant="h6" gutterBottom>Conversation Memory</Typography>
+              <Typography variant="body2" color="text.secondary" paragraph>
+                How much of a chat is sent back to the model each turn. Smaller windows keep long chats fast and cheap.
+              </Typography>
+              <Stack direction={{ xs: 'column', sm: 'row' }} spacing={4} alignItems="center">
+                <Box sx={{ flex: 1, width: '100%' }}>
+                  <Typography gutterBottom>Recent messages remembered</Typography>
+                  <Slider
+                    aria-label="Recent messages remembered"
+                    value={memory.history_messages}
+                    min={0} max={100} step={2}
+                    valueLabelDisplay="auto"
+                    onChange={(_, value) => setMemory(prev => ({ ...prev, history_messages: value as number }))}
+                  />
+                </Box>
+                <TextField
+                  label="Token budget (0 = no limit)"
+                  type="number"
+                  value={memory.history_max_tokens}
+                  onChange={(e) => setMemory(prev => ({ ...prev, history_max_tokens: Math.max(0, Number(e.target.value) || 0) }))}
+                  inputProps={{ min: 0, step: 500 }}
+                />
+              </Stack>
+              <Stack direction="row" alignItems="center" spacing={1} sx={{ mt: 2 }}>
+                <Switch
+                  checked={memory.summarize}
+                  onChange={(e) => setMemory(prev => ({ ...prev, summarize: e.target.checked }))}
+                />
+                <Typography variant="body2">
+                  Summarize older messages instead of forgetting them
+                </Typography>
+              </Stack>
+            </Grid>
+
             {/* Tools Section */}
             {isEditing && (
                 <Grid size={{ xs: 12 }}>
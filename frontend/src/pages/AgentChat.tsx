@@ -19,8 +19,8 @@ import SendIcon from '@mui/icons-material/Send';
 import AddIcon from '@mui/icons-material/Add';
 import ChatIcon from '@mui/icons-material/Chat';
 import { useParams, Link } from 'react-router-dom';
-import { getAgent, createSession, getSessions, executeSessionChat, getSessionHistory } from '../api/client';
-import type { Agent, ChatSession } from '../api/client';
+import { getAgent, createSession, getSessions, getSessionHistory, submitChatJob, waitForJob } from '../api/client';
+import type { Agent, ChatMessage, ChatSession } from '../api/client';
 import { useNotification } from '../context/NotificationContext';
 import ConstructionIcon from '@mui/icons-material/Construction';
 import { Chip } from '@mui/material';
@@ -37,12 +37,17 @@ export default function AgentChat() {
   const { id } = useParams<{ id: string }>();
   const [agent, setAgent] = useState<Agent | null>(null);
   const [sessions, setSessions] = useState<ChatSession[]>([]);
+  const [sessionsCursor, setSessionsCursor] = useState<string | undefined>();
   const [currentSessionId, setCurrentSessionId] = useState<string | null>(null);
   
   const [messages, setMessages] = useState<Message[]>([]);
+  const [olderCursor, setOlderCursor] = useState<string | undefined>();
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
   const messagesEndRef = useRef<null | HTMLDivElement>(null);
+  // Prepending older messages should keep the reader where they are
+  const skipScrollRef = useRef(false);
   const { showNotification } = useNotification();
 
   // Load Agent and Sessions on mount
@@ -53,19 +58,26 @@ export default function AgentChat() {
     }
   }, [id]);
 
-  const loadSessions = async () => {
+  const loadSessions = async (cursor?: string) => {
     if (!id) return;
     try {
-      const data = await getSessions(id);
-      setSessions(data);
-      if (data.length > 0 && !currentSessionId) {
-        selectSession(data[0].id);
+      const { items, nextCursor } = await getSessions(id, { cursor });
+      setSessions(prev => cursor ? [...prev, ...items] : items);
+      setSessionsCursor(nextCursor);
+      if (!cursor && items.length > 0 && !currentSessionId) {
+        selectSession(items[0].id);
       }
     } catch (err) {
       console.error(err);
     }
   };
 
+  const toMessages = (items: ChatMessage[]): Message[] => items.map(h => ({
+    role: h.role as 'user' | 'assistant',
+    content: h.content,
+    tool_calls: h.tool_calls
+  }));
+
   const createNewSession = async () => {
     if (!id) return;
     try {
@@ -81,13 +93,9 @@ export default function AgentChat() {
     setCurrentSessionId(sessionId);
     setLoading(true);
     try {
-      const history = await getSessionHistory(sessionId);
-      const typedHistory: Message[] = history.map(h => ({
-          role: h.role as 'user' | 'assistant',
-          content: h.content,
-          tool_calls: h.tool_calls
-      }));
-      setMessages(typedHistory);
+      const { items, nextCursor } = await getSessionHistory(sessionId);
+      setMessages(toMessages(items));
+      setOlderCursor(nextCursor);
     } catch {
       showNotification("Failed to load history", "error");
     } finally {
@@ -95,7 +103,26 @@ export default function AgentChat() {
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!currentSessionId || !olderCursor) return;
+    setLoadingOlder(true);
+    try {
+      const { items, nextCursor } = await getSessionHistory(currentSessionId, { cursor: olderCursor });
+      skipScrollRef.current = true;
+      setMessages(prev => [...toMessages(items), ...prev]);
+      setOlderCursor(nextCursor);
+    } catch {
+      showNotification("Failed to load older messages", "error");
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   useEffect(() => {
+    if (skipScrollRef.current) {
+      skipScrollRef.current = false;
+      return;
+    }
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   }, [messages]);
 
@@ -108,11 +135,15 @@ export default function AgentChat() {
     setLoading(true);
 
     try {
-      const result = await executeSessionChat(currentSessionId, input);
+      // Runs as a background job, so long tool-heavy turns don't hit request timeouts
+      const job = await waitForJob((await submitChatJob(currentSessionId, input)).id);
+      if (job.status !== 'succeeded' || !job.result) {
+        throw new Error(job.error || `Job ${job.status}`);
+      }
       const assistantMessage: Message = { 
         role: 'assistant', 
-        content: result.response,
-        tool_calls: result.tool_calls
+        content: job.result.response,
+        tool_calls: job.result.tool_calls
       };
       setMessages(prev => [...prev, assistantMessage]);
     } catch (error) {
@@ -151,7 +182,7 @@ export default function AgentChat() {
                     <ListItemText 
                         primary={session.name} 
                         primaryTypographyProps={{ noWrap: true, variant: 'body2' }}
-                        secondary={new Date(session.created_at).toLocaleDateString()}
+                        secondary={`${new Date(session.last_message_at || session.created_at).toLocaleDateString()} · ${session.message_count} messages`}
                     />
                 </ListItemButton>
             ))}
@@ -160,6 +191,11 @@ export default function AgentChat() {
                     No previous chats
                 </Typography>
             )}
+            {sessionsCursor && (
+                <Box sx={{ p: 1, textAlign: 'center' }}>
+                    <Button size="small" onClick={() => loadSessions(sessionsCursor)}>Load more chats</Button>
+                </Box>
+            )}
         </List>
       </Paper>
 
@@ -184,6 +220,13 @@ export default function AgentChat() {
               </Box>
           ) : (
             <List>
+                {olderCursor && (
+                    <Box sx={{ textAlign: 'center', mb: 2 }}>
+                        <Button size="small" onClick={loadOlderMessages} disabled={loadingOlder}>
+                            {loadingOlder ? 'Loading...' : 'Load older messages'}
+                        </Button>
+                    </Box>
+                )}
                 {messages.length === 0 && (
                     <Typography sx={{ textAlign: 'center', mt: 4, color: 'text.secondary' }}>
                         Start chatting with {agent.name}...
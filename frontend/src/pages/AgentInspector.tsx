@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { getLogs, getAgents } from '../api/client';
-import type { AgentExecutionLog, Agent } from '../api/client';
+import { getLogSummaries, getLog, getAgents } from '../api/client';
+import type { AgentExecutionLog, AgentExecutionLogSummary, Agent } from '../api/client';
 import { useNotification } from '../context/NotificationContext';
 import { format } from 'date-fns';
 import ArrowBackIcon from '@mui/icons-material/ArrowBack';
@@ -19,13 +19,13 @@ import {
 type Order = 'asc' | 'desc';
 
 const AgentInspector: React.FC = () => {
-  const [logs, setLogs] = useState<AgentExecutionLog[]>([]);
+  const [logs, setLogs] = useState<AgentExecutionLogSummary[]>([]);
   const [agents, setAgents] = useState<Agent[]>([]);
   
   // Search & Sort State
   const [searchQuery, setSearchQuery] = useState('');
   const [order, setOrder] = useState<Order>('desc');
-  const [orderBy, setOrderBy] = useState<keyof AgentExecutionLog | 'agent_name'>('created_at');
+  const [orderBy, setOrderBy] = useState<keyof AgentExecutionLogSummary | 'agent_name'>('created_at');
 
   // Detail Modal State
   const [selectedLog, setSelectedLog] = useState<AgentExecutionLog | null>(null);
@@ -56,7 +56,7 @@ const AgentInspector: React.FC = () => {
 
   const fetchLogs = async (silent = false) => {
     try {
-      const data = await getLogs({ 
+      const data = await getLogSummaries({ 
           limit: 100 // Fetch recent 100 logs
       });
       setLogs(data);
@@ -70,7 +70,7 @@ const AgentInspector: React.FC = () => {
     return agent ? agent.name : id.substring(0, 8);
   };
 
-  const handleRequestSort = (property: keyof AgentExecutionLog | 'agent_name') => {
+  const handleRequestSort = (property: keyof AgentExecutionLogSummary | 'agent_name') => {
     const isAsc = orderBy === property && order === 'asc';
     setOrder(isAsc ? 'desc' : 'asc');
     setOrderBy(property);
@@ -80,9 +80,9 @@ const AgentInspector: React.FC = () => {
       const query = searchQuery.toLowerCase();
       return logs.filter(log => {
           const agentName = getAgentName(log.agent_id).toLowerCase();
-          const prompt = (log.prompt_context.user_prompt || '').toLowerCase();
-          const response = (log.raw_response || '').toLowerCase();
-          const thought = (log.thought_process || '').toLowerCase();
+          const prompt = (log.user_prompt_preview || '').toLowerCase();
+          const response = (log.response_preview || '').toLowerCase();
+          const thought = (log.thought_preview || '').toLowerCase();
           
           return agentName.includes(query) || 
                  prompt.includes(query) || 
@@ -119,9 +119,14 @@ const AgentInspector: React.FC = () => {
       });
   }, [filteredLogs, order, orderBy, agents]);
 
-  const handleViewDetails = (log: AgentExecutionLog) => {
-      setSelectedLog(log);
-      setModalOpen(true);
+  const handleViewDetails = async (log: AgentExecutionLogSummary) => {
+      // The list only carries previews; load the full record for the detail view
+      try {
+          setSelectedLog(await getLog(log.id));
+          setModalOpen(true);
+      } catch (error) {
+          showNotification('Failed to load log details', 'error');
+      }
   };
 
   const truncate = (str: string, length: number = 50) => {
@@ -219,21 +224,21 @@ const AgentInspector: React.FC = () => {
                                         />
                                     </TableCell>
                                     <TableCell sx={{ maxWidth: 200 }} className="truncate">
-                                        <span title={log.prompt_context.user_prompt}>{truncate(log.prompt_context.user_prompt, 40)}</span>
+                                        <span title={log.user_prompt_preview || ''}>{truncate(log.user_prompt_preview || '', 40)}</span>
                                     </TableCell>
                                     <TableCell sx={{ maxWidth: 200 }} className="truncate">
-                                        <span className="text-gray-500 italic" title={log.thought_process || ''}>
-                                            {log.thought_process ? truncate(log.thought_process, 40) : '-'}
+                                        <span className="text-gray-500 italic" title={log.thought_preview || ''}>
+                                            {log.thought_preview ? truncate(log.thought_preview, 40) : '-'}
                                         </span>
                                     </TableCell>
                                     <TableCell sx={{ maxWidth: 250 }} className="truncate">
-                                        <span title={log.raw_response}>{truncate(log.raw_response.replace(/<thought>[\s\S]*?<\/thought>/, ''), 50)}</span>
+                                        <span title={log.response_preview || ''}>{truncate((log.response_preview || '').replace(/<thought>[\s\S]*?<\/thought>/, ''), 50)}</span>
                                     </TableCell>
                                     <TableCell>
-                                        {log.tool_events && log.tool_events.length > 0 ? (
+                                        {log.tool_event_count ? (
                                             <Chip 
                                                 icon={<ConstructionIcon sx={{ fontSize: 14 }} />} 
-                                                label={log.tool_events.length} 
+                                                label={log.tool_event_count} 
                                                 size="small" 
                                                 color="default" 
                                                 variant="outlined" 
@@ -22,16 +22,18 @@ import AddIcon from '@mui/icons-material/Add';
 import SmartToyIcon from '@mui/icons-material/SmartToy';
 import ConstructionIcon from '@mui/icons-material/Construction';
 import { Link } from 'react-router-dom';
-import { getAgents, createSimulation, getSimulation, stepSimulation, getSimulations } from '../api/client';
-import type { Agent, Simulation } from '../api/client';
+import { getAgents, createSimulation, getSimulation, stepSimulation, roundSimulation, getSimulationSummaries, startAutorun, cancelAutorun } from '../api/client';
+import type { Agent, Simulation, SimulationSummary } from '../api/client';
 import { useNotification } from '../context/NotificationContext';
 import { Chip } from '@mui/material';
 
 const DRAWER_WIDTH = 280;
+const AUTORUN_TURNS = 20;
 
 export default function SimulationPage() {
   const [agents, setAgents] = useState<Agent[]>([]);
-  const [simulations, setSimulations] = useState<Simulation[]>([]);
+  const [simulations, setSimulations] = useState<SimulationSummary[]>([]);
+  const [simulationsCursor, setSimulationsCursor] = useState<string | undefined>();
   const [selectedAgents, setSelectedAgents] = useState<string[]>([]);
   const [topic, setTopic] = useState('');
   const [simulation, setSimulation] = useState<Simulation | null>(null);
@@ -45,8 +47,14 @@ export default function SimulationPage() {
     loadSimulations();
   }, []);
 
-  const loadSimulations = () => {
-    getSimulations().then(setSimulations).catch(console.error);
+  const loadSimulations = async (cursor?: string) => {
+    try {
+      const { items, nextCursor } = await getSimulationSummaries({ cursor });
+      setSimulations(prev => cursor ? [...prev, ...items] : items);
+      setSimulationsCursor(nextCursor);
+    } catch (err) {
+      console.error(err);
+    }
   };
 
   useEffect(() => {
@@ -55,22 +63,46 @@ export default function SimulationPage() {
     }
   }, [simulation?.messages]);
 
-  // Auto-run logic
+  // Auto-run happens on the server; we only refresh the transcript while it runs
   useEffect(() => {
     let timeout: ReturnType<typeof setTimeout>;
     if (autoRun && simulation) {
-      timeout = setTimeout(handleStep, 4000);
+      timeout = setTimeout(async () => {
+        try {
+          const sim = await getSimulation(simulation.id);
+          setSimulation(sim);
+          if (sim.status !== 'running' && sim.status !== 'paused') setAutoRun(false);
+        } catch (e) {
+          console.error(e);
+          setAutoRun(false);
+        }
+      }, 2000);
     }
     return () => clearTimeout(timeout);
   }, [autoRun, simulation]);
 
+  const toggleAutoRun = async () => {
+    if (!simulation) return;
+    try {
+      if (autoRun) {
+        await cancelAutorun(simulation.id);
+        setAutoRun(false);
+      } else {
+        await startAutorun(simulation.id, AUTORUN_TURNS);
+        setAutoRun(true);
+      }
+    } catch {
+      showNotification("Failed to change auto-run", "error");
+    }
+  };
+
   const handleStart = async () => {
     if (selectedAgents.length < 2 || !topic) return;
     setLoading(true);
     try {
       const sim = await createSimulation(`Sim ${new Date().toLocaleTimeString()}`, selectedAgents, topic);
       setSimulation(sim);
-      setSimulations([sim, ...simulations]);
+      loadSimulations();
       // Reset form
       setTopic('');
       setSelectedAgents([]);
@@ -95,12 +127,26 @@ export default function SimulationPage() {
     }
   };
 
+  const handleRound = async () => {
+    if (!simulation) return;
+    try {
+      const msgs = await roundSimulation(simulation.id);
+      setSimulation(prev => prev ? {
+        ...prev,
+        messages: [...prev.messages, ...msgs]
+      } : null);
+    } catch (e) {
+      console.error(e);
+      showNotification("Round failed", "error");
+    }
+  };
+
   const selectSimulation = async (id: string) => {
     setLoading(true);
     try {
         const sim = await getSimulation(id);
         setSimulation(sim);
-        setAutoRun(false);
+        setAutoRun(sim.status === 'running' || sim.status === 'paused');
     } catch {
         showNotification("Failed to load simulation", "error");
     } finally {
@@ -139,7 +185,7 @@ export default function SimulationPage() {
                     <SmartToyIcon sx={{ mr: 2, fontSize: 20, color: 'text.secondary' }} />
                     <ListItemText 
                         primary={sim.name} 
-                        secondary={sim.messages.length > 0 ? sim.messages[0].content.substring(0, 30) + '...' : 'No messages'}
+                        secondary={sim.last_message_preview ? sim.last_message_preview.substring(0, 30) + '...' : 'No messages'}
                         primaryTypographyProps={{ noWrap: true, variant: 'body2' }}
                         secondaryTypographyProps={{ noWrap: true, fontSize: 11 }}
                     />
@@ -150,6 +196,11 @@ export default function SimulationPage() {
                     No past simulations
                 </Typography>
             )}
+            {simulationsCursor && (
+                <Box sx={{ p: 1, textAlign: 'center' }}>
+                    <Button size="small" onClick={() => loadSimulations(simulationsCursor)}>Load more simulations</Button>
+                </Box>
+            )}
         </List>
       </Paper>
 
@@ -216,7 +267,7 @@ export default function SimulationPage() {
                     <Button 
                         variant={autoRun ? "outlined" : "contained"} 
                         color={autoRun ? "error" : "primary"}
-                        onClick={() => setAutoRun(!autoRun)}
+                        onClick={toggleAutoRun}
                         startIcon={autoRun ? null : <PlayArrowIcon />}
                         size="small"
                     >
@@ -231,6 +282,15 @@ export default function SimulationPage() {
                     >
                         Step Once
                     </Button>
+                    <Button 
+                        variant="outlined" 
+                        onClick={handleRound} 
+                        disabled={autoRun}
+                        sx={{ ml: 2 }}
+                        size="small"
+                    >
+                        Everyone Responds
+                    </Button>
                     </Box>
                 </Paper>
 
@@ -23,6 +23,8 @@ const ToolLibrary: React.FC = () => {
   const [historyModalOpen, setHistoryModalOpen] = useState(false);
   const [testModalOpen, setTestModalOpen] = useState(false);
   const [selectedToolLogs, setSelectedToolLogs] = useState<ToolExecutionLog[]>([]);
+  const [historyToolId, setHistoryToolId] = useState('');
+  const [toolLogsCursor, setToolLogsCursor] = useState<string | undefined>();
   const [selectedTool, setSelectedTool] = useState<Tool | null>(null);
   const [selectedToolName, setSelectedToolName] = useState('');
   
@@ -132,18 +134,25 @@ const ToolLibrary: React.FC = () => {
     }
   };
 
-  const handleShowHistory = async (tool: Tool) => {
-      setSelectedToolName(tool.name);
-      setHistoryModalOpen(true);
-      setSelectedToolLogs([]); // Clear previous
+  const loadToolLogs = async (toolId: string, cursor?: string) => {
       try {
-          const logs = await getToolLogs(tool.id);
-          setSelectedToolLogs(logs);
+          const { items, nextCursor } = await getToolLogs(toolId, { cursor });
+          setSelectedToolLogs(prev => cursor ? [...prev, ...items] : items);
+          setToolLogsCursor(nextCursor);
       } catch (error) {
           showNotification('Failed to fetch tool history', 'error');
       }
   };
 
+  const handleShowHistory = async (tool: Tool) => {
+      setSelectedToolName(tool.name);
+      setHistoryToolId(tool.id);
+      setHistoryModalOpen(true);
+      setSelectedToolLogs([]); // Clear previous
+      setToolLogsCursor(undefined);
+      await loadToolLogs(tool.id);
+  };
+
   const handleOpenTest = (tool: Tool) => {
       setSelectedTool(tool);
       // Try to generate a sample JSON from schema keys
@@ -421,6 +430,11 @@ const ToolLibrary: React.FC = () => {
                         </Table>
                     </TableContainer>
                 )}
+                {toolLogsCursor && (
+                    <Box sx={{ pt: 1, textAlign: 'center' }}>
+                        <Button size="small" onClick={() => loadToolLogs(historyToolId, toolLogsCursor)}>Load older calls</Button>
+                    </Box>
+                )}
             </DialogContent>
             <DialogActions>
                 <Button onClick={() => setHistoryModalOpen(false)}>Close</Button>